@@ -0,0 +1,98 @@
+"""
+Conversion time with each regex backend on the adversarial corpus.
+
+For every backend that is installed, each input of ``ADVERSARIAL_INPUTS`` from
+``tests/test_performance.py`` is converted at several sizes and reported with:
+
+- "ms": the conversion time of the largest input, in milliseconds
+- "growth": the fitted exponent k of time ~ n ** k (1.0 is linear)
+
+A "mixed" row converts a generated document, and a "plugin" row a line on
+which the regex plugin ``(a|aa)+$`` backtracks exponentially with ``re``::
+
+    python benchmarks/backends.py
+    python benchmarks/backends.py --backends re re2 --document-mode
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate_document
+from markdown_to_mrkdwn.converter import SlackMarkdownConverter
+from tests.test_performance import ADVERSARIAL_INPUTS, SIZES, _best_time, growth_exponent
+
+BACKENDS = ("re", "re2", "regex")
+
+# The regex plugin of the "plugin" row and the length of its input, chosen so
+# that re takes about a tenth of a second
+PLUGIN_PATTERN = r"(a|aa)+$"
+PLUGIN_LENGTH = 27
+
+
+def available_backends() -> List[str]:
+    """Get the backends whose packages are installed."""
+    return [name for name in BACKENDS if name == "re" or importlib.util.find_spec(name) is not None]
+
+
+def run(backends: List[str], sizes=SIZES, document_mode: bool = False) -> Dict[str, Dict[str, Tuple[float, float]]]:
+    """
+    Time the conversion of every input with every backend.
+
+    Args:
+        backends (List[str]): The backend names
+        sizes: Input sizes in characters, each twice the previous one
+        document_mode (bool): Convert in document mode
+
+    Returns:
+        Dict[str, Dict[str, Tuple[float, float]]]: For each input and backend, the
+        time of the largest input in seconds and the growth exponent
+    """
+    inputs = dict(ADVERSARIAL_INPUTS)
+    inputs["mixed"] = lambda n: generate_document(n)
+    results: Dict[str, Dict[str, Tuple[float, float]]] = {name: {} for name in inputs}
+    results["plugin"] = {}
+    for backend in backends:
+        converter = SlackMarkdownConverter(document_mode=document_mode, regex_backend=backend)
+        for name, generate in inputs.items():
+            results[name][backend] = (_best_time(converter.convert, generate(sizes[-1])),
+                                      growth_exponent(converter.convert, generate, sizes))
+        converter.register_regex_plugin("plugin", PLUGIN_PATTERN, "matched")
+        # A match that times out is logged as a failed conversion
+        logging.disable(logging.ERROR)
+        try:
+            results["plugin"][backend] = (_best_time(converter.convert, "a" * PLUGIN_LENGTH + "!"), 0.0)
+        finally:
+            logging.disable(logging.NOTSET)
+    return results
+
+
+def report(results: Dict[str, Dict[str, Tuple[float, float]]], backends: List[str]) -> str:
+    """Format the results as a table with a time and growth column per backend."""
+    rows = [f"{'input':<24}" + "".join(f" {backend + ' ms':>11} {'growth':>7}" for backend in backends)]
+    for name, timings in results.items():
+        rows.append(f"{name:<24}" + "".join(f" {timings[backend][0] * 1000:>11.3f} {timings[backend][1]:>7.2f}"
+                                            for backend in backends))
+    return "\n".join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark from the command line and return the exit status."""
+    parser = argparse.ArgumentParser(description="Compare the regex backends on adversarial inputs")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=available_backends())
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--document-mode", action="store_true")
+    args = parser.parse_args(argv)
+
+    print(report(run(args.backends, args.sizes, args.document_mode), args.backends))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
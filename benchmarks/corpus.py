@@ -0,0 +1,106 @@
+"""
+Deterministic Markdown documents for the benchmarks.
+
+The documents mix the constructs found in chat messages and generated reports:
+headings, paragraphs with inline formatting, links and inline code, nested
+lists, task lists, quotes, fenced code blocks and tables. The same size and
+seed always produce the same text, so results can be compared between runs.
+"""
+
+import random
+from typing import List
+
+_WORDS = ("deploy", "service", "latency", "request", "queue", "worker", "error", "release",
+          "cluster", "config", "metric", "alert", "build", "cache", "token", "shard")
+
+# Words outside ASCII, for documents that exercise the encoding round trip
+_UNICODE_WORDS = ("café", "naïve", "→", "Größe", "東京", "✅")
+
+
+def _sentence(rng: random.Random, words: tuple) -> str:
+    parts = []
+    for _ in range(rng.randint(4, 12)):
+        word = rng.choice(words)
+        roll = rng.random()
+        if roll < 0.06:
+            word = f"**{word}**"
+        elif roll < 0.10:
+            word = f"*{word}*"
+        elif roll < 0.13:
+            word = f"`{word}()`"
+        elif roll < 0.15:
+            word = f"~~{word}~~"
+        elif roll < 0.17:
+            word = f"[{word}](https://example.com/{word}/{rng.randint(1, 999)})"
+        elif roll < 0.18:
+            word = f"https://ci.example.com/jobs/{rng.randint(1, 99999)}"
+        parts.append(word)
+    return " ".join(parts).capitalize() + "."
+
+
+def _block(rng: random.Random, words: tuple) -> List[str]:
+    kind = rng.random()
+    if kind < 0.10:
+        return ["#" * rng.randint(1, 4) + " " + _sentence(rng, words).rstrip(".")]
+    if kind < 0.40:
+        return [" ".join(_sentence(rng, words) for _ in range(rng.randint(1, 4)))]
+    if kind < 0.55:
+        return [("  " * rng.randint(0, 1)) + rng.choice("-*") + " " + _sentence(rng, words)
+                for _ in range(rng.randint(2, 6))]
+    if kind < 0.62:
+        return [f"- [{rng.choice(' x')}] " + _sentence(rng, words) for _ in range(rng.randint(2, 4))]
+    if kind < 0.69:
+        return [f"{number}. " + _sentence(rng, words) for number in range(1, rng.randint(3, 6))]
+    if kind < 0.75:
+        return ["> " + _sentence(rng, words) for _ in range(rng.randint(1, 3))]
+    if kind < 0.85:
+        body = [f"{rng.choice(words)} = {rng.randint(0, 9999)}  # **not** converted"
+                for _ in range(rng.randint(2, 8))]
+        return ["```" + rng.choice(("", "python", "bash"))] + body + ["```"]
+    if kind < 0.95:
+        columns = rng.randint(2, 5)
+        header = "| " + " | ".join(rng.choice(words).title() for _ in range(columns)) + " |"
+        separator = "|" + "|".join("---" for _ in range(columns)) + "|"
+        rows = ["| " + " | ".join(str(rng.randint(0, 999)) for _ in range(columns)) + " |"
+                for _ in range(rng.randint(2, 10))]
+        return [header, separator] + rows
+    return ["---"]
+
+
+def generate_document(size: int, seed: int = 0, unicode: bool = False) -> str:
+    """
+    Generate a Markdown document of about the given size.
+
+    Args:
+        size (int): The approximate length in characters
+        seed (int): Selects the document; the same seed gives the same text
+        unicode (bool): Mix in words outside ASCII. Default is False.
+
+    Returns:
+        str: The document, at least ``size`` characters long
+    """
+    rng = random.Random(seed)
+    words = _WORDS + _UNICODE_WORDS if unicode else _WORDS
+    blocks = []
+    length = 0
+    while length < size:
+        block = "\n".join(_block(rng, words))
+        blocks.append(block)
+        length += len(block) + 2
+    return "\n\n".join(blocks)
+
+
+def generate_corpus(count: int, size: int, seed: int = 0, unicode: bool = False) -> List[str]:
+    """
+    Generate distinct documents of about the same size.
+
+    Args:
+        count (int): The number of documents
+        size (int): The approximate length of each document in characters
+        seed (int): Selects the corpus
+        unicode (bool): Mix in words outside ASCII. Default is False.
+
+    Returns:
+        List[str]: The documents
+    """
+    return [generate_document(size, seed * 1000003 + index, unicode) for index in range(count)]
@@ -0,0 +1,239 @@
+"""
+Peak memory and allocations of each stage of ``SlackMarkdownConverter.convert``.
+
+Each stage of the conversion pipeline is run on its own under tracemalloc, on
+generated documents of several sizes, and reported with:
+
+- "peak": the most memory in use above the level at the start of the stage
+- "retained": the memory still in use when the stage ends, less what it freed
+- "blocks": the change in the number of allocated memory blocks
+
+A last "convert" row measures the whole ``convert()`` call. Results can be
+saved as a baseline and later runs checked against it, failing when a peak or
+block count grows by more than a tolerance::
+
+    python benchmarks/memory.py
+    python benchmarks/memory.py --save
+    python benchmarks/memory.py --check --tolerance 0.1
+
+Requires Python 3.9 or later for ``tracemalloc.reset_peak``.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate_document
+from markdown_to_mrkdwn.converter import ConversionState, SlackMarkdownConverter, _restore_tables
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "memory_baseline.json")
+
+SIZES = (10000, 100000, 1000000)
+
+# Converter options and corpus variant of each benchmarked configuration
+MODES = {
+    "line": ({}, False),
+    "document": ({"document_mode": True}, False),
+    "unicode": ({}, True),
+}
+
+Measurement = Dict[str, int]
+
+
+def pipeline(converter: SlackMarkdownConverter) -> List[Tuple[str, Callable[[Dict[str, Any]], None]]]:
+    """
+    Split a conversion into the stages ``convert()`` runs for a converter without plugins.
+
+    Each stage reads its input from, and stores its output in, a shared dictionary
+    that starts out holding the "markdown" to convert.
+
+    Args:
+        converter (SlackMarkdownConverter): The converter whose stages are run
+
+    Returns:
+        List[Tuple[str, Callable[[Dict[str, Any]], None]]]: The name and function of
+        each stage, in order
+    """
+    def strip(data):
+        data["text"] = data.pop("markdown").strip()
+
+    def tables(data):
+        data["state"] = state = ConversionState()
+        state.plugins, state.patterns = converter.plugins, converter.patterns
+        data["text"] = converter._convert_tables(data["text"], data["state"])
+
+    def split(data):
+        data["lines"] = data.pop("text").splitlines()
+
+    def lines(data):
+        state = data["state"]
+        if converter.document_mode:
+            if not converter._convert_staged(data["lines"], state, segments=True):
+                converter._convert_staged(data["lines"], state, segments=False)
+        else:
+            converter._convert_lines(data["lines"], state)
+
+    def join(data):
+        data["result"] = "\n".join(data["state"].converted_lines)
+
+    def placeholders(data):
+        if data["state"].table_replacements:
+            data["result"] = _restore_tables(data["result"], data["state"].table_replacements)
+
+    def encoding(data):
+        data["result"] = converter._check_encoding(data["result"])
+
+    return [("strip", strip), ("tables", tables), ("split", split), ("lines", lines),
+            ("join", join), ("placeholders", placeholders), ("encoding", encoding)]
+
+
+def _traced_blocks() -> int:
+    return len(tracemalloc.take_snapshot().traces)
+
+
+def measure(func: Callable[..., Any], *args: Any) -> Measurement:
+    """
+    Measure the memory used by one call under tracemalloc, which must be tracing.
+
+    Args:
+        func (Callable[..., Any]): The function to call
+        *args (Any): Its arguments
+
+    Returns:
+        Measurement: The "peak", "retained" and "blocks" of the call
+    """
+    gc.collect()
+    blocks = _traced_blocks()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    func(*args)
+    after, peak = tracemalloc.get_traced_memory()
+    return {"peak": peak - before, "retained": after - before, "blocks": _traced_blocks() - blocks}
+
+
+def run(sizes=SIZES, modes=tuple(MODES)) -> Dict[str, Dict[str, Measurement]]:
+    """
+    Measure every stage for each mode and document size.
+
+    Args:
+        sizes: The document sizes in characters
+        modes: Keys of ``MODES``
+
+    Returns:
+        Dict[str, Dict[str, Measurement]]: The measurements of each stage, keyed by
+        "<mode>/<size>" and then by stage name
+    """
+    started = tracemalloc.is_tracing()
+    if not started:
+        tracemalloc.start()
+    try:
+        results = {}
+        for mode in modes:
+            options, unicode = MODES[mode]
+            converter = SlackMarkdownConverter(**options)
+            for size in sizes:
+                markdown = generate_document(size, unicode=unicode)
+                stages = {}
+                data = {"markdown": markdown}
+                for name, stage in pipeline(converter):
+                    stages[name] = measure(stage, data)
+                del data
+                output = []
+                stages["convert"] = measure(lambda: output.append(converter.convert(markdown)))
+                results[f"{mode}/{size}"] = stages
+        return results
+    finally:
+        if not started:
+            tracemalloc.stop()
+
+
+def compare(results: Dict[str, Dict[str, Measurement]], baseline: Dict[str, Dict[str, Measurement]],
+            tolerance: float = 0.1, slack: int = 4096) -> List[str]:
+    """
+    Find peaks and block counts that grew beyond the baseline.
+
+    Args:
+        results: Measurements from ``run()``
+        baseline: Earlier measurements of the same form
+        tolerance (float): The accepted relative growth
+        slack (int): Bytes, and a tenth as many blocks, always accepted on top of the
+            tolerance so that tiny stages do not fail on noise
+
+    Returns:
+        List[str]: A description of each regression; empty when there are none
+    """
+    regressions = []
+    for key, stages in results.items():
+        for name, measurement in stages.items():
+            expected = baseline.get(key, {}).get(name)
+            if expected is None:
+                continue
+            for metric, allowance in (("peak", slack), ("blocks", slack // 10)):
+                limit = expected[metric] * (1 + tolerance) + allowance
+                if measurement[metric] > limit:
+                    regressions.append(f"{key} {name}: {metric} {measurement[metric]} "
+                                       f"exceeds baseline {expected[metric]} (limit {limit:.0f})")
+    return regressions
+
+
+def report(results: Dict[str, Dict[str, Measurement]]) -> str:
+    """
+    Format measurements as a table.
+
+    Args:
+        results: Measurements from ``run()``
+
+    Returns:
+        str: One row per stage and document, with the peak per input character
+    """
+    rows = [f"{'document':<18} {'stage':<13} {'peak KiB':>10} {'retained KiB':>13} "
+            f"{'blocks':>8} {'peak/char':>10}"]
+    for key, stages in results.items():
+        size = int(key.rsplit("/", 1)[1])
+        for name, measurement in stages.items():
+            rows.append(f"{key:<18} {name:<13} {measurement['peak'] / 1024:>10.1f} "
+                        f"{measurement['retained'] / 1024:>13.1f} {measurement['blocks']:>8} "
+                        f"{measurement['peak'] / size:>10.2f}")
+    return "\n".join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark from the command line and return the exit status."""
+    parser = argparse.ArgumentParser(description="Measure the memory used by each conversion stage")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Fail on regressions against the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Accepted relative growth of peaks and block counts")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.modes)
+    print(report(results))
+    if args.save:
+        with open(args.baseline, "w", encoding="utf-8") as baseline:
+            json.dump({"python": platform.python_version(), "results": results}, baseline, indent=1)
+            baseline.write("\n")
+    if args.check:
+        with open(args.baseline, encoding="utf-8") as baseline:
+            saved = json.load(baseline)
+        if saved["python"].rsplit(".", 1)[0] != platform.python_version().rsplit(".", 1)[0]:
+            print(f"note: the baseline was measured with Python {saved['python']}")
+        regressions = compare(results, saved["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
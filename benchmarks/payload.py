@@ -0,0 +1,89 @@
+"""
+Output bytes saved by compact mode on the benchmark corpus.
+
+Each corpus of generated documents is converted with and without
+``compact=True`` and reported with:
+
+- "bytes" and "compact": the UTF-8 size of the output of each converter
+- "saved": the difference, in bytes and as a percentage of the output
+- "ms" and "compact ms": the conversion time per document of each converter
+
+::
+
+    python benchmarks/payload.py
+    python benchmarks/payload.py --count 50 --sizes 1000 10000 --document-mode
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate_corpus
+from markdown_to_mrkdwn.converter import SlackMarkdownConverter
+
+SIZES = (1000, 10000, 100000)
+
+
+def _convert_all(converter: SlackMarkdownConverter, documents: List[str]) -> Tuple[int, float]:
+    """Convert the documents and return the output bytes and seconds per document."""
+    started = time.perf_counter()
+    outputs = [converter.convert(markdown) for markdown in documents]
+    elapsed = time.perf_counter() - started
+    return sum(len(output.encode("utf-8")) for output in outputs), elapsed / len(documents)
+
+
+def run(sizes: List[int], count: int, document_mode: bool = False) -> Dict[str, Tuple[int, int, float, float]]:
+    """
+    Convert a corpus of each size, with and without unicode words, in both modes.
+
+    Args:
+        sizes (List[int]): Document sizes in characters
+        count (int): The number of documents per corpus
+        document_mode (bool): Convert in document mode
+
+    Returns:
+        Dict[str, Tuple[int, int, float, float]]: For each corpus, the output bytes and
+        seconds per document without and with compact mode
+    """
+    regular = SlackMarkdownConverter(document_mode=document_mode)
+    compact = SlackMarkdownConverter(document_mode=document_mode, compact=True)
+    results = {}
+    for size in sizes:
+        for unicode in (False, True):
+            documents = generate_corpus(count, size, unicode=unicode)
+            regular_bytes, regular_time = _convert_all(regular, documents)
+            compact_bytes, compact_time = _convert_all(compact, documents)
+            name = f"{count} x {size} chars" + (" unicode" if unicode else "")
+            results[name] = (regular_bytes, compact_bytes, regular_time, compact_time)
+    return results
+
+
+def report(results: Dict[str, Tuple[int, int, float, float]]) -> str:
+    """Format the results as a table with a row per corpus."""
+    rows = [f"{'corpus':<28} {'bytes':>11} {'compact':>11} {'saved':>9} {'%':>6} {'ms':>9} {'compact ms':>11}"]
+    for name, (regular, compact, regular_time, compact_time) in results.items():
+        rows.append(f"{name:<28} {regular:>11} {compact:>11} {regular - compact:>9} "
+                    f"{(regular - compact) / regular * 100:>6.2f} {regular_time * 1000:>9.3f} "
+                    f"{compact_time * 1000:>11.3f}")
+    return "\n".join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark from the command line and return the exit status."""
+    parser = argparse.ArgumentParser(description="Measure the output bytes saved by compact mode")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--count", type=int, default=20, help="documents per corpus")
+    parser.add_argument("--document-mode", action="store_true")
+    args = parser.parse_args(argv)
+
+    print(report(run(args.sizes, args.count, args.document_mode)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""
+Conversion throughput of one converter shared by several threads.
+
+Each thread converts its own generated documents with the same converter, and
+each thread count is reported with:
+
+- "docs/s" and "MB/s": the documents and megabytes of Markdown converted per second
+- "speedup": the throughput relative to one thread
+
+On a standard build of CPython the threads take turns holding the global
+interpreter lock, and throughput stays about flat. On a free-threaded build
+(3.13t or later, with the GIL disabled) it grows with the number of cores. The
+report starts with the interpreter and the state of the GIL, so that results
+from the two builds can be told apart.
+
+With ``--register``, another thread keeps registering and removing a regex
+plugin during the conversions. The plugin matches nothing in the corpus, so
+every output is checked against the output of a conversion without it, and
+mismatches are reported. The registering thread competes for the interpreter
+too, so compare such runs only with each other::
+
+    python benchmarks/threads.py
+    python benchmarks/threads.py --threads 1 2 4 8 16 --size 20000 --register
+"""
+
+import argparse
+import os
+import platform
+import sys
+import sysconfig
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate_document
+from markdown_to_mrkdwn.converter import SlackMarkdownConverter
+
+THREADS = (1, 2, 4, 8)
+
+# The plugin registered and removed with --register; it matches nothing in the corpus
+CHURN_PATTERN = r"\bNOT_IN_THE_CORPUS\b"
+
+
+def gil_enabled() -> bool:
+    """Check whether the interpreter runs with the global interpreter lock."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+def interpreter() -> str:
+    """Describe the interpreter, its build and the state of the GIL."""
+    build = "free-threaded" if sysconfig.get_config_var("Py_GIL_DISABLED") else "standard"
+    gil = "enabled" if gil_enabled() else "disabled"
+    return f"{platform.python_implementation()} {platform.python_version()} ({build} build, GIL {gil})"
+
+
+def _measure(converter: SlackMarkdownConverter, inputs: List[List[str]], expected: List[List[str]],
+             register: bool) -> Tuple[float, int, int]:
+    """
+    Convert each list of documents in a thread of its own.
+
+    Returns:
+        Tuple[float, int, int]: The elapsed seconds, the number of outputs that differ
+        from the expected ones and the number of plugin registrations
+    """
+    start = threading.Barrier(len(inputs) + 1)
+    stop = threading.Event()
+    mismatches = [0] * len(inputs)
+    registrations = [0]
+
+    def convert(index):
+        start.wait()
+        for markdown, output in zip(inputs[index], expected[index]):
+            if converter.convert(markdown) != output:
+                mismatches[index] += 1
+
+    def churn():
+        while not stop.is_set():
+            converter.register_regex_plugin("churn", CHURN_PATTERN, "matched")
+            converter.remove_plugin("churn")
+            registrations[0] += 1
+
+    threads = [threading.Thread(target=convert, args=(index,)) for index in range(len(inputs))]
+    if register:
+        threads.append(threading.Thread(target=churn))
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads[:len(inputs)]:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads[len(inputs):]:
+        thread.join()
+    return elapsed, sum(mismatches), registrations[0]
+
+
+def run(threads: List[int], size: int, documents: int, document_mode: bool = False,
+        register: bool = False) -> Dict[int, Tuple[float, float, int, int]]:
+    """
+    Measure the throughput of a shared converter at each thread count.
+
+    Args:
+        threads (List[int]): The thread counts
+        size (int): The size of each document in characters
+        documents (int): The documents each thread converts
+        document_mode (bool): Convert in document mode
+        register (bool): Register and remove a plugin in another thread meanwhile
+
+    Returns:
+        Dict[int, Tuple[float, float, int, int]]: For each thread count, the documents
+        and megabytes converted per second, the mismatched outputs and the registrations
+    """
+    converter = SlackMarkdownConverter(document_mode=document_mode)
+    inputs = [[generate_document(size, seed=thread * documents + index) for index in range(documents)]
+              for thread in range(max(threads))]
+    # Also warms up the converter
+    expected = [[converter.convert(markdown) for markdown in batch] for batch in inputs]
+    results = {}
+    for count in threads:
+        elapsed, mismatches, registrations = _measure(converter, inputs[:count], expected[:count], register)
+        characters = sum(len(markdown) for batch in inputs[:count] for markdown in batch)
+        results[count] = (count * documents / elapsed, characters / elapsed / 1e6, mismatches, registrations)
+    return results
+
+
+def report(results: Dict[int, Tuple[float, float, int, int]], register: bool = False) -> str:
+    """Format the results as a table with a row per thread count."""
+    header = f"{'threads':>7} {'docs/s':>10} {'MB/s':>8} {'speedup':>8}"
+    if register:
+        header += f" {'registrations':>13} {'mismatches':>10}"
+    rows = [interpreter(), header]
+    single = results[min(results)][0]
+    for count, (documents, megabytes, mismatches, registrations) in results.items():
+        row = f"{count:>7} {documents:>10.1f} {megabytes:>8.2f} {documents / single:>8.2f}"
+        if register:
+            row += f" {registrations:>13} {mismatches:>10}"
+        rows.append(row)
+    return "\n".join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmark from the command line and return the exit status."""
+    parser = argparse.ArgumentParser(description="Measure conversion throughput with several threads")
+    parser.add_argument("--threads", type=int, nargs="+", default=list(THREADS))
+    parser.add_argument("--size", type=int, default=5000, help="characters per document")
+    parser.add_argument("--documents", type=int, default=50, help="documents per thread")
+    parser.add_argument("--document-mode", action="store_true")
+    parser.add_argument("--register", action="store_true",
+                        help="register and remove a plugin in another thread during the conversions")
+    args = parser.parse_args(argv)
+
+    results = run(args.threads, args.size, args.documents, args.document_mode, args.register)
+    print(report(results, args.register))
+    # Outputs that differ mean a conversion saw a half-registered plugin
+    return 1 if any(result[2] for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
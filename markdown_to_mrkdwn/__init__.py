@@ -1,6 +1,11 @@
 # This file is required to make Python treat the directory as a package
 
-from .converter import SlackMarkdownConverter
+from .converter import SlackMarkdownConverter, ConversionResult, ConversionState
+from .backends import RegexBackend
+from .cache import DiskCache
+from .registry import ConverterRegistry
+from .linker import TermLinker
 
 __version__ = "0.3.2"
-__all__ = ["SlackMarkdownConverter"]
+__all__ = ["SlackMarkdownConverter", "ConversionResult", "ConversionState", "RegexBackend", "DiskCache",
+           "ConverterRegistry", "TermLinker"]
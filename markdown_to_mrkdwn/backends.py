@@ -0,0 +1,241 @@
+"""
+Regex engines for the conversion rules and regex plugins.
+
+Python's ``re`` backtracks: a regex plugin such as ``(\\w+\\s?)+$`` takes
+exponential time on a line of words that ends in punctuation. The built-in
+rules are written to stay linear (``tests/test_performance.py`` checks them),
+but rules and plugins supplied by users, and input supplied by anyone, can be
+handed to another engine::
+
+    converter = SlackMarkdownConverter(regex_backend="re2")
+
+- ``"re"``: the standard library engine, the default.
+- ``"re2"``: RE2, through the ``google-re2`` package. Matching time
+  is linear in the input, but lookarounds and backreferences are not supported,
+  and ``\\s``, ``\\w``, ``\\d`` and ``\\b`` only match ASCII characters.
+- ``"regex"``: the ``regex`` module. It backtracks like ``re``, but gives up on
+  a match after ``timeout`` seconds and raises ``TimeoutError``, which fails the
+  conversion.
+
+A pattern the backend cannot compile is compiled with ``re`` instead;
+``SlackMarkdownConverter.explain()`` lists these patterns.
+"""
+
+import importlib
+import re
+from functools import lru_cache
+from typing import Any, Dict, Optional, Union
+
+# The re flags RE2 supports, and the inline flags they are written as
+_RE2_FLAGS = ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"))
+_RE2_IGNORED_FLAGS = re.UNICODE | re.ASCII
+# The re flags the regex module has, by name: their values differ (re.ASCII is regex.V1)
+_REGEX_MODULE_FLAGS = ("IGNORECASE", "MULTILINE", "DOTALL", "VERBOSE", "ASCII", "UNICODE")
+
+
+class BackendPattern:
+    """
+    A pattern compiled by a backend other than ``re``.
+
+    It offers the methods of ``re.Pattern`` the converter uses, with the options
+    of the backend, such as a timeout, passed to each call.
+
+    Attributes:
+        backend (RegexBackend): The backend that compiled the pattern.
+        regex (Any): The pattern compiled by the backend.
+        pattern (str): The source of the pattern.
+        flags (int): The ``re`` flags the pattern was compiled with.
+        options (Dict[str, Any]): Keyword arguments passed to each match call.
+    """
+
+    def __init__(self, backend: "RegexBackend", regex: Any, pattern: str, flags: int,
+                 options: Optional[Dict[str, Any]] = None):
+        self.backend = backend
+        self.regex = regex
+        self.pattern = pattern
+        self.flags = flags
+        self.options = options or {}
+
+    def __reduce__(self):
+        # Compiled patterns of most engines cannot be pickled; compile again instead
+        return compile_pattern, (self.backend, self.pattern, self.flags)
+
+    def __repr__(self) -> str:
+        return f"{self.backend!r}.compile({self.pattern!r}, {self.flags})"
+
+    def sub(self, repl: Any, string: str, count: int = 0) -> str:
+        return self.regex.sub(repl, string, count, **self.options)
+
+    def match(self, string: str, pos: int = 0) -> Any:
+        return self.regex.match(string, pos, **self.options)
+
+    def search(self, string: str, pos: int = 0) -> Any:
+        return self.regex.search(string, pos, **self.options)
+
+    def finditer(self, string: str) -> Any:
+        return self.regex.finditer(string, **self.options)
+
+
+class _Re2Pattern(BackendPattern):
+    """A pattern compiled by google-re2, whose replacement templates are escaped."""
+
+    def sub(self, repl: Any, string: str, count: int = 0) -> str:
+        if isinstance(repl, str):
+            repl = _re2_template(repl)
+        return self.regex.sub(repl, string, count)
+
+
+@lru_cache(maxsize=256)
+def _re2_template(template: str) -> str:
+    """
+    Escape the characters outside ASCII in a replacement template.
+
+    google-re2 decodes the literal text of a template with the "unicode_escape"
+    codec, which reads it as Latin-1; written as escapes, the characters survive.
+    """
+    return "".join(char if ord(char) < 128 else f"\\U{ord(char):08x}" for char in template)
+
+
+class RegexBackend:
+    """
+    The standard library engine, and the interface of the other backends.
+
+    Attributes:
+        name (str): The name the backend is selected by.
+        linear (bool): Whether matching time is linear in the input for every pattern
+            the backend compiles.
+        whitespace (Optional[str]): What ``\\s`` matches apart from the newline, as the
+            body of a character class, when it differs from ``re``.
+    """
+
+    name = "re"
+    linear = False
+    whitespace: Optional[str] = None
+
+    def __repr__(self) -> str:
+        return self.name
+
+    def compile(self, pattern: str, flags: int = 0) -> Any:
+        """
+        Compile a pattern.
+
+        Args:
+            pattern (str): The pattern, in ``re`` syntax
+            flags (int): ``re`` flags
+
+        Returns:
+            Any: A ``re.Pattern`` or ``BackendPattern``, or None if the backend
+            cannot compile the pattern
+
+        Raises:
+            re.error: If the pattern is invalid (``re`` only)
+        """
+        return re.compile(pattern, flags)
+
+
+class Re2Backend(RegexBackend):
+    """
+    RE2, which matches in linear time without backtracking.
+
+    Raises:
+        ImportError: If ``google-re2`` is not installed
+    """
+
+    name = "re2"
+    linear = True
+    whitespace = "\\t\\x0c\\r "
+
+    def __init__(self):
+        importlib.import_module("re2")
+
+    def compile(self, pattern: str, flags: int = 0) -> Optional[BackendPattern]:
+        if flags & ~(_RE2_IGNORED_FLAGS | sum(flag for flag, _ in _RE2_FLAGS)):
+            return None
+        inline = "".join(letter for flag, letter in _RE2_FLAGS if flags & flag)
+        module = importlib.import_module("re2")
+        # Patterns RE2 rejects are expected; do not have them logged to stderr
+        options = module.Options()
+        options.log_errors = False
+        try:
+            regex = module.compile(f"(?{inline}){pattern}" if inline else pattern, options)
+        except module.error:
+            return None
+        return _Re2Pattern(self, regex, pattern, flags)
+
+
+class RegexModuleBackend(RegexBackend):
+    """
+    The ``regex`` module, with a time limit on each match.
+
+    Attributes:
+        timeout (float): Seconds after which a match raises ``TimeoutError``.
+
+    Raises:
+        ImportError: If the ``regex`` module is not installed
+    """
+
+    name = "regex"
+
+    def __init__(self, timeout: float = 1.0):
+        importlib.import_module("regex")
+        self.timeout = timeout
+
+    def __repr__(self) -> str:
+        return f"regex(timeout={self.timeout})"
+
+    def compile(self, pattern: str, flags: int = 0) -> Optional[BackendPattern]:
+        module = importlib.import_module("regex")
+        mapped = 0
+        for name in _REGEX_MODULE_FLAGS:
+            if flags & getattr(re, name):
+                mapped |= getattr(module, name)
+        if flags & ~sum(getattr(re, name) for name in _REGEX_MODULE_FLAGS):
+            return None
+        try:
+            regex = module.compile(pattern, mapped)
+        except module.error:
+            return None
+        return BackendPattern(self, regex, pattern, flags, {"timeout": self.timeout})
+
+
+_BACKENDS = {"re": RegexBackend, "re2": Re2Backend, "regex": RegexModuleBackend}
+
+
+def get_backend(backend: Union[str, RegexBackend]) -> RegexBackend:
+    """
+    Look up a backend by name.
+
+    Args:
+        backend (Union[str, RegexBackend]): "re", "re2", "regex" or a backend instance
+
+    Returns:
+        RegexBackend: The backend
+
+    Raises:
+        ValueError: If the name is unknown
+        ImportError: If the backend's package is not installed
+    """
+    if isinstance(backend, RegexBackend):
+        return backend
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unknown regex backend '{backend}'; expected one of {', '.join(_BACKENDS)}")
+    return _BACKENDS[backend]()
+
+
+def compile_pattern(backend: RegexBackend, pattern: str, flags: int = 0) -> Any:
+    """
+    Compile a pattern with a backend, falling back to ``re`` if the backend cannot.
+
+    Args:
+        backend (RegexBackend): The backend
+        pattern (str): The pattern
+        flags (int): ``re`` flags
+
+    Returns:
+        Any: A ``re.Pattern`` or ``BackendPattern``
+
+    Raises:
+        re.error: If the pattern is invalid
+    """
+    compiled = backend.compile(pattern, flags)
+    return re.compile(pattern, flags) if compiled is None else compiled
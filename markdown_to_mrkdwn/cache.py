@@ -0,0 +1,212 @@
+"""
+A persistent conversion cache shared by processes and kept across restarts.
+
+``DiskCache`` stores converted documents in an SQLite database. Entries are
+keyed on a hash of the Markdown, the converter's ``config_fingerprint()`` and
+the library version, so a changed option, plugin or release never returns a
+stale result. When the stored output grows past ``max_bytes`` the least
+recently used entries are evicted::
+
+    cache = DiskCache("/var/cache/mrkdwn.sqlite3", max_bytes=256 * 1024 * 1024)
+    converter = SlackMarkdownConverter(cache=cache)
+    converter.convert(runbook)  # converted once, then read from the cache
+
+The database uses write-ahead logging, so any number of processes can read
+while one writes. Errors of the database, such as a lock held for longer
+than ``timeout`` or a full disk, are logged and treated as cache misses.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+# Seconds between updates of an entry's access time, so that hits are not writes
+_TOUCH_INTERVAL = 60.0
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, output TEXT NOT NULL, "
+    "plaintext TEXT, size INTEGER NOT NULL, accessed REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)",
+    # The total size of the entries, kept up to date by every write, so that a write
+    # does not have to add up the whole table to know whether to evict
+    "CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO meta SELECT 0, COALESCE(SUM(size), 0) FROM entries",
+)
+
+
+class DiskCache:
+    """
+    An SQLite store of converted documents with size-based eviction.
+
+    Attributes:
+        path (str): The database file.
+        max_bytes (int): The most UTF-8 encoded output, in bytes, kept in the cache.
+        min_length (int): The shortest Markdown, in characters, that is cached.
+        timeout (float): Seconds to wait for another process's write to finish.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024, min_length: int = 1024,
+                 timeout: float = 5.0):
+        """
+        Open or create the cache.
+
+        Args:
+            path (str): The database file
+            max_bytes (int): The most output kept, in bytes. Default is 64 MiB.
+            min_length (int): Shorter documents are converted without the cache, since
+                converting them is about as fast as a lookup. Default is 1024.
+            timeout (float): Seconds to wait for a lock held by another process. Default is 5.
+        """
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be a positive integer")
+        if min_length < 0:
+            raise ValueError("min_length must be non-negative")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.min_length = min_length
+        self.timeout = timeout
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            connection.execute(statement)
+
+    def __getstate__(self) -> Dict[str, object]:
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening a new one after a fork."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def key(self, markdown: str, fingerprint: str, with_plaintext: bool) -> str:
+        """
+        Build the key of a conversion.
+
+        Args:
+            markdown (str): The Markdown text
+            fingerprint (str): The converter's ``config_fingerprint()``
+            with_plaintext (bool): Whether the plain text fallback is requested
+
+        Returns:
+            str: A hexadecimal digest
+        """
+        from . import __version__
+        digest = hashlib.sha256(f"{__version__}\0{fingerprint}\0{with_plaintext:d}\0".encode("utf-8"))
+        digest.update(markdown.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        Look up a conversion.
+
+        Args:
+            key (str): The key from ``key()``
+
+        Returns:
+            Optional[Tuple[str, Optional[str]]]: The output and plain text, or None on a miss
+        """
+        try:
+            connection = self._connection()
+            row = connection.execute("SELECT output, plaintext, accessed FROM entries WHERE key = ?",
+                                     (key,)).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[2] > _TOUCH_INTERVAL:
+                connection.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            return row[0], row[1]
+        except sqlite3.Error as e:
+            logging.warning(f"Conversion cache lookup failed: {e}")
+            return None
+
+    def put(self, key: str, output: str, plaintext: Optional[str] = None) -> bool:
+        """
+        Store a conversion, evicting the least recently used entries when the cache is full.
+
+        Args:
+            key (str): The key from ``key()``
+            output (str): The converted text
+            plaintext (Optional[str]): The plain text fallback, if it was produced
+
+        Returns:
+            bool: True if the conversion was stored; outputs larger than ``max_bytes``
+            are not
+        """
+        size = len(output.encode("utf-8", "surrogatepass"))
+        if plaintext is not None:
+            size += len(plaintext.encode("utf-8", "surrogatepass"))
+        if size > self.max_bytes:
+            return False
+        try:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                replaced = connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                connection.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                                   (key, output, plaintext, size, time.time()))
+                total = connection.execute("SELECT bytes FROM meta").fetchone()[0] + size
+                if replaced is not None:
+                    total -= replaced[0]
+                if total > self.max_bytes:
+                    evicted = []
+                    for old_key, old_size in connection.execute(
+                            "SELECT key, size FROM entries ORDER BY accessed"):
+                        if total <= self.max_bytes:
+                            break
+                        evicted.append((old_key,))
+                        total -= old_size
+                    connection.executemany("DELETE FROM entries WHERE key = ?", evicted)
+                connection.execute("UPDATE meta SET bytes = ?", (total,))
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            return True
+        except sqlite3.Error as e:
+            logging.warning(f"Conversion cache store failed: {e}")
+            return False
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the size of the cache.
+
+        Returns:
+            Dict[str, int]: The number of "entries" and their total size in "bytes"
+        """
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": entries, "bytes": size}
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute("DELETE FROM entries")
+            connection.execute("UPDATE meta SET bytes = 0")
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        """Close this thread's connection. The cache reopens it when used again."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -1,12 +1,754 @@
+import io
 import re
+import codecs
+import difflib
+import asyncio
+import inspect
+import json
+import time
+import pickle
+import hashlib
 import logging
-from typing import List, Tuple, Dict, Callable, Any, Optional
+import threading
+from collections import deque
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Tuple, Dict, Callable, Any, Optional, Union, Deque, FrozenSet
+
+from .backends import BackendPattern, RegexBackend, compile_pattern, get_backend
+from .cache import DiskCache
+from .linker import TermLinker
+from .rules import Rule, RulePlan, compile_rules
+
+
+class ConversionState:
+    """
+    The state of a single conversion, kept so that it can be reused.
+
+    ``convert()`` builds one of these while it walks the document, and
+    ``SlackMarkdownConverter.update()`` accepts it back to re-convert only the
+    lines that changed.
+
+    Attributes:
+        in_code_block (bool): Whether the conversion ended inside a fenced code block.
+        table_replacements (Dict[str, str]): Table placeholders and their rendered tables.
+        lines (List[str]): The lines fed to the per-line conversion.
+        line_states (List[bool]): The code block state on entry to each line.
+        converted_lines (List[str]): The converted text of each line.
+        output (str): The final converted text.
+        signature (tuple): The converter configuration the state was produced with.
+        reused_lines (int): How many lines were taken over from a previous state.
+        line_plugins (List[str]): The line plugins that were applied, in execution order.
+        plain_lines (Optional[List[Optional[str]]]): The plain text of each line, when
+            plain text was requested. Code fence lines are None.
+        table_plaintext (Optional[Dict[str, str]]): Table placeholders and their plain text.
+        plaintext (Optional[str]): The plain text fallback, when requested.
+        plugin_timeouts (int): How many coroutine plugin calls timed out and kept their input.
+        links (Optional[List[str]]): The URLs of links, images and bare URLs outside code,
+            in document order, when requested. Reused lines are not included.
+        tables (int): The number of tables converted.
+        code_blocks (int): The number of fenced code blocks opened. Reused lines are not counted.
+        plugins_changed (bool): Whether any plugin changed the text it was given.
+        plugins (Optional[Dict[str, Dict[str, Any]]]): The registered plugins when the
+            conversion started, which it uses throughout.
+        patterns (Optional[List[Tuple[Any, Any]]]): The patterns of the conversion rules
+            when the conversion started.
+    """
+
+    def __init__(self):
+        self.in_code_block = False
+        self.table_replacements: Dict[str, str] = {}
+        self.lines: List[str] = []
+        self.line_states: List[bool] = []
+        self.converted_lines: List[str] = []
+        self.output = ""
+        self.signature: tuple = ()
+        self.reused_lines = 0
+        self.line_plugins: List[str] = []
+        self.plain_lines: Optional[List[Optional[str]]] = None
+        self.table_plaintext: Optional[Dict[str, str]] = None
+        self.plaintext: Optional[str] = None
+        self.plugin_timeouts = 0
+        self.links: Optional[List[str]] = None
+        self.tables = 0
+        self.code_blocks = 0
+        self.plugins_changed = False
+        self.plugins: Optional[Dict[str, Dict[str, Any]]] = None
+        self.patterns: Optional[List[Tuple[Any, Any]]] = None
+
+
+class ConversionResult:
+    """
+    The output of ``convert_ex()`` together with facts gathered while converting.
+
+    Attributes:
+        text (str): The converted text in Slack's mrkdwn format.
+        plaintext (Optional[str]): The plain text fallback, when requested.
+        links (List[str]): The URLs of links, images and bare URLs outside code, in
+            document order.
+        tables (int): The number of tables.
+        code_blocks (int): The number of fenced code blocks.
+        length (int): The length of the text in characters, as Slack counts its limits.
+        plugins_changed (bool): Whether any plugin changed the text it was given.
+    """
+
+    __slots__ = ("text", "plaintext", "links", "tables", "code_blocks", "length", "plugins_changed")
+
+    def __init__(self, text: str, plaintext: Optional[str] = None, links: Optional[List[str]] = None,
+                 tables: int = 0, code_blocks: int = 0, plugins_changed: bool = False):
+        self.text = text
+        self.plaintext = plaintext
+        self.links = links if links is not None else []
+        self.tables = tables
+        self.code_blocks = code_blocks
+        self.length = len(text)
+        self.plugins_changed = plugins_changed
+
+    def __repr__(self) -> str:
+        return (f"ConversionResult(length={self.length}, links={len(self.links)}, tables={self.tables}, "
+                f"code_blocks={self.code_blocks}, plugins_changed={self.plugins_changed})")
+
+
+# Any character that can start Markdown syntax, change line splitting or leave
+# trailing whitespace to strip. Text without these converts to itself.
+_MARKDOWN_SYNTAX = re.compile(r"[*_~`#>\[!|<\-\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029]|[^\S\n]\n")
+
+# Characters the converter itself may add to a line
+_CONVERTER_OUTPUT_CHARS = frozenset("*_~`<>|•☐☑─ ")
+
+# Cell separators within a table row, with the whitespace around them
+_TABLE_CELL_SEPARATOR = re.compile(r"\s*\|\s*")
+
+# mrkdwn markup removed from converted lines for the plain text fallback.
+# Inline code comes first so that markers inside it are left alone. A link target
+# starts with a URL scheme, a Slack sigil or a relative path and contains no
+# whitespace, so that literal text such as "x < y and z > w" or "Vec<String>" is kept.
+_PLAINTEXT_MARKUP = re.compile(
+    r"`([^`\n]+)`"  # Inline code
+    r"|<((?:[A-Za-z][A-Za-z0-9+.-]*://|mailto:|[@#!/.])[^<>|\s]*)\|([^<>\n]+)>"  # Link with label
+    r"|<((?:[A-Za-z][A-Za-z0-9+.-]*://|mailto:|[@#!/.])[^<>|\s]*)>"  # Bare link
+    r"|(?<!\*)\*(?=\S)([^*\n]+?)(?<=\S)\*(?!\*)"  # Bold
+    r"|(?<![A-Za-z0-9_])_(?=\S)([^_\n]+?)(?<=\S)_(?![A-Za-z0-9_])"  # Italic
+    r"|(?<!~)~(?=\S)([^~\n]+?)(?<=\S)~(?!~)"  # Strikethrough
+)
+
+
+def _strip_markup(match: "re.Match") -> str:
+    if match.group(1) is not None:
+        return match.group(1)
+    if match.group(3) is not None:
+        return _PLAINTEXT_MARKUP.sub(_strip_markup, match.group(3))
+    if match.group(4) is not None:
+        return match.group(4)
+    inner = match.group(5) or match.group(6) or match.group(7)
+    return _PLAINTEXT_MARKUP.sub(_strip_markup, inner)
+
+
+# A code fence line, optionally naming a language
+_CODE_FENCE = re.compile(r"^```(\w*)\s*$")
+
+# The placeholder a rendered table is substituted for until the end of conversion
+_TABLE_PLACEHOLDER = re.compile(r"%%TABLE_PLACEHOLDER_-?\d+%%")
+
+# Trailing whitespace of every line in a multi-line segment; only tried where
+# a run of whitespace starts, so long inner runs are not rescanned
+_TRAILING_WHITESPACE = re.compile(r"(?<![^\S\n])[^\S\n]+$", re.MULTILINE)
+
+# Blockquote markers of every line in a multi-line segment
+_QUOTE_MARKER = re.compile(r"^> ", re.MULTILINE)
+
+# Spans the conversion rules must not touch, masked in this order: inline code,
+# link and image targets, and bare URLs. Bare URLs contain no asterisks and do
+# not end in punctuation or emphasis markers, so "**https://example.com**"
+# still becomes bold.
+_INLINE_CODE = re.compile(r"`(.+?)`")
+_BARE_URL = re.compile("\\b(?:https?|ftp)://[^\\s<>`|*\\[\\]\ue000\ue001]*[^\\s<>`|*_~.,;:!?'\"()\\[\\]\ue000\ue001]")
+
+# Where a link, or a link inside an image, opens
+_LINK_OPEN = re.compile(r"\[")
+
+# The closing delimiter of bold text written as "~**text**"
+_TILDE_BOLD_CLOSE = re.compile(r"\*\*(?:\s|$)")
+
+# A masked span: private use characters around the span's index
+_MASK_START = "\ue000"
+_MASK_END = "\ue001"
+_MASK_TOKEN = re.compile(_MASK_START + r"(\d+)" + _MASK_END)
+
+# Characters Slack reserves for control sequences. A ">" starting a line and
+# followed by a space is a blockquote marker and is kept.
+_SLACK_CONTROL = re.compile(r"[&<]|(?!^)>|>(?! )", re.MULTILINE)
+_SLACK_ENTITIES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+
+# Characters escaping adds to a line
+_ESCAPE_OUTPUT_CHARS = frozenset("".join(_SLACK_ENTITIES.values()))
+
+# A lone surrogate: the only character a Unicode encoding cannot represent
+_SURROGATE = re.compile("[\ud800-\udfff]")
+
+# Encodings that represent every other character and decode to the same text
+_UNICODE_ENCODINGS = {"utf-8", "utf-16", "utf-16-le", "utf-16-be", "utf-32", "utf-32-le", "utf-32-be"}
+
+# Whitespace other than the newline, for use inside character classes
+_WHITESPACE_EXCEPT_NEWLINE = "\\t\\x0b\\x0c\\r\\x1c-\\x1f \\x85\\xa0\\u1680\\u2000-\\u200a\\u2028\\u2029\\u202f\\u205f\\u3000"
+_ASCII_WHITESPACE_EXCEPT_NEWLINE = "\\t\\x0b\\x0c\\r "
+
+
+def _escape_control(match: "re.Match") -> str:
+    return _SLACK_ENTITIES[match.group()]
+
+
+def _restore_tables(text: str, replacements: Dict[str, str]) -> str:
+    """Substitute rendered tables for their placeholders in a single pass."""
+    return _TABLE_PLACEHOLDER.sub(lambda m: replacements.get(m.group(), m.group()), text)
+
+
+@lru_cache(maxsize=16)
+def _codec_name(encoding: str) -> Optional[str]:
+    """Get the canonical name of an encoding, or None if it is unknown."""
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return None
+
+
+def _link_may_close(text: str, pos: int, end: int) -> bool:
+    """Check for a "](" followed by a non-empty target and ")" between pos and end."""
+    target = text.find("](", pos, end)
+    return target != -1 and text.find(")", target + 3, end) != -1
+
+
+def _tilde_bold_may_close(text: str, pos: int, end: int) -> bool:
+    """Check for a "**" followed by whitespace or the line end between pos and end."""
+    return _TILDE_BOLD_CLOSE.search(text, pos, end) is not None
+
+
+class _GuardedPattern:
+    """
+    A lazily quantified pattern whose hopeless match attempts are skipped.
+
+    Patterns such as ``\\[(.+?)\\]\\((.+?)\\)`` rescan the rest of the line from
+    every opening delimiter when no closing delimiter follows, so a line full of
+    "[" takes quadratic time, and a line full of "[a](" cubic time. Before the
+    regex is tried at an opening delimiter, a cheap linear check looks for a
+    possible closing delimiter on the rest of the line. When there is none,
+    no later opening delimiter on that line can match either, and the line is
+    skipped. Matches are made by the wrapped regex, so ``sub`` returns exactly
+    what ``regex.sub`` would.
+
+    Attributes:
+        regex (re.Pattern): The wrapped pattern.
+        opener (re.Pattern): Matches where the wrapped pattern can start.
+        may_close (Callable[[str, int, int], bool]): Whether a closing delimiter
+            occurs in ``text[pos:end]``; must be false for every later position
+            once it is false for one.
+    """
+
+    def __init__(self, regex: "re.Pattern", opener: "re.Pattern",
+                 may_close: Callable[[str, int, int], bool]):
+        self.regex = regex
+        self.opener = opener
+        self.may_close = may_close
+
+    @property
+    def pattern(self) -> str:
+        return self.regex.pattern
+
+    @property
+    def flags(self) -> int:
+        return self.regex.flags
+
+    def sub(self, repl: Union[str, Callable[["re.Match"], str]], string: str, count: int = 0) -> str:
+        parts = []
+        last = pos = replaced = 0
+        while not count or replaced < count:
+            opener = self.opener.search(string, pos)
+            if opener is None:
+                break
+            line_end = string.find("\n", opener.end())
+            if line_end == -1:
+                line_end = len(string)
+            if not self.may_close(string, opener.end(), line_end):
+                pos = line_end
+                if pos == len(string):
+                    break
+                continue
+            match = self.regex.match(string, opener.start())
+            if match is None or match.end() == match.start():
+                pos = opener.start() + 1
+                continue
+            parts.append(string[last:match.start()])
+            parts.append(repl(match) if callable(repl) else match.expand(repl))
+            last = pos = match.end()
+            replaced += 1
+        if not parts:
+            return string
+        parts.append(string[last:])
+        return "".join(parts)
+
+    def line_local(self) -> Optional["_GuardedPattern"]:
+        regex = _line_local(self.regex)
+        opener = _line_local(self.opener)
+        if regex is None or opener is None:
+            return None
+        return _GuardedPattern(regex, opener, self.may_close)
+
+
+class _PrefilteredPattern:
+    """
+    A pattern that is only run on text containing a literal every match contains.
+
+    Most lines contain the syntax of few rules, and checking for a literal with
+    ``in`` is much cheaper than a regex scan that finds nothing.
+
+    Attributes:
+        regex (re.Pattern): The wrapped pattern.
+        needle (str): The literal.
+    """
+
+    def __init__(self, regex: "re.Pattern", needle: str):
+        self.regex = regex
+        self.needle = needle
+
+    @property
+    def pattern(self) -> str:
+        return self.regex.pattern
+
+    @property
+    def flags(self) -> int:
+        return self.regex.flags
+
+    def sub(self, repl: Union[str, Callable[["re.Match"], str]], string: str, count: int = 0) -> str:
+        if self.needle not in string:
+            return string
+        return self.regex.sub(repl, string, count)
+
+    def line_local(self) -> Optional["_PrefilteredPattern"]:
+        regex = _line_local(self.regex)
+        return None if regex is None else _PrefilteredPattern(regex, self.needle)
+
+
+# Link targets, masked together with inline code and bare URLs
+_LINK = _GuardedPattern(re.compile(r"(\[.+?\]\()(.+?)\)"), _LINK_OPEN, _link_may_close)
+
+
+@lru_cache(maxsize=256)
+def _line_local(pattern: "re.Pattern") -> Optional["re.Pattern"]:
+    """
+    Rewrite a pattern so that it can be applied to many lines at once.
+
+    The result never matches a newline and has ``^`` and ``$`` anchored at line
+    boundaries, so substituting it over a block of lines gives the same result as
+    substituting it on each line separately.
+
+    Args:
+        pattern (re.Pattern): A pattern written for single lines.
+
+    Returns:
+        Optional[re.Pattern]: The rewritten pattern, or None if the pattern uses
+        constructs that cannot be made line-local.
+    """
+    if isinstance(pattern, (_GuardedPattern, _PrefilteredPattern)):
+        return pattern.line_local()
+    if not isinstance(pattern.pattern, str) or pattern.flags & (re.DOTALL | re.VERBOSE):
+        return None
+    backend = pattern.backend if isinstance(pattern, BackendPattern) else None
+    if backend is not None and backend.whitespace is not None:
+        whitespace = backend.whitespace
+    elif pattern.flags & re.ASCII:
+        whitespace = _ASCII_WHITESPACE_EXCEPT_NEWLINE
+    else:
+        whitespace = _WHITESPACE_EXCEPT_NEWLINE
+    source = pattern.pattern
+    out = []
+    in_class = negated = excludes_newline = False
+    class_start = 0
+    i = 0
+    while i < len(source):
+        char = source[i]
+        if char == "\n":
+            return None
+        if char == "\\":
+            escape = source[i:i + 2]
+            if in_class and negated and escape == "\\n":
+                excludes_newline = True
+                out.append(escape)
+                i += 2
+                continue
+            if len(escape) < 2 or escape[1] in "nxuUNAZ":
+                return None
+            if in_class:
+                if escape[1] in "WD" or escape[1].isdigit():
+                    return None
+                out.append(whitespace if escape[1] == "s" else escape)
+            elif escape[1] == "0":
+                return None
+            else:
+                out.append({"s": r"[^\S\n]", "W": r"[^\w\n]", "D": r"[^\d\n]"}.get(escape[1], escape))
+            i += 2
+            continue
+        if in_class:
+            if char == "]" and i > class_start:
+                in_class = False
+                if negated and not excludes_newline:
+                    out.append("\\n")
+        elif char == "[":
+            in_class = True
+            negated = source[i + 1:i + 2] == "^"
+            excludes_newline = False
+            out.append("[^" if negated else "[")
+            i += 2 if negated else 1
+            class_start = i
+            continue
+        elif char == "(" and source[i + 1:i + 2] == "?":
+            end = i + 2
+            while end < len(source) and source[end] in "aiLmsux-":
+                end += 1
+            if "s" in source[i + 2:end] or "x" in source[i + 2:end]:
+                return None
+        out.append(char)
+        i += 1
+    try:
+        if backend is not None:
+            return compile_pattern(backend, "".join(out), pattern.flags | re.MULTILINE)
+        return re.compile("".join(out), pattern.flags | re.MULTILINE)
+    except re.error:
+        return None
+
+
+# Placeholders for triple emphasis, which the italic and bold rules must not see
+_TRIPLE_START = "%%BOLDITALIC_START%%"
+_TRIPLE_END = "%%BOLDITALIC_END%%"
+
+# The conversion rules, in the order they were written; compile_rules() orders
+# them by their constraints, drops the no-ops and merges the headings
+_HEADINGS = tuple(f"h{level}" for level in range(6, 0, -1))
+_BUILTIN_RULES = [
+    Rule("bold_italic_open", r"(?<!\*)\*\*\*([^*\n]+?)\*\*\*(?!\*)", f"{_TRIPLE_START}\\1{_TRIPLE_END}",
+         before="italic"),
+    Rule("unchecked_task", r"^(\s*)- \[([ ])\] (.+)", r"\1• ☐ \3", before="unordered_list"),
+    Rule("checked_task", r"^(\s*)- \[([xX])\] (.+)", r"\1• ☑ \3", before="unordered_list"),
+    Rule("unordered_list", r"^(\s*)[-\*] (.+)", r"\1• \2", before="italic"),
+    Rule("ordered_list", r"^(\s*)(\d+)\. (.+)", r"\1\2. \3"),
+    Rule("image", r"!\[.*?\]\((.+?)\)", r"<\1>", before="link",
+         opener=r"!\[", may_close=_link_may_close),
+    Rule("italic", r"(?<!\*)\*([^*\n]+?)\*(?!\*)", r"_\1_"),
+] + [
+    Rule(name, "^" + "#" * int(name[1]) + r" (.(?:[^\S\n]*\S)*)\s*$", r"*\1*", after="italic")
+    for name in _HEADINGS
+] + [
+    Rule("tilde_bold", r"(^|\s)~\*\*(.+?)\*\*(\s|$)", r"\1 *\2* \3", after="italic", before="bold",
+         opener=r"(^|\s)~\*\*", may_close=_tilde_bold_may_close),
+    Rule("bold", r"(?<!\*)\*\*(.+?)\*\*(?!\*)", r"*\1*", after="italic"),
+    Rule("underline_bold", r"__(.+?)__", r"*\1*", after="italic"),
+    Rule("link", r"\[(.+?)\]\((.+?)\)", r"<\2|\1>", opener=_LINK_OPEN.pattern, may_close=_link_may_close),
+    Rule("inline_code", r"`(.+?)`", r"`\1`"),
+    Rule("blockquote", r"^> (.+)", r"> \1"),
+    Rule("horizontal_rule", r"^(---|\*\*\*|___)$", r"──────────"),
+    Rule("strikethrough", r"~~(.+?)~~", r"~\1~"),
+    Rule("bold_italic_close", f"{_TRIPLE_START}(.*?){_TRIPLE_END}", r"*_\1_*",
+         after=("bold_italic_open", "italic", "tilde_bold", "bold", "underline_bold")),
+]
+
+
+def _build_patterns(plan: RulePlan, backend: Optional[RegexBackend] = None) -> List[Tuple[Any, Any]]:
+    """
+    Compile the steps of a rule plan into patterns and replacements.
+
+    Args:
+        plan (RulePlan): The plan.
+        backend (Optional[RegexBackend]): The regex backend. Default is None (``re``).
+
+    Returns:
+        List[Tuple[Any, Any]]: The patterns, each a regex or a wrapper with the same
+        ``sub`` method, and their replacements.
+    """
+    patterns = []
+    for step in plan.steps:
+        if backend is None:
+            regex = re.compile(step.pattern, step.flags)
+        else:
+            regex = compile_pattern(backend, step.pattern, step.flags)
+        if step.opener is not None:
+            regex = _GuardedPattern(regex, re.compile(step.opener, step.flags), step.may_close)
+        elif step.needle is not None:
+            regex = _PrefilteredPattern(regex, step.needle)
+        patterns.append((regex, step.replacement))
+    return patterns
+
+
+_BUILTIN_PLAN = compile_rules(_BUILTIN_RULES)
+_BUILTIN_PATTERNS = _build_patterns(_BUILTIN_PLAN)
+
+
+def _merge_adjacent(match: "re.Match") -> str:
+    """Join emphasis spans that follow each other directly: ``*a**b*`` becomes ``*ab*``."""
+    marker = match.group(0)[0]
+    return match.group(0).replace(marker * 2, "")
+
+
+def _marker_rules(name: str, marker: str) -> List[Rule]:
+    """
+    Build the compact mode rules that merge doubled and adjacent emphasis markers.
+
+    Args:
+        name (str): The kind of emphasis, for the rule names
+        marker (str): The mrkdwn marker, such as "*"
+
+    Returns:
+        List[Rule]: A rule turning ``**a**`` into ``*a*`` and one turning ``*a**b*`` into ``*ab*``
+    """
+    escaped = re.escape(marker)
+    # A span cannot contain its marker, so no match runs past the next one
+    span = f"[^{escaped}\\s](?:[^{escaped}\\n]*[^{escaped}\\s])?"
+    edge = f"[\\w{escaped}]"
+    # The opening markers come before the lookbehind that checks what precedes
+    # them, so that re looks for the markers first. The first repetition of the
+    # adjacent spans is written out, so that the plan skips lines without a
+    # doubled marker.
+    return [
+        Rule(f"doubled_{name}",
+             f"{escaped}{escaped}(?<!{edge}{escaped}{escaped})({span}){escaped}{escaped}(?!{edge})",
+             f"{marker}\\1{marker}", after="bold_italic_close"),
+        Rule(f"adjacent_{name}",
+             f"{escaped}(?<!{edge}{escaped}){span}{escaped}{escaped}{span}{escaped}(?:{escaped}{span}{escaped})*(?!{edge})",
+             _merge_adjacent, after="bold_italic_close"),
+    ]
+
+
+# The rules of compact mode: the built-in rules with a shorter horizontal rule and
+# ~**bold** without padding spaces, rules that drop emphasis around nothing but
+# whitespace (markers with nothing at all between them are literal text, such as
+# a masked password or a blank to fill in), and rules that merge doubled or adjacent markers of the same kind
+_COMPACT_REPLACEMENTS = {"horizontal_rule": "───", "tilde_bold": r"\1*\2*\3"}
+_EMPTY_BEFORE = ("tilde_bold", "bold", "underline_bold", "strikethrough")
+_COMPACT_RULES = [
+    Rule(rule.name, rule.pattern, _COMPACT_REPLACEMENTS.get(rule.name, rule.replacement), rule.flags,
+         rule.after, rule.before, rule.opener, rule.may_close)
+    for rule in _BUILTIN_RULES
+] + [
+    Rule("empty_bold", r"\*\*(?<![\w*]\*\*)(\s+)\*\*(?![\w*])", r"\1", after="italic", before=_EMPTY_BEFORE),
+    Rule("empty_underline_bold", r"__(?<!\w__)(\s+)__(?!\w)", r"\1", after="italic", before=_EMPTY_BEFORE),
+    Rule("empty_strikethrough", r"~~(?<![\w~]~~)(\s+)~~(?![\w~])", r"\1", after="italic", before=_EMPTY_BEFORE),
+] + _marker_rules("bold", "*") + _marker_rules("italic", "_") + _marker_rules("strikethrough", "~")
+_COMPACT_PLAN = compile_rules(_COMPACT_RULES)
+_COMPACT_PATTERNS = _build_patterns(_COMPACT_PLAN)
+
+
+class _RegexPlugin:
+    """A line plugin registered with ``register_regex_plugin``."""
+
+    def __init__(self, pattern: "re.Pattern", replacement: str):
+        self.pattern = pattern
+        self.replacement = replacement
+
+    def __call__(self, line: str) -> str:
+        return self.pattern.sub(self.replacement, line)
+
+    def hoisted(self) -> Optional["re.Pattern"]:
+        """
+        Get a version of the pattern that can be applied to many lines at once.
+
+        Returns:
+            Optional[re.Pattern]: The line-local pattern, or None if the plugin
+            has to be applied line by line.
+        """
+        if "\n" in self.replacement or "\\n" in self.replacement:
+            return None
+        return _line_local(self.pattern)
+
+
+class _NotLineLocal(Exception):
+    """Raised when a line plugin turns one line into several."""
+
+
+def _redact(text: str) -> str:
+    """
+    Hide the words of a text while keeping its Markdown structure.
+
+    Letters become "x" and digits "0"; punctuation, whitespace and therefore all
+    Markdown syntax are kept, so the redacted text converts at a similar speed.
+    """
+    return "".join("0" if char.isdigit() else "x" if char.isalpha() else char for char in text)
+
+
+class _Watchdog:
+    """A ring buffer of conversions slower than a threshold."""
+
+    def __init__(self, threshold: float, capacity: int, redact: Optional[Callable[[str], str]]):
+        self.threshold = threshold
+        self.redact = redact
+        self.entries: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+
+
+class _InFlight:
+    """A conversion in progress that concurrent callers with the same input wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = ""
+
+
+class _AsyncRunner:
+    """
+    Run the calls of coroutine plugins during one conversion.
+
+    All calls of a plugin over a document are started together and run at most
+    ``concurrency`` at a time. A call that takes longer than ``timeout`` seconds
+    is cancelled and its input is kept as its result. The calls run on ``loop``
+    when given, which must be running in another thread, and otherwise on a new
+    event loop; in a thread whose own event loop is running, that loop cannot run
+    another one, so the new loop runs in a helper thread while this one waits.
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop], concurrency: int,
+                 timeout: Optional[float]):
+        self.loop = loop
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.timeouts = 0
+
+    def map(self, func: Callable[[Any], Any], arguments: List[Any],
+            fallbacks: Optional[List[Any]] = None) -> List[Any]:
+        """
+        Call a coroutine function on every argument concurrently.
+
+        Args:
+            func (Callable[[Any], Any]): The coroutine function
+            arguments (List[Any]): The argument of each call
+            fallbacks (Optional[List[Any]]): The result of each call that times out;
+                by default its argument
+
+        Returns:
+            List[Any]: The results, in the order of the arguments
+        """
+        if not arguments:
+            return []
+        if fallbacks is None:
+            fallbacks = arguments
+        if self.loop is not None:
+            return asyncio.run_coroutine_threadsafe(self._gather(func, arguments, fallbacks), self.loop).result()
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._gather(func, arguments, fallbacks))
+        with ThreadPoolExecutor(1) as executor:
+            return executor.submit(lambda: asyncio.run(self._gather(func, arguments, fallbacks))).result()
+
+    async def _gather(self, func: Callable[[Any], Any], arguments: List[Any], fallbacks: List[Any]) -> List[Any]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def call(argument, fallback):
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(func(argument), self.timeout)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    return fallback
+
+        return await asyncio.gather(*(call(argument, fallback) for argument, fallback in zip(arguments, fallbacks)))
+
+
+# The fewest lines a chunk of a document converted in parallel may have
+_PARALLEL_CHUNK_LINES = 2048
+
+# Process pools for parallel conversion, by number of workers, shared by all converters
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+# The converter last received by this worker process, with its pickled form
+_worker_converter: Tuple[bytes, Any] = (b"", None)
+
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return pool
+
+
+def _discard_process_pool(workers: int, pool: ProcessPoolExecutor) -> None:
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False)
+
+
+def _convert_in_worker(converter: bytes, lines: List[str], in_code_block: bool,
+                       line_plugins: List[str], with_plaintext: bool, with_links: bool) -> "ConversionState":
+    """Convert a chunk of lines in a worker process with a pickled converter."""
+    global _worker_converter
+    if _worker_converter[0] != converter:
+        _worker_converter = (converter, pickle.loads(converter))
+    return _worker_converter[1]._convert_chunk(lines, in_code_block, line_plugins, with_plaintext, with_links)
+
+
+def _describe_callable(func: Callable) -> Optional[str]:
+    """
+    Describe a plugin function or rule replacement the same way in every process.
+
+    Args:
+        func (Callable): The function
+
+    Returns:
+        Optional[str]: Its ``cache_key`` attribute or, for a module-level function, its
+        qualified name; None if neither identifies what it does
+    """
+    cache_key = getattr(func, "cache_key", None)
+    if cache_key is not None:
+        return f"key {cache_key!r}"
+    qualname = getattr(func, "__qualname__", "")
+    # Lambdas and functions defined inside other functions share their names
+    if (inspect.isfunction(func) or inspect.isbuiltin(func)) and "<" not in qualname:
+        return f"{func.__module__}.{qualname}"
+    return None
+
+
+class _Configuration:
+    """
+    The plugins and rules of a converter, replaced as a whole when any of them changes.
+
+    ``register_plugin``, ``remove_plugin``, ``update_dictionary_plugin`` and
+    ``add_rule`` build a new configuration under the converter's ``_config_lock``
+    and assign it to ``_config``; none of them changes the one they replace. Each
+    call to ``convert()`` or ``convert_ex()`` takes ``_config`` once, decides
+    with it whether the text needs converting and which cache key it has, and
+    hands it to ``_convert``, which pins its plugins and patterns on the
+    ``ConversionState`` for the passes.
+
+    Attributes:
+        plugins (Dict[str, Dict[str, Any]]): The registered plugins by name.
+        plugin_order (List[str]): The plugin names in execution order.
+        rules (List[Rule]): The conversion rules.
+        plan (RulePlan): The compiled execution plan of the rules.
+        patterns (List[Tuple[Any, Any]]): The patterns and replacements of the plan.
+    """
+
+    __slots__ = ("plugins", "plugin_order", "rules", "plan", "patterns")
+
+    def __init__(self, plugins: Dict[str, Dict[str, Any]], plugin_order: List[str], rules: List[Rule],
+                 plan: RulePlan, patterns: List[Tuple[Any, Any]]):
+        self.plugins = plugins
+        self.plugin_order = plugin_order
+        self.rules = rules
+        self.plan = plan
+        self.patterns = patterns
+
+    def with_plugins(self, plugins: Dict[str, Dict[str, Any]]) -> "_Configuration":
+        """Get a copy with other plugins, ordered by priority (lower numbers execute first)."""
+        order = sorted(plugins, key=lambda name: plugins[name]["priority"])
+        return _Configuration(plugins, order, self.rules, self.plan, self.patterns)
 
 
 class SlackMarkdownConverter:
     """
     A converter class to transform Markdown text into Slack's mrkdwn format.
 
+    A converter can be used by many threads at once. Registering or removing a
+    plugin or adding a rule publishes a new configuration in one assignment;
+    conversions never wait for it, and each uses the configuration it started with.
+
     Attributes:
         encoding (str): The character encoding used for the conversion.
         patterns (List[Tuple[str, str]]): A list of regex patterns and their replacements.
@@ -14,72 +756,141 @@ class SlackMarkdownConverter:
         plugin_order (List[str]): A list of plugin names in execution order.
     """
 
-    def __init__(self, encoding="utf-8"):
+    def __init__(self, encoding="utf-8", max_table_rows: Optional[int] = None,
+                 document_mode: bool = False, escape: bool = False, cache: Optional[DiskCache] = None,
+                 regex_backend: Union[str, RegexBackend] = "re", compact: bool = False):
         """
         Initializes the SlackMarkdownConverter with a specified encoding.
 
         Args:
             encoding (str): The character encoding to use for the conversion. Default is 'utf-8'.
+            max_table_rows (Optional[int]): The maximum number of data rows rendered per table.
+                Further rows are replaced by a "…N more rows" marker. Default is None (no limit).
+            document_mode (bool): Apply each conversion rule once per run of prose lines
+                between code fences and tables instead of once per line. The output is the
+                same; large documents convert faster. Default is False.
+            escape (bool): Escape ``&``, ``<`` and ``>`` in the text as Slack requires, while
+                converting. Inline code, code blocks, URLs and the links, quotes and other
+                syntax the converter generates are left intact. Default is False.
+            cache (Optional[DiskCache]): A persistent cache that ``convert()`` looks documents
+                up in before converting them, and stores their output in. Plugins are assumed
+                to return the same output for the same input. While a plugin or rule uses a
+                lambda, closure or callable object without a ``cache_key`` attribute, the
+                cache is not used (see ``config_fingerprint``). Default is None (no cache).
+            regex_backend (Union[str, RegexBackend]): The engine that compiles the conversion
+                rules and regex plugins: "re", "re2" (linear time), "regex" (with a timeout)
+                or a backend instance. Patterns the engine cannot compile use ``re``.
+                Default is "re".
+            compact (bool): Minimize the bytes of the output while converting: horizontal
+                rules are three characters long, ``~**bold**`` gets no padding spaces,
+                empty emphasis is dropped, doubled or adjacent markers of the same kind
+                are merged and trailing whitespace in code blocks is removed.
+                Default is False.
         """
+        if max_table_rows is not None and max_table_rows < 0:
+            raise ValueError("max_table_rows must be None or a non-negative integer")
         self.encoding = encoding
-        self.in_code_block = False
-        self.table_replacements = {}
-        self.plugins: Dict[str, Dict[str, Any]] = {}  # Dictionary to store plugins
-        self.plugin_order: List[str] = []  # Plugin execution order
-        # Use compiled regex patterns for better performance
-        self.patterns: List[Tuple[re.Pattern, str]] = [
-            (re.compile(r"^(\s*)- \[([ ])\] (.+)", re.MULTILINE), r"\1• ☐ \3"),  # Unchecked task list
-            (re.compile(r"^(\s*)- \[([xX])\] (.+)", re.MULTILINE), r"\1• ☑ \3"),  # Checked task list
-            (re.compile(r"^(\s*)[-\*] (.+)", re.MULTILINE), r"\1• \2"),  # Unordered list
-            (re.compile(r"^(\s*)(\d+)\. (.+)", re.MULTILINE), r"\1\2. \3"),  # Ordered list
-            (re.compile(r"!\[.*?\]\((.+?)\)", re.MULTILINE), r"<\1>"),  # Images to URL
-            (re.compile(r"(?<!\*)\*([^*\n]+?)\*(?!\*)", re.MULTILINE), r"_\1_"),  # Italic
-            (re.compile(r"^###### (.+?)\s*$", re.MULTILINE), r"*\1*"), # H6 as bold
-            (re.compile(r"^##### (.+?)\s*$", re.MULTILINE), r"*\1*"), # H5 as bold
-            (re.compile(r"^#### (.+?)\s*$", re.MULTILINE), r"*\1*"), # H4 as bold
-            (re.compile(r"^### (.+?)\s*$", re.MULTILINE), r"*\1*"),  # H3 as bold
-            (re.compile(r"^## (.+?)\s*$", re.MULTILINE), r"*\1*"),  # H2 as bold
-            (re.compile(r"^# (.+?)\s*$", re.MULTILINE), r"*\1*"),  # H1 as bold
-            (re.compile(r"(^|\s)~\*\*(.+?)\*\*(\s|$)", re.MULTILINE), r"\1 *\2* \3"),  # Bold with space handling
-            (re.compile(r"(?<!\*)\*\*(.+?)\*\*(?!\*)", re.MULTILINE), r"*\1*"),  # Bold
-            (re.compile(r"__(.+?)__", re.MULTILINE), r"*\1*"),  # Underline as bold
-            (re.compile(r"\[(.+?)\]\((.+?)\)", re.MULTILINE), r"<\2|\1>"),  # Links
-            (re.compile(r"`(.+?)`", re.MULTILINE), r"`\1`"),  # Inline code
-            (re.compile(r"^> (.+)", re.MULTILINE), r"> \1"),  # Blockquote
-            (re.compile(r"^(---|\*\*\*|___)$", re.MULTILINE), r"──────────"),  # Horizontal line
-            (re.compile(r"~~(.+?)~~", re.MULTILINE), r"~\1~"),  # Strikethrough
-        ]
+        self.max_table_rows = max_table_rows
+        self.document_mode = document_mode
+        self.escape = escape
+        self.compact = compact
+        self.cache = cache
+        self.regex_backend = get_backend(regex_backend)
+        # Held by threads changing the plugins or rules, never by conversions
+        self._config_lock = threading.Lock()
+        # Conversions in progress, keyed by input, shared by concurrent callers. The
+        # first caller adds its entry with setdefault(), so joining takes no lock
+        self._inflight: Dict[str, _InFlight] = {}
+        # Held while captured slow inputs or the per-thread counters are listed
+        self._lock = threading.Lock()
+        # Counters are added up per thread, each thread writing only its own dict,
+        # so that conversions count without a lock. _stats holds the counts of
+        # threads that have finished, folded in when another thread starts counting
+        self._local = threading.local()
+        self._thread_stats: List[Tuple[threading.Thread, Dict[str, int]]] = []
+        self._stats: Dict[str, int] = {
+            "conversions": 0,
+            "coalesced": 0,
+            "skipped_documents": 0,
+            "skipped_tables": 0,
+            "skipped_plugins": 0,
+            "slow_conversions": 0,
+            "parallel_chunks": 0,
+            "plugin_timeouts": 0,
+            "cache_hits": 0,
+        }
+        self._watchdog: Optional[_Watchdog] = None
+        # The last config_fingerprint(), the configuration signature it was computed for
+        # and whether it is stable across processes
+        self._fingerprint: Optional[Tuple[tuple, str, bool]] = None
+        # The plugins, the conversion rules and the patterns of their compiled execution plan
+        rules, plan, patterns = ((_COMPACT_RULES, _COMPACT_PLAN, _COMPACT_PATTERNS) if compact
+                                 else (_BUILTIN_RULES, _BUILTIN_PLAN, _BUILTIN_PATTERNS))
+        if type(self.regex_backend) is not RegexBackend:
+            patterns = _build_patterns(plan, self.regex_backend)
+        self._config = _Configuration({}, [], list(rules), plan, list(patterns))
         # Placeholders for triple emphasis
-        self.triple_start = "%%BOLDITALIC_START%%"
-        self.triple_end = "%%BOLDITALIC_END%%"
+        self.triple_start = _TRIPLE_START
+        self.triple_end = _TRIPLE_END
+
+    @property
+    def plugins(self) -> Dict[str, Dict[str, Any]]:
+        """The registered plugins by name. Read only; see ``register_plugin``."""
+        return self._config.plugins
+
+    @property
+    def plugin_order(self) -> List[str]:
+        """The plugin names in execution order. Read only."""
+        return self._config.plugin_order
+
+    @property
+    def rules(self) -> List[Rule]:
+        """The conversion rules. Read only; see ``add_rule``."""
+        return self._config.rules
+
+    @property
+    def patterns(self) -> List[Tuple[Any, Any]]:
+        """The patterns and replacements of the compiled conversion rules. Read only."""
+        return self._config.patterns
 
     def register_plugin(self, name: str, converter_func: Callable[[str], str], 
-                       priority: int = 50, scope: str = "line", timing: str = "after") -> None:
+                       priority: int = 50, scope: str = "line", timing: str = "after",
+                       triggers: Optional[str] = None) -> None:
         """
         Register a custom conversion plugin.
         
         Args:
             name (str): A unique name for the plugin
-            converter_func (callable): A function that takes a text string and returns the converted text
+            converter_func (callable): A function that takes a text string and returns the converted text.
+                It may be a coroutine function; see ``convert_async``.
             priority (int): Execution priority (lower numbers execute first)
-            scope (str): Application scope - "global" (entire text), "line" (line by line), or "block" (block by block)
-            timing (str): When to apply the plugin for line scope - "before" or "after" (default: "after")
-        """
-        if scope not in ["global", "line", "block"]:
-            raise ValueError("Plugin scope must be 'global', 'line', or 'block'")
-        if scope == "line" and timing not in ["before", "after"]:
-            raise ValueError("Plugin timing must be 'before' or 'after' for line scope")
-        self.plugins[name] = {
+            scope (str): Application scope - "global" (entire text), "line" (line by line), "lines"
+                (all lines in one call), or "block" (block by block). A "lines" plugin receives a list of
+                ``(index, line)`` pairs for the lines outside code blocks and tables, and returns a list
+                of the same length with the new text of each line.
+            timing (str): When to apply the plugin for line and lines scope - "before" or "after" (default: "after")
+            triggers (Optional[str]): Characters the plugin needs in order to change anything.
+                The plugin is skipped for documents containing none of them. Default is None (always run).
+        """
+        if scope not in ["global", "line", "lines", "block"]:
+            raise ValueError("Plugin scope must be 'global', 'line', 'lines', or 'block'")
+        if scope in ["line", "lines"] and timing not in ["before", "after"]:
+            raise ValueError("Plugin timing must be 'before' or 'after' for line and lines scope")
+        if triggers is not None and not triggers:
+            raise ValueError("Plugin triggers must contain at least one character")
+        plugin = {
             "func": converter_func,
             "priority": priority,
             "scope": scope,
-            "timing": timing if scope == "line" else None
+            "timing": timing if scope in ["line", "lines"] else None,
+            "triggers": triggers,
+            "trigger_pattern": re.compile(f"[{re.escape(triggers)}]") if triggers else None,
+            "is_async": inspect.iscoroutinefunction(converter_func),
         }
-        # Update plugin execution order based on priority (lower numbers execute first, ascending order)
-        self.plugin_order = sorted(
-            self.plugins.keys(),
-            key=lambda x: self.plugins[x]["priority"]
-        )
+        with self._config_lock:
+            plugins = dict(self._config.plugins)
+            plugins[name] = plugin
+            self._config = self._config.with_plugins(plugins)
         
     def remove_plugin(self, name: str) -> bool:
         """
@@ -91,11 +902,13 @@ class SlackMarkdownConverter:
         Returns:
             bool: True if the plugin was removed, False if it wasn't found
         """
-        if name in self.plugins:
-            del self.plugins[name]
-            self.plugin_order = [p for p in self.plugin_order if p != name]
-            return True
-        return False
+        with self._config_lock:
+            if name not in self._config.plugins:
+                return False
+            plugins = dict(self._config.plugins)
+            del plugins[name]
+            self._config = self._config.with_plugins(plugins)
+        return True
         
     def get_registered_plugins(self) -> Dict[str, Dict[str, Any]]:
         """
@@ -107,145 +920,1293 @@ class SlackMarkdownConverter:
         return {name: {
             "priority": info["priority"],
             "scope": info["scope"],
-            "timing": info.get("timing")
+            "timing": info.get("timing"),
+            "triggers": info.get("triggers")
         } for name, info in self.plugins.items()}
 
-    def convert(self, markdown: str) -> str:
+    def __getstate__(self) -> Dict[str, Any]:
+        # Locks, conversions in progress and captured slow inputs belong to this instance
+        state = self.__dict__.copy()
+        del state["_lock"], state["_config_lock"], state["_inflight"], state["_watchdog"]
+        del state["_local"], state["_thread_stats"]
+        state["_stats"] = self.get_stats()
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._config_lock = threading.Lock()
+        self._local = threading.local()
+        self._thread_stats = []
+        self._watchdog = None
+
+    def clone(self) -> "SlackMarkdownConverter":
+        """
+        Copy the converter without compiling or sorting anything again.
+
+        The clone shares the compiled rules, the plugin functions, the regex backend
+        and the cache with this converter, and has its own plugin registry, rules,
+        statistics and conversions in progress: registering or removing a plugin or
+        adding a rule on either converter does not affect the other, and neither does
+        ``update_dictionary_plugin``, which never changes a dictionary in place. The
+        ``TermLinker`` returned by ``register_dictionary_plugin`` is the shared one.
+
+        Returns:
+            SlackMarkdownConverter: The clone
+        """
+        with self._config_lock:
+            # Configurations are never changed in place, so the clone can share this one
+            state = self.__getstate__()
+            state["_stats"] = dict.fromkeys(self._stats, 0)
+        clone = object.__new__(type(self))
+        clone.__setstate__(state)
+        return clone
+
+    def convert(self, markdown: str, with_plaintext: bool = False,
+                workers: Optional[int] = None) -> Union[str, Tuple[str, str]]:
         """
         Convert Markdown text to Slack's mrkdwn format.
 
         Args:
             markdown (str): The Markdown text to convert.
+            with_plaintext (bool): Also produce a plain text fallback, with formatting
+                markers removed and link labels, list bullets and table cells kept,
+                in the same pass. Default is False.
+            workers (Optional[int]): Convert the lines of a large document in chunks in a
+                pool of this many processes. The output is the same as without. Requires
+                the converter and its plugins to be picklable, and is ignored for documents
+                with "lines" scope plugins. Default is None (convert in this thread).
+
+        Returns:
+            Union[str, Tuple[str, str]]: The converted text in Slack's mrkdwn format, or
+            a tuple of the mrkdwn text and the plain text when with_plaintext is True.
+        """
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be None or a positive integer")
+        return self._convert_text(markdown, with_plaintext, workers or 1, None)
+
+    async def convert_async(self, markdown: str, with_plaintext: bool = False, concurrency: int = 10,
+                            timeout: Optional[float] = None) -> Union[str, Tuple[str, str]]:
+        """
+        Convert Markdown text to Slack's mrkdwn format without blocking the event loop.
+
+        The conversion runs in the loop's default executor. Coroutine plugins, such
+        as plugins looking up user IDs or ticket titles, are awaited on the calling
+        loop: all calls of a plugin over the document are started together, so the
+        latency of a document is that of its slowest lookups rather than their sum.
+
+        Args:
+            markdown (str): The Markdown text to convert.
+            with_plaintext (bool): Also produce a plain text fallback. Default is False.
+            concurrency (int): The most calls of one coroutine plugin running at once.
+                Default is 10.
+            timeout (Optional[float]): Seconds after which a coroutine plugin call is
+                cancelled and its input kept unchanged. Default is None (no limit).
 
         Returns:
-            str: The converted text in Slack's mrkdwn format.
+            Union[str, Tuple[str, str]]: The converted text, or a tuple of the mrkdwn
+            text and the plain text when with_plaintext is True.
         """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        loop = asyncio.get_running_loop()
+        runner = _AsyncRunner(loop, concurrency, timeout)
+        return await loop.run_in_executor(None, self._convert_text, markdown, with_plaintext, 1, runner)
+
+    def convert_ex(self, markdown: str, with_plaintext: bool = False,
+                   workers: Optional[int] = None) -> ConversionResult:
+        """
+        Convert Markdown text and describe the result.
+
+        The URLs of links, and the numbers of tables and code blocks, are recorded
+        while converting, so callers checking Slack's limits or deciding whether to
+        unfurl links do not have to scan the output again.
+
+        Args:
+            markdown (str): The Markdown text to convert.
+            with_plaintext (bool): Also produce the plain text fallback. Default is False.
+            workers (Optional[int]): Convert a large document in this many processes, as
+                for ``convert()``. Default is None (convert in this thread).
+
+        Returns:
+            ConversionResult: The converted text and what it contains.
+        """
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be None or a positive integer")
         if not markdown:
-            return ""
+            return ConversionResult("", "" if with_plaintext else None)
+
+        stripped = markdown.strip()
+        config = self._config
+        if self._is_plain(stripped, config):
+            self._count("skipped_documents")
+            links = [match.group() for match in _BARE_URL.finditer(stripped)] if "://" in stripped else []
+            return ConversionResult(stripped, stripped if with_plaintext else None, links)
 
+        self._count("conversions")
         try:
-            markdown = markdown.strip()
-            self.in_code_block = False
+            state = self._convert(stripped, with_plaintext=with_plaintext, workers=workers or 1, with_links=True,
+                                  config=config)
+        except Exception as e:
+            logging.error(f"Markdown conversion error: {str(e)}")
+            return ConversionResult(stripped, stripped if with_plaintext else None)
+        return ConversionResult(state.output, state.plaintext, state.links, state.tables,
+                                state.code_blocks, state.plugins_changed)
 
-            self.table_replacements = {}
+    def _convert_text(self, markdown: str, with_plaintext: bool, workers: int,
+                      runner: Optional[_AsyncRunner]) -> Union[str, Tuple[str, str]]:
+        """
+        Convert Markdown text, sharing the work with concurrent calls for the same input.
 
-            markdown = self._convert_tables(markdown)
-            
-            # Apply global scope plugins
-            for plugin_name in self.plugin_order:
-                plugin = self.plugins[plugin_name]
-                if plugin["scope"] == "global":
-                    markdown = plugin["func"](markdown)
-            
-            lines = markdown.splitlines()
-            converted_lines = []
-
-            # Get line-scope plugins for before/after timing in ascending priority order
-            before_line_plugins = [name for name in self.plugin_order
-                                  if self.plugins[name]["scope"] == "line" and self.plugins[name].get("timing", "after") == "before"]
-            after_line_plugins = [name for name in self.plugin_order
-                                 if self.plugins[name]["scope"] == "line" and self.plugins[name].get("timing", "after") == "after"]
-            
-            for line in lines:
-                # Skip conversion for table placeholders
-                if line.startswith("%%TABLE_PLACEHOLDER_") and line.endswith("%%"):
-                    converted_lines.append(line)
-                    continue
-                
-                # Apply before line scope plugins
-                for plugin_name in before_line_plugins:
-                    line = self.plugins[plugin_name]["func"](line)
-                
-                # Apply standard line conversion
-                line = self._convert_line(line)
-                
-                # Apply after line scope plugins
-                for plugin_name in after_line_plugins:
-                    line = self.plugins[plugin_name]["func"](line)
-                
-                converted_lines.append(line)
-                
-            result = "\n".join(converted_lines)
-
-            for placeholder, table in self.table_replacements.items():
-                result = result.replace(placeholder, table)
-            
-            # Apply block scope plugins
-            for plugin_name in self.plugin_order:
-                plugin = self.plugins[plugin_name]
-                if plugin["scope"] == "block":
-                    result = plugin["func"](result)
-                
-            return result.encode(self.encoding).decode(self.encoding)
+        Args:
+            markdown (str): The Markdown text to convert.
+            with_plaintext (bool): Whether to produce the plain text fallback as well.
+            workers (int): The number of processes to convert the lines with.
+            runner (Optional[_AsyncRunner]): Runs coroutine plugins, or None to run them
+                on a new event loop.
+
+        Returns:
+            Union[str, Tuple[str, str]]: The converted text, or the mrkdwn and plain text.
+        """
+        if not markdown:
+            return ("", "") if with_plaintext else ""
+
+        stripped = markdown.strip()
+        config = self._config
+        if self._is_plain(stripped, config):
+            self._count("skipped_documents")
+            return (stripped, stripped) if with_plaintext else stripped
+
+        cache = self.cache
+        cache_key = None
+        if cache is not None and len(stripped) >= cache.min_length:
+            fingerprint, stable = self._fingerprint_entry(config)
+            if stable:
+                cache_key = cache.key(stripped, fingerprint, with_plaintext)
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    self._count("cache_hits")
+                    return cached if with_plaintext else cached[0]
+
+        # Share the work with a concurrent call converting the same input
+        key = (markdown, with_plaintext) if with_plaintext else markdown
+        call = _InFlight()
+        leader = self._inflight.setdefault(key, call)
+        if leader is not call:
+            self._count("coalesced")
+            leader.done.wait()
+            return leader.result
+        self._count("conversions")
+
+        call.result = (stripped, stripped) if with_plaintext else stripped
+        watchdog = self._watchdog
+        started = time.perf_counter() if watchdog is not None else 0.0
+        try:
+            state = self._convert(stripped, with_plaintext=with_plaintext, workers=workers, runner=runner,
+                                  config=config)
+            call.result = (state.output, state.plaintext) if with_plaintext else state.output
+            if cache_key is not None and not state.plugin_timeouts:
+                cache.put(cache_key, state.output, state.plaintext)
         except Exception as e:
             # Log the error for debugging
             logging.error(f"Markdown conversion error: {str(e)}")
-            return markdown
+        finally:
+            del self._inflight[key]
+            call.done.set()
+        if watchdog is not None:
+            elapsed = time.perf_counter() - started
+            if elapsed >= watchdog.threshold:
+                self._capture_slow_input(watchdog, stripped, with_plaintext, elapsed)
+        return call.result
+
+    def convert_many(self, markdowns: List[str]) -> List[str]:
+        """
+        Convert several Markdown texts, converting each distinct text only once.
+
+        Identical inputs within the batch, and inputs already being converted by a
+        concurrent call, share a single conversion.
+
+        Args:
+            markdowns (List[str]): The Markdown texts to convert.
 
-    def _convert_tables(self, markdown: str) -> str:
+        Returns:
+            List[str]: The converted texts, in the same order as the inputs.
+        """
+        results: Dict[str, str] = {}
+        for markdown in markdowns:
+            if markdown in results:
+                self._count("coalesced")
+            else:
+                results[markdown] = self.convert(markdown)
+        return [results[markdown] for markdown in markdowns]
+
+    def watch_slow_inputs(self, threshold: float = 0.1, capacity: int = 100,
+                          redact: Union[bool, Callable[[str], str]] = False) -> None:
+        """
+        Capture the inputs of conversions slower than a threshold.
+
+        Each slow input is kept in a bounded ring buffer together with its
+        duration, the converter options and the fingerprint of the plugin
+        configuration, so that it can be dumped with ``dump_slow_inputs()`` and
+        replayed offline with ``python -m markdown_to_mrkdwn.replay``.
+
+        Args:
+            threshold (float): The duration in seconds from which a conversion is captured
+            capacity (int): The number of slow inputs kept; the oldest are dropped first
+            redact (Union[bool, Callable[[str], str]]): A function applied to each input
+                before it is stored, or True to replace letters and digits while keeping
+                the Markdown structure. Default is False (store inputs as they are).
+        """
+        if threshold < 0:
+            raise ValueError("threshold must be non-negative")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self._watchdog = _Watchdog(threshold, capacity, _redact if redact is True else redact or None)
+
+    def stop_watching_slow_inputs(self) -> None:
+        """Stop timing conversions. Inputs already captured are discarded."""
+        self._watchdog = None
+
+    def get_slow_inputs(self) -> List[Dict[str, Any]]:
+        """
+        Get the captured slow inputs, oldest first.
+
+        Returns:
+            List[Dict[str, Any]]: One dictionary per input with its "markdown", "seconds",
+            "with_plaintext", "options", "fingerprint" and "captured_at" time
+        """
+        watchdog = self._watchdog
+        if watchdog is None:
+            return []
+        with self._lock:
+            return [dict(entry) for entry in watchdog.entries]
+
+    def dump_slow_inputs(self, path: str) -> int:
+        """
+        Write the captured slow inputs to a file, one JSON object per line.
+
+        Args:
+            path (str): The file to write
+
+        Returns:
+            int: The number of inputs written
+        """
+        entries = self.get_slow_inputs()
+        with open(path, "w", encoding="utf-8") as dump:
+            for entry in entries:
+                dump.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return len(entries)
+
+    def config_fingerprint(self) -> str:
+        """
+        Identify the converter options and plugin configuration.
+
+        Plugins are described by their name, settings and function, regex plugins and
+        rules by their pattern. A function is described by its ``cache_key`` attribute
+        if it has one, and a module-level function by its qualified name. Other
+        callables, such as lambdas, closures and callable objects, are described by
+        their identity, so the fingerprint only identifies the configuration within
+        this process, and ``convert()`` does not use the persistent cache. It is
+        computed again only after the configuration changed.
+
+        Returns:
+            str: A short hexadecimal digest
+        """
+        return self._fingerprint_entry()[0]
+
+    def _fingerprint_entry(self, config: Optional[_Configuration] = None) -> Tuple[str, bool]:
+        """
+        Compute ``config_fingerprint()`` and whether it is stable across processes.
+
+        Args:
+            config (Optional[_Configuration]): The plugins and rules to describe.
+                Default is None (the current ones).
+
+        Returns:
+            Tuple[str, bool]: The digest, and False if a callable is described by its identity
+        """
+        if config is None:
+            config = self._config
+        signature = self._config_signature(config)
+        fingerprint = self._fingerprint
+        if fingerprint is not None and fingerprint[0] == signature:
+            return fingerprint[1], fingerprint[2]
+        parts = [repr((self.encoding, self.max_table_rows, self.document_mode, self.escape,
+                             self.compact))]
+        if type(self.regex_backend) is not RegexBackend:
+            parts.append(f"regex backend {self.regex_backend!r}")
+        stable = True
+        for name in config.plugin_order:
+            plugin = config.plugins[name]
+            func = plugin["func"]
+            if isinstance(func, _RegexPlugin):
+                description = f"regex {func.pattern.pattern!r} {func.replacement!r}"
+            elif isinstance(func, TermLinker):
+                description = f"dictionary {func.digest()} {func.whole_words}"
+            else:
+                description = _describe_callable(func)
+                stable = stable and description is not None
+                description = description or f"object {id(func)}"
+            parts.append(repr((name, plugin["priority"], plugin["scope"], plugin["timing"],
+                               plugin["triggers"], description)))
+        for rule in config.rules:
+            replacement = rule.replacement
+            if callable(replacement):
+                replacement = _describe_callable(rule.replacement)
+                stable = stable and replacement is not None
+                replacement = replacement or f"object {id(rule.replacement)}"
+            parts.append(repr((rule.name, rule.pattern, replacement, rule.flags, rule.after, rule.before)))
+        digest = hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+        self._fingerprint = (signature, digest, stable)
+        return digest, stable
+
+    def _capture_slow_input(self, watchdog: _Watchdog, markdown: str, with_plaintext: bool,
+                            elapsed: float) -> None:
+        entry = {
+            "markdown": watchdog.redact(markdown) if watchdog.redact is not None else markdown,
+            "seconds": elapsed,
+            "with_plaintext": with_plaintext,
+            "options": {
+                "encoding": self.encoding,
+                "max_table_rows": self.max_table_rows,
+                "document_mode": self.document_mode,
+                "escape": self.escape,
+                "compact": self.compact,
+            },
+            "fingerprint": self.config_fingerprint(),
+            "captured_at": time.time(),
+        }
+        with self._lock:
+            watchdog.entries.append(entry)
+        self._count("slow_conversions")
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get conversion counters.
+
+        Returns:
+            Dict[str, int]: "conversions" is the number of conversions actually run and
+            "coalesced" the number of calls that reused another call's result
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            for _, counts in self._thread_stats:
+                for name, value in counts.items():
+                    stats[name] += value
+        return stats
+
+    def reset_stats(self) -> None:
+        """
+        Reset all conversion counters to zero.
+
+        Conversions that finish during the reset may still be counted.
+        """
+        with self._lock:
+            for counts in [self._stats] + [counts for _, counts in self._thread_stats]:
+                for name in counts:
+                    counts[name] = 0
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        counts = getattr(self._local, "stats", None)
+        if counts is None:
+            counts = self._local.stats = self._start_counting()
+        counts[name] += amount
+
+    def _start_counting(self) -> Dict[str, int]:
+        """
+        Add counters for the current thread, folding in those of finished threads.
+
+        Returns:
+            Dict[str, int]: The current thread's counters
+        """
+        counts = dict.fromkeys(self._stats, 0)
+        with self._lock:
+            running = []
+            for thread, finished in self._thread_stats:
+                if thread.is_alive():
+                    running.append((thread, finished))
+                else:
+                    for name, value in finished.items():
+                        self._stats[name] += value
+            running.append((threading.current_thread(), counts))
+            self._thread_stats = running
+        return counts
+
+    @staticmethod
+    def _plugin_runs(plugin: Dict[str, Any], text: str) -> bool:
+        """
+        Check whether a plugin may change the given text.
+
+        Args:
+            plugin (Dict[str, Any]): The registered plugin
+            text (str): The text the plugin would be applied to
+
+        Returns:
+            bool: False if the plugin declared trigger characters and none occur in the text
+        """
+        pattern = plugin["trigger_pattern"]
+        return pattern is None or pattern.search(text) is not None
+
+    def _is_plain(self, markdown: str, config: _Configuration) -> bool:
+        """
+        Check whether conversion would return the text unchanged.
+
+        This is true when the text contains no Markdown syntax at all, no rule was
+        added with ``add_rule`` and every registered plugin has declared trigger
+        characters that do not occur in it.
+
+        Args:
+            markdown (str): The stripped Markdown text
+            config (_Configuration): The plugins and rules to convert with
+
+        Returns:
+            bool: True if the text can be returned as is
+        """
+        if _MARKDOWN_SYNTAX.search(markdown) is not None or (self.escape and "&" in markdown):
+            return False
+        # Added rules may match any text
+        if self._added_rules(config):
+            return False
+        return not any(self._plugin_runs(plugin, markdown) for plugin in config.plugins.values())
+
+    def _added_rules(self, config: _Configuration) -> List[Rule]:
+        """Get the rules added with ``add_rule``, which follow the built-in ones."""
+        return config.rules[len(_COMPACT_RULES if self.compact else _BUILTIN_RULES):]
+
+    def _output_chars(self, config: _Configuration) -> Optional[FrozenSet[str]]:
+        """
+        Get the characters the conversion itself may add to a line.
+
+        Args:
+            config (_Configuration): The plugins and rules of the conversion.
+
+        Returns:
+            Optional[FrozenSet[str]]: The characters, or None if a rule added with a
+            replacement function may add any.
+        """
+        chars = _CONVERTER_OUTPUT_CHARS | _ESCAPE_OUTPUT_CHARS if self.escape else _CONVERTER_OUTPUT_CHARS
+        for rule in self._added_rules(config):
+            if not isinstance(rule.replacement, str):
+                return None
+            chars = chars | frozenset(rule.replacement)
+        return chars
+
+    def update(self, previous_state: Optional[ConversionState],
+               markdown: str) -> Tuple[str, ConversionState]:
+        """
+        Re-convert an edited document, reusing the output of unchanged lines.
+
+        The new text is diffed line by line against the text the previous state
+        was produced from. Only the changed lines are converted again, together
+        with any following lines whose code block state changed as a result.
+        Tables are re-rendered only when their own text changed.
+
+        Args:
+            previous_state (Optional[ConversionState]): The state returned by an earlier
+                call to ``update()``, or None to convert from scratch.
+            markdown (str): The new Markdown text.
+
+        Returns:
+            Tuple[str, ConversionState]: The converted text and a state handle to pass
+            to the next call.
+        """
+        if not markdown:
+            return "", ConversionState()
+
+        markdown = markdown.strip()
+        try:
+            state = self._convert(markdown, previous_state)
+            return state.output, state
+        except Exception as e:
+            logging.error(f"Markdown conversion error: {str(e)}")
+            return markdown, ConversionState()
+
+    def _config_signature(self, config: Optional[_Configuration] = None) -> tuple:
+        """
+        Describe the configuration that affects conversion output.
+
+        Args:
+            config (Optional[_Configuration]): The plugins and rules to describe.
+                Default is None (the current ones).
+
+        Returns:
+            tuple: A value that compares equal for equivalent configurations.
+        """
+        if config is None:
+            config = self._config
+        plugins = config.plugins
+        return (self.encoding, self.max_table_rows, self.document_mode, self.escape, self.compact,
+                tuple(config.patterns)) + tuple(
+            (name, plugins[name]["func"], plugins[name]["priority"],
+             plugins[name]["scope"], plugins[name]["timing"], plugins[name]["triggers"],
+             getattr(plugins[name]["func"], "version", None))
+            for name in config.plugin_order
+        )
+
+    def _convert(self, markdown: str, previous: Optional[ConversionState] = None,
+                 with_plaintext: bool = False, workers: int = 1,
+                 runner: Optional[_AsyncRunner] = None, with_links: bool = False,
+                 config: Optional[_Configuration] = None) -> ConversionState:
+        """
+        Run the conversion pipeline over stripped Markdown text.
+
+        Args:
+            markdown (str): The stripped Markdown text.
+            previous (Optional[ConversionState]): A state whose output may be reused.
+            with_plaintext (bool): Whether to produce the plain text fallback as well.
+            workers (int): The number of processes to convert the lines with.
+            runner (Optional[_AsyncRunner]): Runs coroutine plugins, or None to run them
+                on a new event loop.
+            with_links (bool): Whether to collect the URLs of links as well.
+            config (Optional[_Configuration]): The plugins and rules to convert with.
+                Default is None (the current ones).
+
+        Returns:
+            ConversionState: The state of this conversion, including its output.
+        """
+        # Plugins registered from now on apply to the next conversion, not this one
+        if config is None:
+            config = self._config
+        plugins = config.plugins
+        state = ConversionState()
+        state.plugins, state.patterns = plugins, config.patterns
+        state.signature = self._config_signature(config)
+        if with_links:
+            state.links = []
+        if with_plaintext:
+            state.plain_lines = []
+            state.table_plaintext = {}
+        if previous is not None and (previous.signature != state.signature
+                                     or (with_plaintext and previous.plain_lines is None)):
+            previous = None
+
+        if runner is None and any(plugin["is_async"] for plugin in plugins.values()):
+            runner = _AsyncRunner(None, 10, None)
+
+        markdown = self._convert_tables(markdown, state, previous)
+
+        # Apply global scope plugins
+        skipped = 0
+        for plugin_name in config.plugin_order:
+            plugin = plugins[plugin_name]
+            if plugin["scope"] == "global":
+                if self._plugin_runs(plugin, markdown):
+                    changed = (runner.map(plugin["func"], [markdown])[0] if plugin["is_async"]
+                               else plugin["func"](markdown))
+                    state.plugins_changed = state.plugins_changed or changed != markdown
+                    markdown = changed
+                else:
+                    skipped += 1
+
+        # Line plugins are skipped when their triggers are neither in the text
+        # nor among the characters the conversion itself can add
+        output_chars = self._output_chars(config)
+        for plugin_name in config.plugin_order:
+            plugin = plugins[plugin_name]
+            if plugin["scope"] in ("line", "lines"):
+                if self._plugin_runs(plugin, markdown) or (plugin["timing"] == "after" and (
+                        output_chars is None or not output_chars.isdisjoint(plugin["triggers"]))):
+                    state.line_plugins.append(plugin_name)
+                else:
+                    skipped += 1
+        if previous is not None and previous.line_plugins != state.line_plugins:
+            previous = None
+
+        lines = markdown.splitlines()
+        # Coroutine plugins are applied to all lines at once, like "lines" plugins
+        batch = any(plugins[name]["scope"] == "lines" or plugins[name]["is_async"]
+                    for name in state.line_plugins)
+        if not (workers > 1 and not batch and previous is None
+                and self._convert_parallel(lines, state, workers)):
+            if (self.document_mode and previous is None) or batch:
+                if not (self.document_mode and self._convert_staged(lines, state, True, runner)):
+                    self._convert_staged(lines, state, False, runner)
+            else:
+                self._convert_lines(lines, state, previous)
+        result = "\n".join(state.converted_lines)
+
+        if state.table_replacements:
+            result = _restore_tables(result, state.table_replacements)
+
+        # Apply block scope plugins
+        for plugin_name in config.plugin_order:
+            plugin = plugins[plugin_name]
+            if plugin["scope"] == "block":
+                if self._plugin_runs(plugin, result):
+                    changed = (runner.map(plugin["func"], [result])[0] if plugin["is_async"]
+                               else plugin["func"](result))
+                    state.plugins_changed = state.plugins_changed or changed != result
+                    result = changed
+                else:
+                    skipped += 1
+        if skipped:
+            self._count("skipped_plugins", skipped)
+        if runner is not None and runner.timeouts:
+            self._count("plugin_timeouts", runner.timeouts)
+            state.plugin_timeouts = runner.timeouts
+            runner.timeouts = 0
+
+        state.output = self._check_encoding(result)
+
+        if with_plaintext:
+            plaintext = "\n".join(line for line in state.plain_lines if line is not None)
+            if state.table_plaintext:
+                plaintext = _restore_tables(plaintext, state.table_plaintext)
+            state.plaintext = plaintext
+        return state
+
+    def _check_encoding(self, text: str) -> str:
+        """
+        Make sure the text can be represented in the converter's encoding.
+
+        Args:
+            text (str): The converted text.
+
+        Returns:
+            str: The text after a round trip through the encoding.
+
+        Raises:
+            UnicodeError: If the text cannot be encoded.
+        """
+        # ASCII text comes back unchanged from a round trip through any text
+        # encoding, and other text from one through a Unicode encoding unless
+        # it contains a lone surrogate, so the two copies it makes are skipped
+        codec = _codec_name(self.encoding)
+        if codec is not None and (text.isascii() or (codec in _UNICODE_ENCODINGS
+                                                     and _SURROGATE.search(text) is None)):
+            return text
+        return text.encode(self.encoding).decode(self.encoding)
+
+    def _convert_parallel(self, lines: List[str], state: ConversionState, workers: int) -> bool:
+        """
+        Convert lines in chunks in a process pool, recording the results in the state.
+
+        The code block state on entry to every line is resolved up front from the
+        code fences, so that each chunk can be converted on its own, and chunks
+        start outside code blocks where possible. A line plugin that adds or
+        removes a code fence makes the resolved state wrong for later chunks;
+        those are converted again here with the actual state, so the result is
+        always that of a serial conversion.
+
+        Args:
+            lines (List[str]): The lines to convert.
+            state (ConversionState): The state to fill in.
+            workers (int): The number of worker processes.
+
+        Returns:
+            bool: False if the lines have to be converted serially instead, in which
+            case the state is left untouched.
+        """
+        chunk_count = min(workers * 4, len(lines) // _PARALLEL_CHUNK_LINES)
+        if chunk_count < 2:
+            return False
+        config = self._config
+        try:
+            converter = pickle.dumps(self)
+        except Exception as e:
+            logging.debug(f"Converting serially, the converter cannot be pickled: {str(e)}")
+            return False
+        # The workers must convert with the plugins and rules this conversion started with
+        if self._config is not config or config.plugins is not state.plugins or config.patterns is not state.patterns:
+            return False
+
+        entry_states = []
+        in_code_block = state.in_code_block
+        for line in lines:
+            entry_states.append(in_code_block)
+            if line.startswith("```") and _CODE_FENCE.match(line):
+                in_code_block = not in_code_block
+
+        starts = [0]
+        for number in range(1, chunk_count):
+            target = max(number * len(lines) // chunk_count, starts[-1] + 1)
+            limit = (number + 1) * len(lines) // chunk_count
+            starts.append(next((index for index in range(target, limit) if not entry_states[index]), target))
+        chunks = list(zip(starts, starts[1:] + [len(lines)]))
+
+        with_plaintext = state.plain_lines is not None
+        with_links = state.links is not None
+        pool = _process_pool(workers)
+        try:
+            futures = [pool.submit(_convert_in_worker, converter, lines[start:end], entry_states[start],
+                                   state.line_plugins, with_plaintext, with_links) for start, end in chunks]
+            results = [future.result() for future in futures]
+        except Exception as e:
+            # A plugin that fails in a worker fails the same way in the serial conversion
+            logging.warning(f"Converting serially, parallel conversion failed: {str(e)}")
+            if isinstance(e, BrokenExecutor):
+                _discard_process_pool(workers, pool)
+            return False
+
+        in_code_block = state.in_code_block
+        for (start, end), chunk in zip(chunks, results):
+            if entry_states[start] != in_code_block:
+                chunk = self._convert_chunk(lines[start:end], in_code_block, state.line_plugins, with_plaintext,
+                                            with_links, state)
+            state.line_states.extend(chunk.line_states)
+            state.converted_lines.extend(chunk.converted_lines)
+            if with_plaintext:
+                state.plain_lines.extend(chunk.plain_lines)
+            if with_links:
+                state.links.extend(chunk.links)
+            state.code_blocks += chunk.code_blocks
+            state.plugins_changed = state.plugins_changed or chunk.plugins_changed
+            in_code_block = chunk.in_code_block
+        state.lines = lines
+        state.in_code_block = in_code_block
+        self._count("parallel_chunks", len(chunks))
+        return True
+
+    def _convert_chunk(self, lines: List[str], in_code_block: bool, line_plugins: List[str],
+                       with_plaintext: bool, with_links: bool = False,
+                       parent: Optional[ConversionState] = None) -> ConversionState:
+        """
+        Convert a chunk of a document's lines as a serial conversion would.
+
+        Args:
+            lines (List[str]): The lines of the chunk.
+            in_code_block (bool): The code block state on entry to the chunk.
+            line_plugins (List[str]): The line plugins to apply, in execution order.
+            with_plaintext (bool): Whether to produce the plain text as well.
+            with_links (bool): Whether to collect the URLs of links.
+            parent (Optional[ConversionState]): The state of the document's conversion,
+                whose plugins and rules the chunk is converted with. Default is None
+                (the converter's current ones, as in a worker process).
+
+        Returns:
+            ConversionState: The state of the chunk's conversion.
+        """
+        source = self._config if parent is None else parent
+        state = ConversionState()
+        state.plugins, state.patterns = source.plugins, source.patterns
+        state.in_code_block = in_code_block
+        state.line_plugins = line_plugins
+        if with_plaintext:
+            state.plain_lines = []
+        if with_links:
+            state.links = []
+        if self.document_mode:
+            if not self._convert_staged(lines, state, segments=True):
+                self._convert_staged(lines, state, segments=False)
+        else:
+            self._convert_lines(lines, state)
+        # Not sent back from worker processes
+        state.plugins = state.patterns = None
+        return state
+
+    def _convert_lines(self, lines: List[str], state: ConversionState,
+                       previous: Optional[ConversionState] = None) -> None:
+        """
+        Convert lines one by one, recording the results in the state.
+
+        The lines are diffed against those of the previous state, and every run of
+        unchanged lines is reused from the first line entered with the same code
+        block state as before.
+
+        Args:
+            lines (List[str]): The lines to convert.
+            state (ConversionState): The state to fill in.
+            previous (Optional[ConversionState]): A state whose lines may be reused.
+        """
+        # Get line-scope plugins for before/after timing in ascending priority order
+        plugins = state.plugins
+        before_line_plugins = [plugins[name]["func"] for name in state.line_plugins
+                               if plugins[name].get("timing", "after") == "before"]
+        after_line_plugins = [plugins[name]["func"] for name in state.line_plugins
+                              if plugins[name].get("timing", "after") == "after"]
+
+        plain_lines = state.plain_lines
+
+        def convert_one(line):
+            entry_state = state.in_code_block
+            state.line_states.append(entry_state)
+            # Skip conversion for table placeholders
+            if line.startswith("%%TABLE_PLACEHOLDER_") and line.endswith("%%"):
+                state.converted_lines.append(line)
+                if plain_lines is not None:
+                    plain_lines.append(line)
+                return
+
+            # Apply before line scope plugins
+            for func in before_line_plugins:
+                changed = func(line)
+                state.plugins_changed = state.plugins_changed or changed != line
+                line = changed
+
+            # Apply standard line conversion
+            line = self._convert_line(line, state)
+
+            # Apply after line scope plugins
+            for func in after_line_plugins:
+                changed = func(line)
+                state.plugins_changed = state.plugins_changed or changed != line
+                line = changed
+
+            state.converted_lines.append(line)
+            if plain_lines is not None:
+                if state.in_code_block != entry_state:
+                    # Code fences have no plain text
+                    plain_lines.append(None)
+                elif entry_state:
+                    plain_lines.append(line)
+                else:
+                    if line.startswith("> "):
+                        line = line[2:]
+                    plain_lines.append(_PLAINTEXT_MARKUP.sub(_strip_markup, line))
+
+        def reuse(old_start, old_end):
+            state.line_states.extend(previous.line_states[old_start:old_end])
+            state.converted_lines.extend(previous.converted_lines[old_start:old_end])
+            if plain_lines is not None:
+                plain_lines.extend(previous.plain_lines[old_start:old_end])
+            state.in_code_block = (previous.line_states[old_end] if old_end < len(old_lines)
+                                   else previous.in_code_block)
+            state.reused_lines += old_end - old_start
+
+        state.lines = lines
+        old_lines = previous.lines if previous is not None else []
+        if not old_lines:
+            for line in lines:
+                convert_one(line)
+            return
+
+        # The common prefix and suffix are trimmed before diffing, since the matcher
+        # ignores lines that are too frequent, such as blank lines, when it looks for
+        # matches and would otherwise split an unchanged document into pieces
+        limit = min(len(lines), len(old_lines))
+        prefix = 0
+        while prefix < limit and lines[prefix] == old_lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and lines[-1 - suffix] == old_lines[-1 - suffix]:
+            suffix += 1
+        opcodes = [("equal", 0, prefix, 0, prefix)]
+        matcher = difflib.SequenceMatcher(None, old_lines[prefix:len(old_lines) - suffix],
+                                          lines[prefix:len(lines) - suffix])
+        for tag, old_start, old_end, start, end in matcher.get_opcodes():
+            opcodes.append((tag, prefix + old_start, prefix + old_end, prefix + start, prefix + end))
+        opcodes.append(("equal", len(old_lines) - suffix, len(old_lines), len(lines) - suffix, len(lines)))
+
+        for tag, old_start, old_end, start, end in opcodes:
+            # Frequent lines the matcher skipped come back as identical replacements
+            if tag != "equal" and old_lines[old_start:old_end] != lines[start:end]:
+                for line in lines[start:end]:
+                    convert_one(line)
+                continue
+            # An unchanged run is converted until the code block state catches up
+            # with the one its old lines were entered with, and reused from there
+            while start < end and previous.line_states[old_start] != state.in_code_block:
+                convert_one(lines[start])
+                start += 1
+                old_start += 1
+            if start < end:
+                reuse(old_start, old_end)
+
+    def _convert_staged(self, lines: List[str], state: ConversionState, segments: bool,
+                        runner: Optional[_AsyncRunner] = None) -> bool:
+        """
+        Convert lines stage by stage, recording the results in the state.
+
+        Each line plugin is applied to the whole document in turn, then the
+        conversion rules, then the after plugins. This is what lets "lines" scope
+        plugins see every line at once. With ``segments`` the lines are also split
+        at table placeholders and code fences, each conversion rule runs once over
+        every run of prose lines, and regex plugins whose patterns cannot cross a
+        line boundary run once over every run of lines between tables. The results
+        are the same as with ``_convert_lines``.
+
+        Args:
+            lines (List[str]): The lines to convert.
+            state (ConversionState): The state to fill in.
+            segments (bool): Whether to apply rules and regex plugins to runs of lines.
+            runner (Optional[_AsyncRunner]): Runs the coroutine plugins.
+
+        Returns:
+            bool: False if the document has to be converted without segments instead,
+            in which case the state is left untouched.
+        """
+        if segments:
+            patterns = [_line_local(pattern) for pattern, _ in state.patterns]
+            if None in patterns:
+                return False
+            rules = list(zip(patterns, (replacement for _, replacement in state.patterns)))
+
+        placeholders = [index for index, line in enumerate(lines)
+                        if line.startswith("%%TABLE_PLACEHOLDER_") and line.endswith("%%")]
+        runs = []
+        run_start = 0
+        for index in placeholders + [len(lines)]:
+            if index > run_start:
+                runs.append((run_start, index))
+            run_start = index + 1
+
+        try:
+            lines = self._apply_line_plugins(list(lines), runs, "before", None, segments, state, runner)
+        except _NotLineLocal:
+            return False
+
+        # Convert each run, noting which lines are prose and which are fences
+        in_code_block = state.in_code_block
+        code_blocks = 0
+        links: Optional[List[str]] = [] if state.links is not None else None
+        line_states: List[bool] = []
+        prose: List[Tuple[int, int]] = []
+        fences: List[int] = []
+        converted = list(lines)
+        placeholder_iter = iter(placeholders + [len(lines)])
+        next_placeholder = next(placeholder_iter)
+        for index, line in enumerate(lines):
+            if index == next_placeholder:
+                line_states.append(in_code_block)
+                next_placeholder = next(placeholder_iter)
+                continue
+            line_states.append(in_code_block)
+            fence = _CODE_FENCE.match(line) if line.startswith("```") else None
+            if fence:
+                in_code_block = not in_code_block
+                code_blocks += in_code_block
+                fences.append(index)
+                converted[index] = f"```{fence.group(1)}" if in_code_block and fence.group(1) else "```"
+            elif not in_code_block:
+                if prose and prose[-1][1] == index:
+                    prose[-1] = (prose[-1][0], index + 1)
+                else:
+                    prose.append((index, index + 1))
+            elif self.compact:
+                converted[index] = line.rstrip()
+
+        if segments:
+            for start, end in prose:
+                converted[start:end] = self._convert_prose("\n".join(converted[start:end]), rules,
+                                                           links).split("\n")
+        else:
+            prose_state = ConversionState()
+            prose_state.links, prose_state.patterns = links, state.patterns
+            for start, end in prose:
+                for index in range(start, end):
+                    converted[index] = self._convert_line(converted[index], prose_state)
+
+        try:
+            converted = self._apply_line_plugins(converted, runs, "after", prose, segments, state, runner)
+        except _NotLineLocal:
+            return False
+
+        state.lines = lines
+        state.line_states = line_states
+        state.converted_lines = converted
+        state.in_code_block = in_code_block
+        state.code_blocks += code_blocks
+        if links is not None:
+            state.links.extend(links)
+        if state.plain_lines is not None:
+            plain: List[Optional[str]] = list(converted)
+            for start, end in prose:
+                for index in range(start, end):
+                    line = plain[index]
+                    if line.startswith("> "):
+                        line = line[2:]
+                    plain[index] = _PLAINTEXT_MARKUP.sub(_strip_markup, line)
+            for index in fences:
+                plain[index] = None
+            state.plain_lines = plain
+        return True
+
+    def _apply_line_plugins(self, lines: List[str], runs: List[Tuple[int, int]], timing: str,
+                            prose: Optional[List[Tuple[int, int]]], segments: bool,
+                            state: ConversionState, runner: Optional[_AsyncRunner] = None) -> List[str]:
+        """
+        Apply the line and lines scope plugins of one timing to a whole document.
+
+        Args:
+            lines (List[str]): All lines of the document; modified in place
+            runs (List[Tuple[int, int]]): Index ranges of the lines between table placeholders
+            timing (str): "before" or "after"
+            prose (Optional[List[Tuple[int, int]]]): Index ranges of the lines outside code
+                blocks, or None to find them from the code fences in the lines
+            segments (bool): Whether to apply regex plugins to whole runs at once
+            state (ConversionState): Holds the line and lines scope plugins to run, in order,
+                and records whether they changed any line
+            runner (Optional[_AsyncRunner]): Runs the coroutine plugins
+
+        Returns:
+            List[str]: The transformed lines
+        """
+        changed = False
+        for name in state.line_plugins:
+            plugin = state.plugins[name]
+            if plugin["timing"] != timing:
+                continue
+            func = plugin["func"]
+            if plugin["scope"] == "lines":
+                indices = self._prose_indices(lines, runs) if prose is None else [
+                    index for start, end in prose for index in range(start, end)]
+                pairs = [(index, lines[index]) for index in indices]
+                if plugin["is_async"]:
+                    results = runner.map(func, [pairs], [[line for _, line in pairs]])[0]
+                else:
+                    results = func(pairs)
+                if len(results) != len(indices):
+                    raise ValueError(f"Plugin '{name}' returned {len(results)} lines for {len(indices)}")
+                for index, line in zip(indices, results):
+                    changed = changed or line != lines[index]
+                    lines[index] = line
+                if segments and any("\n" in line for line in results):
+                    raise _NotLineLocal()
+                continue
+            if plugin["is_async"]:
+                indices = [index for start, end in runs for index in range(start, end)]
+                results = runner.map(func, [lines[index] for index in indices])
+                for index, line in zip(indices, results):
+                    changed = changed or line != lines[index]
+                    lines[index] = line
+                if segments and any("\n" in line for line in results):
+                    raise _NotLineLocal()
+                continue
+            pattern = func.hoisted() if segments and isinstance(func, _RegexPlugin) else None
+            for start, end in runs:
+                if pattern is not None:
+                    text = "\n".join(lines[start:end])
+                    replaced = pattern.sub(func.replacement, text)
+                    changed = changed or replaced != text
+                    lines[start:end] = replaced.split("\n")
+                else:
+                    for index in range(start, end):
+                        line = func(lines[index])
+                        changed = changed or line != lines[index]
+                        lines[index] = line
+                    if segments and any("\n" in line for line in lines[start:end]):
+                        raise _NotLineLocal()
+        state.plugins_changed = state.plugins_changed or changed
+        return lines
+
+    def _prose_indices(self, lines: List[str], runs: List[Tuple[int, int]]) -> List[int]:
+        """
+        Find the lines that are neither code fences, code nor table placeholders.
+
+        Args:
+            lines (List[str]): All lines of the document
+            runs (List[Tuple[int, int]]): Index ranges of the lines between table placeholders
+
+        Returns:
+            List[int]: The indices of the prose lines, in order
+        """
+        indices = []
+        in_code_block = False
+        for start, end in runs:
+            for index in range(start, end):
+                line = lines[index]
+                if line.startswith("```") and _CODE_FENCE.match(line):
+                    in_code_block = not in_code_block
+                elif not in_code_block:
+                    indices.append(index)
+        return indices
+
+    def _convert_prose(self, text: str, rules: List[Tuple["re.Pattern", str]],
+                       links: Optional[List[str]] = None) -> str:
+        """
+        Apply the conversion rules to a run of lines outside code blocks.
+
+        Args:
+            text (str): Lines of Markdown joined with newlines.
+            rules (List[Tuple[re.Pattern, str]]): Line-local versions of ``state.patterns``.
+            links (Optional[List[str]]): Receives the URLs of links, images and bare URLs.
+
+        Returns:
+            str: The converted lines, joined with newlines.
+        """
+        return _TRAILING_WHITESPACE.sub("", self._apply_rules(text, rules, links))
+
+    def _apply_rules(self, text: str, rules: List[Tuple["re.Pattern", str]],
+                     links: Optional[List[str]] = None) -> str:
+        """
+        Apply conversion rules to text outside code blocks.
+
+        Inline code, link and image URLs and bare URLs are masked first, so the
+        rules neither rewrite them nor scan them again.
+
+        Args:
+            text (str): One or more lines of Markdown.
+            rules (List[Tuple[re.Pattern, str]]): The conversion rules.
+            links (Optional[List[str]]): Receives the URLs of links, images and bare URLs,
+                in order, as their masks are removed.
+
+        Returns:
+            str: The converted text, with trailing whitespace left in place.
+        """
+        spans: List[str] = []
+        urls: Optional[set] = set() if links is not None else None
+        masked = _MASK_START not in text and _MASK_END not in text and (
+            "`" in text or "](" in text or "://" in text)
+        if masked:
+            text = self._mask_spans(text, spans, urls)
+        elif links is not None and ("](" in text or "://" in text):
+            # Text that cannot be masked is converted without masks; find its URLs directly
+            links.extend(match.group(2) for match in _LINK.regex.finditer(text))
+            links.extend(match.group() for match in _BARE_URL.finditer(text))
+        if self.escape:
+            text = _SLACK_CONTROL.sub(_escape_control, text)
+        for pattern, replacement in rules:
+            text = pattern.sub(replacement, text)
+        if masked:
+            if urls:
+                def unmask(match: "re.Match") -> str:
+                    index = int(match.group(1))
+                    if index in urls:
+                        links.append(spans[index])
+                    return spans[index]
+                text = _MASK_TOKEN.sub(unmask, text)
+            else:
+                text = _MASK_TOKEN.sub(lambda m: spans[int(m.group(1))], text)
+        return text
+
+    def _mask_spans(self, text: str, spans: List[str], urls: Optional[set] = None) -> str:
+        """
+        Replace inline code, link and image URLs and bare URLs with tokens.
+
+        Link labels are left unmasked so that they are still converted.
+
+        Args:
+            text (str): The text to mask
+            spans (List[str]): Receives the final text of each masked span
+            urls (Optional[set]): Receives the indices of the spans that are URLs
+
+        Returns:
+            str: The text with each span replaced by its token
+        """
+        def unmask(value: str) -> str:
+            return _MASK_TOKEN.sub(lambda m: spans[int(m.group(1))], value)
+
+        def protect(value: str, url: bool = False) -> str:
+            spans.append(unmask(value))
+            if url and urls is not None:
+                urls.add(len(spans) - 1)
+            return f"{_MASK_START}{len(spans) - 1}{_MASK_END}"
+
+        if "`" in text:
+            text = _INLINE_CODE.sub(lambda m: protect(m.group()), text)
+        if "](" in text:
+            text = _LINK.sub(lambda m: f"{m.group(1)}{protect(m.group(2), True)})", text)
+        if "://" in text:
+            text = _BARE_URL.sub(lambda m: protect(m.group(), True), text)
+        return text
+
+    def _convert_tables(self, markdown: str, state: Optional[ConversionState] = None,
+                        previous: Optional[ConversionState] = None) -> str:
         """
         Convert Markdown tables to Slack's mrkdwn format.
         Tables inside code blocks are preserved as-is.
 
         Args:
             markdown (str): The Markdown text containing tables.
+            state (Optional[ConversionState]): The state to record rendered tables in.
+            previous (Optional[ConversionState]): A state whose rendered tables may be reused.
 
         Returns:
             str: The text with tables converted to Slack's format.
         """
+        if state is None:
+            state = ConversionState()
+        # A table needs at least one line starting with a pipe
+        if not (markdown.startswith("|") or "\n|" in markdown):
+            self._count("skipped_tables")
+            return markdown
         table_pattern = re.compile(
             r"^\|(.+)\|\s*$\n^\|[-:| ]+\|\s*$(\n^\|.+\|\s*$)*", re.MULTILINE
         )
 
+        # Code fences are counted from where the previous table started, so the
+        # text before each table is only scanned once
+        scan = {"position": 0, "in_code_block": False}
+
         def convert_table(match):
             original_table = match.group(0)
             match_start = match.start()
             
             # Check if this table is inside a code block
-            text_before = markdown[:match_start]
-            in_code_block = False
-            lines_before = text_before.split('\n')
-            for line in lines_before:
-                stripped = line.strip()
-                if stripped.startswith('```'):
-                    # Check if it's a code block delimiter (not inline code)
-                    if re.match(r'^```\s*$', stripped) or re.match(r'^```\w+\s*$', stripped):
-                        in_code_block = not in_code_block
+            text_before = markdown[scan["position"]:match_start]
+            in_code_block = scan["in_code_block"]
+            if "```" in text_before:
+                for line in text_before.split('\n'):
+                    stripped = line.strip()
+                    if stripped.startswith('```'):
+                        # Check if it's a code block delimiter (not inline code)
+                        if re.match(r'^```\s*$', stripped) or re.match(r'^```\w+\s*$', stripped):
+                            in_code_block = not in_code_block
+            scan["position"] = match_start
+            scan["in_code_block"] = in_code_block
             
             # If inside code block, return original table unchanged
             if in_code_block:
                 return original_table
 
-            table_lines = original_table.strip().split("\n")
-            header_line = table_lines[0]
-            separator_line = table_lines[1]
-            data_lines = table_lines[2:] if len(table_lines) > 2 else []
+            state.tables += 1
+            placeholder = f"%%TABLE_PLACEHOLDER_{hash(original_table)}%%"
+            if previous is not None and placeholder in previous.table_replacements:
+                state.table_replacements[placeholder] = previous.table_replacements[placeholder]
+                if state.table_plaintext is not None:
+                    state.table_plaintext[placeholder] = previous.table_plaintext[placeholder]
+                return placeholder
 
-            headers = [cell.strip() for cell in header_line.strip("|").split("|")]
+            rendered, plain = self._render_table(original_table, state.table_plaintext is not None)
+            state.table_replacements[placeholder] = rendered
+            if state.table_plaintext is not None:
+                state.table_plaintext[placeholder] = plain
+            return placeholder
 
-            rows = []
-            for line in data_lines:
-                cells = [cell.strip() for cell in line.strip("|").split("|")]
-                rows.append(cells)
+        return table_pattern.sub(convert_table, markdown)
 
-            result = []
-            result.append(" | ".join(f"*{header}*" for header in headers))
+    def _render_table(self, table: str, with_plaintext: bool = False) -> Tuple[str, Optional[str]]:
+        """
+        Render a Markdown table row by row into a single buffer.
 
-            for row in rows:
-                result.append(" | ".join(row))
+        Data rows are written as they are read, without building per-cell lists,
+        and rows beyond ``max_table_rows`` are only counted.
 
-            placeholder = f"%%TABLE_PLACEHOLDER_{hash(original_table)}%%"
-            self.table_replacements[placeholder] = "\n".join(result)
-            return placeholder
+        Args:
+            table (str): The Markdown table, including the header and separator lines.
+            with_plaintext (bool): Whether to render the plain text version as well.
 
-        return table_pattern.sub(convert_table, markdown)
+        Returns:
+            Tuple[str, Optional[str]]: The table in Slack's format, and its plain text
+            when requested. The plain text differs only in the header line.
+        """
+        table = table.strip()
+        if self.escape:
+            table = _SLACK_CONTROL.sub(_escape_control, table)
+        buffer = io.StringIO()
+        end = table.find("\n")
+        header = table if end == -1 else table[:end]
+        header_cells = [cell.strip() for cell in header.strip("|").split("|")]
+        header_line = " | ".join(f"*{cell}*" for cell in header_cells)
+        buffer.write(header_line)
 
-    def _convert_line(self, line: str) -> str:
+        # Skip the separator line; the data rows follow it
+        start = table.find("\n", end + 1) + 1 if end != -1 else 0
+        written = 0
+        while start:
+            end = table.find("\n", start)
+            if self.max_table_rows is not None and written >= self.max_table_rows:
+                hidden = table.count("\n", start) + 1
+                buffer.write(f"\n…{hidden} more row{'s' if hidden != 1 else ''}")
+                break
+            line = table[start:] if end == -1 else table[start:end]
+            buffer.write("\n")
+            buffer.write(_TABLE_CELL_SEPARATOR.sub(" | ", line.strip("|").strip()))
+            written += 1
+            start = end + 1
+        rendered = buffer.getvalue()
+        if not with_plaintext:
+            return rendered, None
+        return rendered, " | ".join(header_cells) + rendered[len(header_line):]
+
+    def _convert_line(self, line: str, state: Optional[ConversionState] = None) -> str:
         """
         Convert a single line of Markdown.
 
         Args:
             line (str): A single line of Markdown text.
+            state (Optional[ConversionState]): The conversion state tracking code blocks.
 
         Returns:
             str: The converted line in Slack's mrkdwn format.
@@ -253,36 +2214,26 @@ class SlackMarkdownConverter:
         if line.startswith("%%TABLE_PLACEHOLDER_") and line.endswith("%%"):
             return line
 
-        code_block_match = re.match(r"^```(\w*)\s*$", line)
+        if state is None:
+            state = ConversionState()
+
+        code_block_match = _CODE_FENCE.match(line)
         if code_block_match:
             language = code_block_match.group(1)
-            self.in_code_block = not self.in_code_block
-            if self.in_code_block and language:
+            state.in_code_block = not state.in_code_block
+            state.code_blocks += state.in_code_block
+            if state.in_code_block and language:
                 return f"```{language}"
             return "```"
 
-        if self.in_code_block:
-            return line
-
-        line = re.sub(
-            r"(?<!\*)\*\*\*([^*\n]+?)\*\*\*(?!\*)",
-            lambda m: f"{self.triple_start}{m.group(1)}{self.triple_end}",
-            line,
-        )
+        if state.in_code_block:
+            return line.rstrip() if self.compact else line
 
-        for pattern, replacement in self.patterns:
-            line = pattern.sub(replacement, line)
+        patterns = self._config.patterns if state.patterns is None else state.patterns
+        return self._apply_rules(line, patterns, state.links).rstrip()
 
-        line = re.sub(
-            re.escape(self.triple_start) + r"(.*?)" + re.escape(self.triple_end),
-            r"*_\1_*",
-            line,
-            flags=re.MULTILINE,
-        )
-
-        return line.rstrip()
-
-    def register_regex_plugin(self, name: str, pattern: str, replacement: str, priority: int = 50, timing: str = "after") -> None:
+    def register_regex_plugin(self, name: str, pattern: str, replacement: str, priority: int = 50, timing: str = "after",
+                              triggers: Optional[str] = None) -> None:
         """
         Register a line-scope plugin using only regex pattern and replacement.
         Args:
@@ -291,8 +2242,120 @@ class SlackMarkdownConverter:
             replacement (str): Replacement string
             priority (int): Execution priority (lower numbers execute first)
             timing (str): When to apply the plugin - "before" or "after" (default: "after")
+            triggers (Optional[str]): Characters any match must contain; documents without them skip the plugin
+        """
+        self.register_plugin(name, _RegexPlugin(compile_pattern(self.regex_backend, pattern), replacement),
+                             priority=priority, scope="line", timing=timing, triggers=triggers)
+
+    def register_dictionary_plugin(self, name: str, terms: Dict[str, str], priority: int = 50,
+                                   timing: str = "after", whole_words: bool = True) -> TermLinker:
+        """
+        Register a plugin that replaces known terms, such as user handles or project keys.
+
+        All terms are matched by a single automaton in one pass per line. Code blocks,
+        tables, inline code, links and URLs are left untouched.
+
+        Args:
+            name (str): Unique name for the plugin
+            terms (Dict[str, str]): A mapping of terms to their replacements
+            priority (int): Execution priority (lower numbers execute first)
+            timing (str): When to apply the plugin - "before" or "after" (default: "after")
+            whole_words (bool): Only replace terms that are not part of a longer word (default: True)
+
+        Returns:
+            TermLinker: The automaton as registered. ``update_dictionary_plugin`` replaces it
+            with an updated copy; its own ``add`` and ``remove`` methods change it for every
+            converter it is registered with
+        """
+        linker = TermLinker(terms, whole_words=whole_words)
+        self.register_plugin(name, linker, priority=priority, scope="lines", timing=timing)
+        return linker
+
+    def update_dictionary_plugin(self, name: str, add: Optional[Dict[str, str]] = None,
+                                 remove: Optional[List[str]] = None) -> None:
+        """
+        Add, change or remove terms of a dictionary plugin without rebuilding it.
+
+        The changes are made on a copy of the plugin's automaton, which is published
+        with the other plugins, so conversions in progress finish with the dictionary
+        they started with. New terms relink the whole automaton; see ``TermLinker``.
+
+        Args:
+            name (str): The name of the dictionary plugin
+            add (Optional[Dict[str, str]]): Terms to add or whose replacement changes
+            remove (Optional[List[str]]): Terms to remove
+
+        Raises:
+            ValueError: If the plugin is not a dictionary plugin
+        """
+        with self._config_lock:
+            plugins = self._config.plugins
+            linker = plugins[name]["func"] if name in plugins else None
+            if not isinstance(linker, TermLinker):
+                raise ValueError(f"'{name}' is not a dictionary plugin")
+            linker = linker.copy()
+            if remove:
+                linker.remove(remove)
+            if add:
+                linker.add(add)
+            self._config = self._config.with_plugins(dict(plugins, **{name: dict(plugins[name], func=linker)}))
+
+    def add_rule(self, name: str, pattern: str, replacement: Union[str, Callable[["re.Match"], str]],
+                 flags: int = re.MULTILINE, after: Union[str, List[str]] = (),
+                 before: Union[str, List[str]] = ()) -> None:
+        """
+        Add a conversion rule and recompile the execution plan.
+
+        Unlike a regex plugin, a rule runs together with the built-in rules: inline
+        code and URLs are masked from it, and it can be placed between built-in rules
+        by name (see ``explain``). A rule without constraints runs after the built-in
+        rules.
+
+        Args:
+            name (str): A unique name for the rule
+            pattern (str): Regex pattern to search for; it is applied to single lines
+            replacement (Union[str, Callable[[re.Match], str]]): Replacement string or function
+            flags (int): Regex flags (default: re.MULTILINE)
+            after (Union[str, List[str]]): Names of rules that have to run before this one
+            before (Union[str, List[str]]): Names of rules that have to run after this one
+
+        Raises:
+            ValueError: If the name is taken, a constraint names an unknown rule or the
+                constraints contradict each other
+        """
+        with self._config_lock:
+            config = self._config
+            rules = config.rules + [Rule(name, pattern, replacement, flags, after, before)]
+            plan = compile_rules(rules)
+            patterns = _build_patterns(plan, self.regex_backend)
+            self._config = _Configuration(config.plugins, config.plugin_order, rules, plan, patterns)
+
+    def explain(self) -> str:
+        """
+        Describe how the conversion rules are executed.
+
+        The rules are ordered by their constraints, rules that never change the text
+        are dropped and rules that differ only in a literal prefix, such as the
+        headings, run as one step.
+
+        With a regex backend other than ``re``, the rules and regex plugins whose
+        patterns the backend cannot compile, and which run with ``re``, are listed too.
+
+        Returns:
+            str: One line per step of the execution plan, followed by the dropped rules
         """
-        compiled = re.compile(pattern)
-        def regex_func(line: str) -> str:
-            return compiled.sub(replacement, line)
-        self.register_plugin(name, regex_func, priority=priority, scope="line", timing=timing)
+        config = self._config
+        explanation = config.plan.explain()
+        if type(self.regex_backend) is RegexBackend:
+            return explanation
+        fallbacks = []
+        for step, (pattern, _) in zip(config.plan.steps, config.patterns):
+            if isinstance(pattern, (_GuardedPattern, _PrefilteredPattern)):
+                pattern = pattern.regex
+            if not isinstance(pattern, BackendPattern):
+                fallbacks.append(" + ".join(step.names))
+        fallbacks.extend(f"plugin {name}" for name in config.plugin_order
+                         if isinstance(config.plugins[name]["func"], _RegexPlugin)
+                         and not isinstance(config.plugins[name]["func"].pattern, BackendPattern))
+        return (f"{explanation}\nregex backend: {self.regex_backend!r}\n"
+                f"compiled with re instead: {', '.join(fallbacks) or 'none'}")
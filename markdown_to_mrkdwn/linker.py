@@ -0,0 +1,330 @@
+"""
+Dictionary-driven replacement of known terms using an Aho–Corasick automaton.
+
+A ``TermLinker`` turns a mapping of terms to replacements, such as user
+handles to Slack mentions or project keys to links, into a single automaton.
+Every line is scanned once no matter how many terms are registered, which
+scales far better than one regex plugin per term or a large alternation.
+
+Register one with ``SlackMarkdownConverter.register_dictionary_plugin``.
+"""
+
+import re
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Spans left untouched: inline code, Slack links, Markdown links and bare URLs
+_PROTECTED = re.compile(r"`[^`]*`|<[^<>\n]*>|!?\[[^\]\n]*\]\([^)\n]*\)|\b(?:https?|ftp)://\S+")
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _link(goto: List[Dict[str, int]], term: List[Optional[str]]) -> Tuple[List[int], List[int]]:
+    """
+    Compute the failure and output links of a trie breadth first.
+
+    Args:
+        goto (List[Dict[str, int]]): The transitions of each node
+        term (List[Optional[str]]): The term each node ends, if any
+
+    Returns:
+        Tuple[List[int], List[int]]: The failure link of each node, and the nearest node
+        on its failure chain that ends a term, or -1
+    """
+    fail = [0] * len(goto)
+    output = [-1] * len(goto)
+    queue = list(goto[0].values())
+    for node in queue:
+        for char, following in goto[node].items():
+            state = fail[node]
+            while char not in goto[state] and state:
+                state = fail[state]
+            target = goto[state].get(char, 0)
+            fail[following] = target
+            output[following] = target if term[target] is not None else output[target]
+            queue.append(following)
+    return fail, output
+
+
+class _Automaton:
+    """
+    One version of a dictionary: its trie, links and replacements.
+
+    Nothing in an automaton is changed after it is published, so a scan reads
+    the linker's automaton once and uses it throughout without any lock.
+
+    Attributes:
+        goto (List[Dict[str, int]]): The transitions of each node.
+        fail (List[int]): The failure link of each node.
+        term (List[Optional[str]]): The term each node ends; None for removed terms.
+        output (List[int]): The nearest node on the failure chain that ended a term
+            when the automaton was linked, or -1.
+        replacements (Dict[str, str]): The terms and their replacements.
+        version (int): Incremented on every change to the dictionary.
+    """
+
+    __slots__ = ("goto", "fail", "term", "output", "replacements", "version", "digest")
+
+    def __init__(self, goto: List[Dict[str, int]], fail: List[int], term: List[Optional[str]],
+                 output: List[int], replacements: Dict[str, str], version: int):
+        self.goto = goto
+        self.fail = fail
+        self.term = term
+        self.output = output
+        self.replacements = replacements
+        self.version = version
+        # Computed on first use; threads racing on it compute the same value
+        self.digest: Optional[str] = None
+
+
+_EMPTY = _Automaton([{}], [0], [None], [-1], {}, 0)
+
+
+class TermLinker:
+    """
+    Replace every occurrence of known terms in a single pass per line.
+
+    Changes never touch the automaton that lines are being scanned with: ``add``
+    and ``remove`` build a new one, sharing what they did not change, and publish
+    it in one assignment. Scans take no lock, and a call with a list of lines
+    uses the same version of the dictionary for all of them.
+
+    Changing a replacement or removing a term copies the per-node term list at
+    most. Adding new terms also copies the transitions of the nodes they extend,
+    and recomputes the failure links of the whole trie, in time proportional to
+    its size; add many terms in one call rather than one call per term.
+
+    Matches are chosen leftmost-longest and never overlap. With ``whole_words``
+    a term that starts or ends with a word character only matches where it is
+    not part of a longer word, like ``\\b`` in a regular expression.
+
+    Instances are callable with a list of ``(index, line)`` pairs and return
+    the replaced lines, so they can be registered as "lines" scope plugins.
+
+    Attributes:
+        whole_words (bool): Whether terms must not be part of a longer word.
+        version (int): Incremented on every change to the dictionary.
+    """
+
+    def __init__(self, terms: Optional[Dict[str, str]] = None, whole_words: bool = True):
+        """
+        Build the automaton for the given terms.
+
+        Args:
+            terms (Optional[Dict[str, str]]): A mapping of terms to their replacements
+            whole_words (bool): Only replace terms that are not part of a longer word. Default is True.
+        """
+        self.whole_words = whole_words
+        # Held by threads changing the dictionary, never by scans
+        self._lock = threading.Lock()
+        self._automaton = _EMPTY
+        if terms:
+            self.add(terms)
+
+    def __getstate__(self) -> Dict[str, object]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, object]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._automaton.replacements)
+
+    @property
+    def version(self) -> int:
+        return self._automaton.version
+
+    def copy(self) -> "TermLinker":
+        """
+        Copy the linker, so that the copy can be changed independently.
+
+        The copy shares the current automaton, which neither linker changes.
+
+        Returns:
+            TermLinker: The copy, with the same terms, links and version
+        """
+        copy = TermLinker(whole_words=self.whole_words)
+        copy._automaton = self._automaton
+        return copy
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._automaton.replacements
+
+    def add(self, terms: Dict[str, str]) -> None:
+        """
+        Add terms, or change the replacement of existing ones.
+
+        Args:
+            terms (Dict[str, str]): A mapping of terms to their replacements
+
+        Raises:
+            ValueError: If a term is empty or contains a newline
+        """
+        for term in terms:
+            if not term or "\n" in term:
+                raise ValueError("Terms must be non-empty and fit on one line")
+        with self._lock:
+            automaton = self._automaton
+            goto, term_of = automaton.goto, automaton.term
+            replacements = dict(automaton.replacements)
+            # Nodes whose transitions were copied, so that they can be extended
+            copied = set()
+            relink = False
+            for term, replacement in terms.items():
+                if term not in replacements:
+                    if not relink:
+                        goto, term_of = list(goto), list(term_of)
+                        relink = True
+                    node = 0
+                    for char in term:
+                        following = goto[node].get(char)
+                        if following is None:
+                            if node not in copied:
+                                goto[node] = dict(goto[node])
+                                copied.add(node)
+                            following = len(goto)
+                            goto[node][char] = following
+                            goto.append({})
+                            term_of.append(None)
+                            copied.add(following)
+                        node = following
+                    # Even a term ending on an existing node changes the output links
+                    term_of[node] = term
+                replacements[term] = replacement
+            fail, output = _link(goto, term_of) if relink else (automaton.fail, automaton.output)
+            self._automaton = _Automaton(goto, fail, term_of, output, replacements, automaton.version + 1)
+
+    def remove(self, terms: Iterable[str]) -> int:
+        """
+        Remove terms. Unknown terms are ignored.
+
+        Args:
+            terms (Iterable[str]): The terms to remove
+
+        Returns:
+            int: The number of terms removed
+        """
+        with self._lock:
+            automaton = self._automaton
+            goto = automaton.goto
+            replacements = dict(automaton.replacements)
+            term_of = None
+            removed = 0
+            for term in terms:
+                if replacements.pop(term, None) is None:
+                    continue
+                if term_of is None:
+                    term_of = list(automaton.term)
+                node = 0
+                for char in term:
+                    node = goto[node][char]
+                # The output links skip nodes that no longer end a term
+                term_of[node] = None
+                removed += 1
+            if removed:
+                self._automaton = _Automaton(goto, automaton.fail, term_of, automaton.output,
+                                             replacements, automaton.version + 1)
+        return removed
+
+    def digest(self) -> str:
+        """
+        Identify the dictionary contents, stably across processes.
+
+        Returns:
+            str: A hexadecimal digest of the terms and their replacements
+        """
+        automaton = self._automaton
+        if automaton.digest is None:
+            contents = repr(sorted(automaton.replacements.items())).encode("utf-8", "surrogatepass")
+            automaton.digest = hashlib.sha256(contents).hexdigest()[:16]
+        return automaton.digest
+
+    def _matches(self, automaton: _Automaton, text: str) -> List[Tuple[int, int]]:
+        """
+        Find the leftmost-longest, non-overlapping matches in a text.
+
+        Args:
+            automaton (_Automaton): The version of the dictionary to match
+            text (str): The text to scan
+
+        Returns:
+            List[Tuple[int, int]]: The start and end offsets of each match, in order
+        """
+        goto, fail, term, output = automaton.goto, automaton.fail, automaton.term, automaton.output
+        whole_words = self.whole_words
+        longest: Dict[int, int] = {}
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            node = state
+            end = position + 1
+            while node > 0:
+                if term[node] is None:
+                    # Not a term, or a removed one
+                    node = output[node]
+                    continue
+                start = end - len(term[node])
+                if not whole_words or (
+                        (start == 0 or not _is_word(text[start]) or not _is_word(text[start - 1]))
+                        and (end == len(text) or not _is_word(text[end - 1]) or not _is_word(text[end]))):
+                    if longest.get(start, 0) < end:
+                        longest[start] = end
+                node = output[node]
+        matches = []
+        last_end = 0
+        for start in sorted(longest):
+            if start >= last_end:
+                matches.append((start, longest[start]))
+                last_end = longest[start]
+        return matches
+
+    def replace(self, text: str) -> str:
+        """
+        Replace all known terms in a text outside code spans, links and URLs.
+
+        Args:
+            text (str): The text to replace terms in
+
+        Returns:
+            str: The text with every term replaced
+        """
+        return self._replace(self._automaton, text)
+
+    def _replace(self, automaton: _Automaton, text: str) -> str:
+        if not automaton.replacements:
+            return text
+        parts = []
+        position = 0
+        for protected in _PROTECTED.finditer(text):
+            parts.append(self._replace_span(automaton, text[position:protected.start()]))
+            parts.append(protected.group())
+            position = protected.end()
+        parts.append(self._replace_span(automaton, text[position:]))
+        return "".join(parts)
+
+    def _replace_span(self, automaton: _Automaton, text: str) -> str:
+        matches = self._matches(automaton, text) if text else []
+        if not matches:
+            return text
+        replacements = automaton.replacements
+        parts = []
+        position = 0
+        for start, end in matches:
+            parts.append(text[position:start])
+            parts.append(replacements[text[start:end]])
+            position = end
+        parts.append(text[position:])
+        return "".join(parts)
+
+    def __call__(self, lines: List[Tuple[int, str]]) -> List[str]:
+        # Every line is replaced with the same version of the dictionary
+        automaton = self._automaton
+        return [self._replace(automaton, line) for _, line in lines]
@@ -0,0 +1,123 @@
+"""
+Converters for many tenants, cloned from one base converter.
+
+Workspaces often differ only in a few plugins. ``ConverterRegistry`` builds each
+tenant's converter once, by cloning a base converter with ``clone()`` and
+applying the tenant's configuration, and keeps it in a least recently used
+cache::
+
+    base = SlackMarkdownConverter(document_mode=True)
+    base.register_dictionary_plugin("services", services)
+    registry = ConverterRegistry(base, maxsize=512)
+
+    def configure(converter):
+        converter.register_regex_plugin("tickets", tenant.ticket_pattern, tenant.ticket_link)
+
+    registry.get(tenant.id, configure).convert(markdown)
+
+Clones share the compiled rules and the base plugins, so building one costs
+about as much as registering the tenant's own plugins. Entries are keyed on the
+tenant key and the base's ``config_fingerprint()``: after the base changes, each
+tenant's converter is built again on its next use.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from .converter import SlackMarkdownConverter
+
+
+class ConverterRegistry:
+    """
+    A least recently used cache of converters cloned from a base converter.
+
+    Attributes:
+        base (SlackMarkdownConverter): The converter every entry is cloned from.
+        maxsize (int): The most converters kept.
+    """
+
+    def __init__(self, base: SlackMarkdownConverter, maxsize: int = 256):
+        """
+        Create an empty registry.
+
+        Args:
+            base (SlackMarkdownConverter): The converter to clone
+            maxsize (int): The most converters kept. Default is 256.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be a positive integer")
+        self.base = base
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[Hashable, str], SlackMarkdownConverter]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable,
+            configure: Optional[Callable[[SlackMarkdownConverter], None]] = None) -> SlackMarkdownConverter:
+        """
+        Get the converter of a tenant, building it on first use.
+
+        Args:
+            key (Hashable): Identifies the tenant and its configuration
+            configure (Optional[Callable[[SlackMarkdownConverter], None]]): Registers the
+                tenant's plugins and rules on a fresh clone of the base. It is only called
+                on a miss, and must configure the same converter for the same key.
+                Default is None (the base configuration).
+
+        Returns:
+            SlackMarkdownConverter: The tenant's converter
+        """
+        entry_key = (key, self.base.config_fingerprint())
+        with self._lock:
+            converter = self._entries.get(entry_key)
+            if converter is not None:
+                self._entries.move_to_end(entry_key)
+                self._stats["hits"] += 1
+                return converter
+            self._stats["misses"] += 1
+        # Built outside the lock, so that a slow configuration does not hold up other tenants
+        converter = self.base.clone()
+        if configure is not None:
+            configure(converter)
+        with self._lock:
+            converter = self._entries.setdefault(entry_key, converter)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+        return converter
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        Remove the converter of a tenant, for example after its configuration changed.
+
+        Args:
+            key (Hashable): The tenant's key
+
+        Returns:
+            bool: True if a converter was removed
+        """
+        with self._lock:
+            stale = [entry_key for entry_key in self._entries if entry_key[0] == key]
+            for entry_key in stale:
+                del self._entries[entry_key]
+        return bool(stale)
+
+    def clear(self) -> None:
+        """Remove all converters."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get the cache counters.
+
+        Returns:
+            Dict[str, int]: "hits", "misses", "evictions" and the current "size"
+        """
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
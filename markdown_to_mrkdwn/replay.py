@@ -0,0 +1,134 @@
+"""
+Replay slow inputs captured by ``SlackMarkdownConverter.watch_slow_inputs``.
+
+A dump written with ``dump_slow_inputs()`` holds one JSON object per line with
+the Markdown input, how long it took, the converter options and the
+fingerprint of the plugin configuration. This module loads such a dump and
+converts every input again, either as a small benchmark or under the profiler,
+so that pathological inputs from production can be reproduced locally.
+
+Plugins cannot be stored in the dump. To replay with the same plugins, pass a
+factory that builds the configured converter::
+
+    python -m markdown_to_mrkdwn.replay slow.jsonl --factory myapp.slack:make_converter
+    python -m markdown_to_mrkdwn.replay slow.jsonl --profile
+"""
+
+import argparse
+import cProfile
+import importlib
+import io
+import json
+import logging
+import pstats
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .converter import SlackMarkdownConverter
+
+
+def load_slow_inputs(path: str) -> List[Dict[str, Any]]:
+    """
+    Load a dump written by ``SlackMarkdownConverter.dump_slow_inputs``.
+
+    Args:
+        path (str): The dump file
+
+    Returns:
+        List[Dict[str, Any]]: The captured inputs, in the order they were captured
+    """
+    with open(path, encoding="utf-8") as dump:
+        return [json.loads(line) for line in dump if line.strip()]
+
+
+def replay(entries: List[Dict[str, Any]],
+           converter_factory: Optional[Callable[[], SlackMarkdownConverter]] = None,
+           repeat: int = 5) -> List[Dict[str, Any]]:
+    """
+    Convert captured inputs again and time them.
+
+    Without a factory, a plain converter is built with the options stored in
+    each entry. A warning is logged for every entry whose configuration
+    fingerprint differs from the converter's, since the timing may then not
+    reproduce.
+
+    Args:
+        entries (List[Dict[str, Any]]): The captured inputs
+        converter_factory (Optional[Callable[[], SlackMarkdownConverter]]): Builds the converter to replay with
+        repeat (int): How many times each input is converted
+
+    Returns:
+        List[Dict[str, Any]]: For each input its "length", the "captured" duration and
+        the "best" and "median" replayed durations, in seconds
+    """
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1")
+    converters: Dict[Any, SlackMarkdownConverter] = {}
+    results = []
+    for index, entry in enumerate(entries):
+        options = entry.get("options", {})
+        key = None if converter_factory is not None else tuple(sorted(options.items()))
+        converter = converters.get(key)
+        if converter is None:
+            converter = converter_factory() if converter_factory is not None else SlackMarkdownConverter(**options)
+            converters[key] = converter
+        if entry.get("fingerprint") and entry["fingerprint"] != converter.config_fingerprint():
+            logging.warning(f"Input {index} was captured with a different configuration "
+                            f"({entry['fingerprint']} != {converter.config_fingerprint()})")
+
+        markdown = entry["markdown"]
+        with_plaintext = entry.get("with_plaintext", False)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            converter.convert(markdown, with_plaintext=with_plaintext)
+            timings.append(time.perf_counter() - started)
+        results.append({
+            "length": len(markdown),
+            "captured": entry.get("seconds"),
+            "best": min(timings),
+            "median": statistics.median(timings),
+        })
+    return results
+
+
+def _load_factory(spec: str) -> Callable[[], SlackMarkdownConverter]:
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError("The factory must be given as 'module:function'")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Replay a dump of slow inputs from the command line."""
+    parser = argparse.ArgumentParser(description="Replay slow Markdown inputs captured by the converter")
+    parser.add_argument("dump", help="A file written by SlackMarkdownConverter.dump_slow_inputs()")
+    parser.add_argument("--factory", default=None,
+                        help="A 'module:function' building the converter to replay with")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--profile", action="store_true", help="Print a cProfile report of the replay")
+    parser.add_argument("--top", type=int, default=25, help="Number of functions in the profile report")
+    args = parser.parse_args(argv)
+
+    entries = load_slow_inputs(args.dump)
+    factory = _load_factory(args.factory) if args.factory else None
+    if args.profile:
+        profiler = cProfile.Profile()
+        results = profiler.runcall(replay, entries, factory, args.repeat)
+    else:
+        results = replay(entries, factory, args.repeat)
+
+    print(f"{'#':>4} {'chars':>9} {'captured ms':>12} {'best ms':>10} {'median ms':>10}")
+    for index, result in enumerate(results):
+        captured = f"{result['captured'] * 1000.0:.3f}" if result["captured"] is not None else "-"
+        print(f"{index:>4} {result['length']:>9} {captured:>12} "
+              f"{result['best'] * 1000.0:>10.3f} {result['median'] * 1000.0:>10.3f}")
+    if args.profile:
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(args.top)
+        print(report.getvalue())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,430 @@
+"""
+Declarative conversion rules and the compiler that turns them into an execution plan.
+
+A ``Rule`` states a regular expression, its replacement and which other rules
+it has to run before or after. ``compile_rules`` turns a list of rules into a
+``RulePlan``:
+
+- Rules are ordered by their dependencies, keeping the declared order where
+  the dependencies leave a choice.
+- Rules whose replacement writes back exactly what they matched, such as
+  ``(\\d+)\\. (.+)`` to ``\\1. \\2``, are dropped.
+- Consecutive rules that differ only in a literal prefix and share a
+  replacement, such as the six heading rules, become one step.
+- Each step notes a literal that every match contains, so that it can be
+  skipped for text without it.
+
+The analysis is syntactic and conservative: a pattern using constructs it does
+not understand is kept exactly as written. ``RulePlan.explain()`` shows the
+resulting plan.
+"""
+
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+Replacement = Union[str, Callable[["re.Match"], str]]
+
+# Characters with a meaning in a pattern outside character classes
+_METACHARACTERS = set(".^$*+?{}[]()|\\")
+
+# A bounded repetition such as {2}, {2,} or {2,5}
+_REPETITION = re.compile(r"\{\d*(?:,\d*)?\}")
+
+
+class Rule:
+    """
+    A conversion rule: a pattern, its replacement and its ordering constraints.
+
+    Attributes:
+        name (str): Identifies the rule in the constraints of other rules and in plans.
+        pattern (str): The regular expression.
+        replacement (Replacement): A template or a function, as for ``re.sub``.
+        flags (int): The regular expression flags.
+        after (Tuple[str, ...]): Rules that have to run before this one.
+        before (Tuple[str, ...]): Rules that have to run after this one.
+        opener (Optional[str]): Where a match can start, for patterns that are guarded
+            against rescanning lines without a closing delimiter.
+        may_close (Optional[Callable[[str, int, int], bool]]): Whether a closing delimiter
+            occurs in ``text[pos:end]``; required with ``opener``.
+    """
+
+    def __init__(self, name: str, pattern: str, replacement: Replacement, flags: int = re.MULTILINE,
+                 after: Union[str, Iterable[str]] = (), before: Union[str, Iterable[str]] = (),
+                 opener: Optional[str] = None, may_close: Optional[Callable[[str, int, int], bool]] = None):
+        if (opener is None) != (may_close is None):
+            raise ValueError("opener and may_close must be given together")
+        self.name = name
+        self.pattern = pattern
+        self.replacement = replacement
+        self.flags = flags
+        self.after = (after,) if isinstance(after, str) else tuple(after)
+        self.before = (before,) if isinstance(before, str) else tuple(before)
+        self.opener = opener
+        self.may_close = may_close
+
+    def __repr__(self) -> str:
+        return f"Rule({self.name!r}, {self.pattern!r}, {self.replacement!r})"
+
+
+class PlanStep:
+    """
+    One substitution of an execution plan.
+
+    Attributes:
+        names (Tuple[str, ...]): The rules the step was compiled from.
+        pattern (str): The regular expression.
+        replacement (Replacement): The replacement.
+        flags (int): The regular expression flags.
+        needle (Optional[str]): A literal every match contains, if one is known.
+        opener (Optional[str]): See ``Rule.opener``.
+        may_close (Optional[Callable[[str, int, int], bool]]): See ``Rule.may_close``.
+        sources (List[str]): The patterns of the rules the step was compiled from.
+    """
+
+    def __init__(self, names: Tuple[str, ...], pattern: str, replacement: Replacement, flags: int,
+                 needle: Optional[str] = None, opener: Optional[str] = None,
+                 may_close: Optional[Callable[[str, int, int], bool]] = None,
+                 sources: Optional[List[str]] = None):
+        self.names = names
+        self.pattern = pattern
+        self.replacement = replacement
+        self.flags = flags
+        self.needle = needle
+        self.opener = opener
+        self.may_close = may_close
+        self.sources = sources or [pattern]
+
+
+class RulePlan:
+    """
+    The compiled form of a list of rules.
+
+    Attributes:
+        steps (List[PlanStep]): The substitutions to run, in order.
+        dropped (List[str]): The rules left out because they never change the text.
+    """
+
+    def __init__(self, steps: List[PlanStep], dropped: List[str]):
+        self.steps = steps
+        self.dropped = dropped
+
+    def explain(self) -> str:
+        """
+        Describe the plan.
+
+        Returns:
+            str: One line per step with the rules it runs, its pattern and replacement,
+            followed by the rules that were dropped
+        """
+        lines = [f"{len(self.steps)} steps:"]
+        for number, step in enumerate(self.steps, 1):
+            replacement = getattr(step.replacement, "__qualname__", None) or repr(step.replacement)
+            notes = []
+            if step.needle is not None:
+                notes.append(f"only if {step.needle!r} occurs")
+            if step.opener is not None:
+                notes.append("skips lines without a closing delimiter")
+            lines.append(f"{number:>3}. {' + '.join(step.names)}: {step.pattern!r} -> {replacement}"
+                         + (f" ({'; '.join(notes)})" if notes else ""))
+        if self.dropped:
+            lines.append(f"dropped as no-ops: {', '.join(self.dropped)}")
+        return "\n".join(lines)
+
+
+def compile_rules(rules: List[Rule]) -> RulePlan:
+    """
+    Compile rules into an execution plan.
+
+    Rules are assumed to be applied to one line at a time, or to lines joined by
+    newlines with patterns that cannot match across them.
+
+    Args:
+        rules (List[Rule]): The rules, in their declared order
+
+    Returns:
+        RulePlan: The plan
+
+    Raises:
+        ValueError: If two rules share a name, a constraint names an unknown rule or the
+            constraints contradict each other
+    """
+    ordered = _order(rules)
+    steps = []
+    dropped = []
+    for rule in ordered:
+        if _is_identity(rule):
+            dropped.append(rule.name)
+            continue
+        steps.append(PlanStep((rule.name,), rule.pattern, rule.replacement, rule.flags,
+                              None if rule.opener is not None else _needle(rule.pattern, rule.flags),
+                              rule.opener, rule.may_close))
+
+    merged: List[PlanStep] = []
+    for step in steps:
+        combined = _merge(merged[-1], step) if merged else None
+        if combined is not None:
+            merged[-1] = combined
+        else:
+            merged.append(step)
+    return RulePlan(merged, dropped)
+
+
+def _order(rules: List[Rule]) -> List[Rule]:
+    """Sort rules topologically, taking the earliest declared rule whenever there is a choice."""
+    index: Dict[str, int] = {}
+    for position, rule in enumerate(rules):
+        if rule.name in index:
+            raise ValueError(f"Duplicate rule name '{rule.name}'")
+        index[rule.name] = position
+    predecessors: List[set] = [set() for _ in rules]
+    for position, rule in enumerate(rules):
+        for name in rule.after + rule.before:
+            if name not in index:
+                raise ValueError(f"Rule '{rule.name}' refers to unknown rule '{name}'")
+        predecessors[position].update(index[name] for name in rule.after)
+        for name in rule.before:
+            predecessors[index[name]].add(position)
+
+    ordered = []
+    placed = [False] * len(rules)
+    while len(ordered) < len(rules):
+        for position in range(len(rules)):
+            if not placed[position] and all(placed[other] for other in predecessors[position]):
+                placed[position] = True
+                ordered.append(rules[position])
+                break
+        else:
+            cycle = [rules[position].name for position in range(len(rules)) if not placed[position]]
+            raise ValueError(f"Rule constraints form a cycle among: {', '.join(cycle)}")
+    return ordered
+
+
+def _parse(pattern: str) -> Optional[List[Tuple[str, Any, int, bool]]]:
+    """
+    Split a pattern into its top-level items.
+
+    Returns:
+        Optional[List[Tuple[str, Any, int, bool]]]: For each item its kind ("literal",
+        "zero" for zero-width assertions, "group" for a capturing group, or "other"),
+        its value (the character of a literal, the number of a group), its start
+        offset and whether it is quantified; None for patterns with top-level
+        alternation or inline flags
+    """
+    items = []
+    groups = 0
+    i = 0
+    while i < len(pattern):
+        start = i
+        char = pattern[i]
+        if char == "\\":
+            escape = pattern[i + 1:i + 2]
+            if not escape:
+                return None
+            if escape in "bBAZ":
+                kind, value = "zero", None
+            elif escape.isalnum():
+                kind, value = "other", None
+            else:
+                kind, value = "literal", escape
+            i += 2
+        elif char == "[":
+            i = _class_end(pattern, i)
+            kind, value = "other", None
+        elif char == "(":
+            end = _group_end(pattern, i)
+            if end is None:
+                return None
+            body = pattern[i:end]
+            if body.startswith(("(?=", "(?!", "(?<=", "(?<!", "(?#")):
+                kind, value = "zero", None
+            elif body.startswith("(?:"):
+                kind, value = "other", None
+            elif body.startswith("(?P<") or not body.startswith("(?"):
+                kind, value = "group", groups + 1
+            else:
+                return None
+            groups += _count_groups(body)
+            i = end
+        elif char in "^$":
+            kind, value = "zero", None
+            i += 1
+        elif char == ".":
+            kind, value = "other", None
+            i += 1
+        elif char in "|)*+?" or (char == "{" and _REPETITION.match(pattern, i)):
+            return None
+        else:
+            kind, value = "literal", char
+            i += 1
+
+        quantified = False
+        quantifier = _REPETITION.match(pattern, i)
+        if quantifier or pattern[i:i + 1] in ("*", "+", "?"):
+            quantified = True
+            i = quantifier.end() if quantifier else i + 1
+            if pattern[i:i + 1] in ("?", "+"):
+                i += 1
+        items.append((kind, value, start, quantified))
+    return items
+
+
+def _class_end(pattern: str, i: int) -> int:
+    """Find the end of the character class starting at i."""
+    i += 1
+    if pattern[i:i + 1] == "^":
+        i += 1
+    if pattern[i:i + 1] == "]":
+        i += 1
+    while i < len(pattern) and pattern[i] != "]":
+        i += 2 if pattern[i] == "\\" else 1
+    return i + 1
+
+
+def _group_end(pattern: str, i: int) -> Optional[int]:
+    """Find the end of the group starting at i, or None if it is not closed."""
+    depth = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "[":
+            i = _class_end(pattern, i)
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return None
+
+
+def _count_groups(body: str) -> int:
+    """Count the capturing groups in a piece of pattern."""
+    count = 0
+    i = 0
+    while i < len(body):
+        char = body[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "[":
+            i = _class_end(body, i)
+            continue
+        if char == "(" and (not body.startswith("(?", i) or body.startswith("(?P<", i)):
+            count += 1
+        i += 1
+    return count
+
+
+def _parse_template(replacement: str) -> Optional[List[Tuple[str, Any]]]:
+    """Split a replacement template into literal characters and group references."""
+    items: List[Tuple[str, Any]] = []
+    i = 0
+    while i < len(replacement):
+        char = replacement[i]
+        if char != "\\":
+            items.append(("literal", char))
+            i += 1
+            continue
+        reference = re.match(r"\\([1-9])(?!\d)|\\g<([1-9]\d*)>", replacement[i:])
+        if reference is None:
+            return None
+        items.append(("group", int(reference.group(1) or reference.group(2))))
+        i += reference.end()
+    return items
+
+
+def _is_identity(rule: Rule) -> bool:
+    """Check whether a rule writes back exactly what it matched."""
+    if not isinstance(rule.replacement, str):
+        return False
+    items = _parse(rule.pattern)
+    template = _parse_template(rule.replacement)
+    if items is None or template is None:
+        return False
+    matched = []
+    for kind, value, _, quantified in items:
+        if kind == "zero":
+            continue
+        if quantified or kind not in ("literal", "group"):
+            return False
+        matched.append((kind, value))
+    return matched == template
+
+
+def _needle(pattern: str, flags: int) -> Optional[str]:
+    """Find the longest literal every match of a pattern contains."""
+    items = _parse(pattern)
+    if items is None or flags & re.IGNORECASE:
+        return None
+    best = run = ""
+    for kind, value, _, quantified in items:
+        if kind == "literal" and not quantified:
+            run += value
+        elif kind != "zero" or quantified:
+            run = ""
+        if len(run) > len(best):
+            best = run
+    return best or None
+
+
+def _split_prefix(pattern: str) -> Optional[Tuple[str, str, str]]:
+    """Split a pattern into its leading assertions, literal prefix and remainder."""
+    items = _parse(pattern)
+    if items is None:
+        return None
+    position = 0
+    while position < len(items) and items[position][0] == "zero" and not items[position][3]:
+        position += 1
+    anchors_end = items[position][2] if position < len(items) else len(pattern)
+    prefix = ""
+    while position < len(items) and items[position][0] == "literal" and not items[position][3]:
+        prefix += items[position][1]
+        position += 1
+    rest_start = items[position][2] if position < len(items) else len(pattern)
+    return pattern[:anchors_end], prefix, pattern[rest_start:]
+
+
+def _escape(literal: str) -> str:
+    return "".join("\\" + char if char in _METACHARACTERS else char for char in literal)
+
+
+def _merge(first: PlanStep, second: PlanStep) -> Optional[PlanStep]:
+    """
+    Combine two consecutive steps that differ only in a literal prefix.
+
+    Both patterns have to be anchored at the line start, and no prefix may be a
+    prefix of another, so at most one of them matches on any line. The
+    replacement has to start with a character none of the prefixes start with,
+    so the first step's output is never matched by the second step.
+    """
+    if (first.replacement != second.replacement or first.flags != second.flags
+            or first.opener is not None or second.opener is not None
+            or not isinstance(first.replacement, str) or not first.replacement
+            or first.replacement[0] == "\\"):
+        return None
+    sources = first.sources + second.sources
+    parts = [_split_prefix(pattern) for pattern in sources]
+    if None in parts:
+        return None
+    anchors = {part[0] for part in parts}
+    rests = {part[2] for part in parts}
+    prefixes = [part[1] for part in parts]
+    if anchors != {"^"} or len(rests) != 1 or "" in prefixes:
+        return None
+    for prefix in prefixes:
+        if prefix[0] == first.replacement[0]:
+            return None
+        if any(other != prefix and other.startswith(prefix) for other in prefixes) or prefixes.count(prefix) > 1:
+            return None
+
+    needles = [needle for needle in (first.needle, second.needle) if needle is not None]
+    needle = min(needles, key=len) if len(needles) == 2 else None
+    if needle is not None and not all(needle in other for other in needles):
+        needle = None
+    pattern = "^(?:" + "|".join(_escape(prefix) for prefix in prefixes) + ")" + rests.pop()
+    return PlanStep(first.names + second.names, pattern, first.replacement, first.flags, needle,
+                    sources=sources)
@@ -0,0 +1,381 @@
+"""
+A small conversion service for running the converter as a sidecar.
+
+The server keeps a pool of worker threads, each owning a warm
+``SlackMarkdownConverter`` built by a factory function, so plugin
+configurations are loaded once at start-up rather than per request.
+Requests are handed to the workers through a bounded queue; when the queue is
+full the server answers ``503`` immediately instead of letting work pile up.
+
+Endpoints:
+    POST /convert  ``{"markdown": "..."}`` -> ``{"mrkdwn": "..."}``
+    POST /batch    ``{"documents": ["...", ...]}`` -> ``{"results": ["...", ...]}``
+    GET  /metrics  Request counters, queue depth and latency percentiles.
+    GET  /health   ``{"status": "ok"}``
+
+Only the standard library is used. Run it with::
+
+    python -m markdown_to_mrkdwn.server --port 8080 --workers 4
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import socketserver
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from .converter import SlackMarkdownConverter
+
+
+class _Job:
+    """A unit of work handed from a request handler to a worker."""
+
+    def __init__(self, documents: List[str]):
+        self.documents = documents
+        self.results: Optional[List[str]] = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+
+class _BodyError(Exception):
+    """A request body that is not read, with the status code to answer it with."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ServerMetrics:
+    """
+    Thread-safe request counters and a sliding window of latencies.
+
+    Attributes:
+        window (int): How many recent latencies are kept for percentiles.
+    """
+
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._counters = {"requests": 0, "documents": 0, "rejected": 0, "errors": 0, "timeouts": 0}
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        """
+        Increase a counter.
+
+        Args:
+            name (str): The counter name
+            amount (int): How much to add
+        """
+        with self._lock:
+            self._counters[name] += amount
+
+    def observe(self, seconds: float) -> None:
+        """
+        Record the latency of a completed request.
+
+        Args:
+            seconds (float): The time the request spent in the server
+        """
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def snapshot(self, queue_depth: int, queue_size: int, workers: int) -> Dict[str, Any]:
+        """
+        Build the payload served by ``/metrics``.
+
+        Returns:
+            Dict[str, Any]: Counters, queue depth and latency percentiles in milliseconds
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counters = dict(self._counters)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            rank = max(0, min(len(latencies) - 1, int(round(p / 100.0 * len(latencies))) - 1))
+            return round(latencies[rank] * 1000.0, 3)
+
+        counters.update({
+            "queue_depth": queue_depth,
+            "queue_size": queue_size,
+            "workers": workers,
+            "latency_ms": {
+                "p50": percentile(50),
+                "p90": percentile(90),
+                "p99": percentile(99),
+                "max": round(latencies[-1] * 1000.0, 3) if latencies else None,
+                "samples": len(latencies),
+            },
+        })
+        return counters
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler that forwards conversion requests to the worker pool."""
+
+    server_version = "markdown_to_mrkdwn"
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self) -> str:
+        # Unix socket peers have no (host, port) address
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, payload: Dict[str, Any],
+                   headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Any:
+        length = self.headers.get("Content-Length") or "0"
+        # int() would accept signs, spaces and underscores, and a negative length
+        # makes read() wait for the client to close the connection
+        if not (length.isascii() and length.isdigit()):
+            raise _BodyError(400, "Invalid Content-Length")
+        if int(length) > self.server.service.max_body_bytes:
+            raise _BodyError(413, "Request body too large")
+        return json.loads(self.rfile.read(int(length)).decode("utf-8") or "null")
+
+    def do_GET(self) -> None:
+        service = self.server.service
+        if self.path == "/metrics":
+            self._send_json(200, service.metrics_snapshot())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self) -> None:
+        service = self.server.service
+        if self.path not in ("/convert", "/batch"):
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            payload = self._read_json()
+            if self.path == "/convert":
+                documents = [payload["markdown"]]
+            else:
+                documents = payload["documents"]
+            if not isinstance(documents, list) or not all(isinstance(d, str) for d in documents):
+                raise ValueError("Documents must be strings")
+        except _BodyError as e:
+            # The body is left unread, so the connection cannot be reused
+            self.close_connection = True
+            self._send_json(e.status, {"error": str(e)}, {"Connection": "close"})
+            return
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"Invalid request: {e}"})
+            return
+
+        status, results = service.submit(documents)
+        if status == 200:
+            if self.path == "/convert":
+                self._send_json(200, {"mrkdwn": results[0]})
+            else:
+                self._send_json(200, {"results": results})
+        elif status == 503:
+            self._send_json(503, {"error": "Server busy"}, {"Retry-After": "1"})
+        else:
+            self._send_json(status, {"error": results})
+
+
+class _ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server listening on a Unix domain socket."""
+
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+class ConversionServer:
+    """
+    A threaded HTTP front end over a pool of warm converters.
+
+    Attributes:
+        workers (int): The number of worker threads, each with its own converter.
+        queue_size (int): The maximum number of queued requests before rejecting.
+        request_timeout (float): Seconds a request may wait for its result.
+        metrics (ServerMetrics): Counters and latencies served by ``/metrics``.
+    """
+
+    def __init__(self, converter_factory: Callable[[], SlackMarkdownConverter] = SlackMarkdownConverter,
+                 host: str = "127.0.0.1", port: int = 0, unix_socket: Optional[str] = None,
+                 workers: int = 4, queue_size: int = 64, request_timeout: float = 30.0,
+                 max_body_bytes: int = 10 * 1024 * 1024):
+        """
+        Create the server and bind its socket. Workers start with ``start()``.
+
+        Args:
+            converter_factory (callable): Builds a fully configured converter for each worker
+            host (str): The host to bind when serving TCP
+            port (int): The TCP port to bind; 0 picks a free port
+            unix_socket (Optional[str]): Serve on this Unix socket path instead of TCP
+            workers (int): The number of worker threads
+            queue_size (int): The maximum number of queued requests
+            request_timeout (float): Seconds a request may wait for its result
+            max_body_bytes (int): The largest request body accepted
+        """
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.workers = workers
+        self.queue_size = queue_size
+        self.request_timeout = request_timeout
+        self.max_body_bytes = max_body_bytes
+        self.metrics = ServerMetrics()
+        self._queue: "queue.Queue[Optional[_Job]]" = queue.Queue(maxsize=queue_size)
+        self._converters = [converter_factory() for _ in range(workers)]
+        self._threads: List[threading.Thread] = []
+        self._serve_thread: Optional[threading.Thread] = None
+        self.unix_socket = unix_socket
+
+        if unix_socket:
+            if os.path.exists(unix_socket):
+                os.unlink(unix_socket)
+            self._httpd = _ThreadingUnixHTTPServer(unix_socket, _RequestHandler)
+        else:
+            self._httpd = ThreadingHTTPServer((host, port), _RequestHandler)
+            self._httpd.daemon_threads = True
+        self._httpd.service = self
+
+    @property
+    def address(self) -> Any:
+        """The bound ``(host, port)`` tuple, or the Unix socket path."""
+        return self.unix_socket or self._httpd.server_address[:2]
+
+    def submit(self, documents: List[str]):
+        """
+        Queue documents for conversion and wait for the result.
+
+        Args:
+            documents (List[str]): The Markdown documents to convert
+
+        Returns:
+            tuple: An HTTP status code and either the converted documents or an error message
+        """
+        started = time.perf_counter()
+        self.metrics.increment("requests")
+        job = _Job(documents)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self.metrics.increment("rejected")
+            return 503, None
+        if not job.done.wait(self.request_timeout):
+            self.metrics.increment("timeouts")
+            return 504, "Conversion timed out"
+        if job.error is not None:
+            self.metrics.increment("errors")
+            return 500, job.error
+        self.metrics.increment("documents", len(documents))
+        self.metrics.observe(time.perf_counter() - started)
+        return 200, job.results
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current metrics.
+
+        Returns:
+            Dict[str, Any]: The payload served by ``/metrics``
+        """
+        return self.metrics.snapshot(self._queue.qsize(), self.queue_size, self.workers)
+
+    def _work(self, converter: SlackMarkdownConverter) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                job.results = converter.convert_many(job.documents)
+            except Exception as e:
+                logging.error(f"Conversion worker error: {str(e)}")
+                job.error = str(e)
+            finally:
+                job.done.set()
+
+    def start(self) -> "ConversionServer":
+        """
+        Start the workers and serve requests on a background thread.
+
+        Returns:
+            ConversionServer: The server itself, for chaining
+        """
+        for index, converter in enumerate(self._converters):
+            thread = threading.Thread(target=self._work, args=(converter,),
+                                      name=f"mrkdwn-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._serve_thread = threading.Thread(target=self._httpd.serve_forever,
+                                              name="mrkdwn-server", daemon=True)
+        self._serve_thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving, let the workers finish queued jobs and release the socket."""
+        if self._serve_thread is not None:
+            self._httpd.shutdown()
+            self._serve_thread.join()
+            self._serve_thread = None
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._httpd.server_close()
+        if self.unix_socket and os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+
+    def __enter__(self) -> "ConversionServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the conversion server from the command line."""
+    parser = argparse.ArgumentParser(description="Serve Markdown to mrkdwn conversion over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--unix-socket", default=None)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    server = ConversionServer(host=args.host, port=args.port, unix_socket=args.unix_socket,
+                              workers=args.workers, queue_size=args.queue_size,
+                              request_timeout=args.timeout)
+    server.start()
+    print(f"Serving on {server.address}")
+    try:
+        server._serve_thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Test doubles for plugins that call external services.
+
+``FakeLookupBackend`` stands in for a directory or ticket service that an
+asynchronous plugin queries, such as a user ID lookup for mentions. It answers
+from a dictionary after a configurable delay and records how it was called, so
+tests can check concurrency limits and timeouts without any network access::
+
+    backend = FakeLookupBackend({"alice": "U012AB3CD"}, latency=0.05)
+    converter.register_plugin("mentions", backend.mention_plugin(), scope="line")
+    await converter.convert_async("ping @alice", concurrency=4, timeout=1.0)
+"""
+
+import asyncio
+import re
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+class FakeLookupBackend:
+    """
+    An in-memory lookup service with simulated latency.
+
+    Attributes:
+        records (Dict[str, str]): The value returned for each key.
+        latency (float): Seconds every lookup takes.
+        delays (Dict[str, float]): Seconds taken by lookups of particular keys instead.
+        calls (List[str]): The keys looked up, in the order the lookups started.
+        max_in_flight (int): The most lookups that ran at the same time.
+    """
+
+    def __init__(self, records: Dict[str, str], latency: float = 0.0,
+                 delays: Optional[Dict[str, float]] = None):
+        """
+        Create the backend.
+
+        Args:
+            records (Dict[str, str]): The value returned for each key
+            latency (float): Seconds every lookup takes. Default is 0.
+            delays (Optional[Dict[str, float]]): Seconds taken by lookups of particular keys
+        """
+        self.records = records
+        self.latency = latency
+        self.delays = delays or {}
+        self.calls: List[str] = []
+        self.max_in_flight = 0
+        self._in_flight = 0
+
+    async def lookup(self, key: str) -> Optional[str]:
+        """
+        Look up a key.
+
+        Args:
+            key (str): The key to look up
+
+        Returns:
+            Optional[str]: The value, or None for unknown keys
+        """
+        self.calls.append(key)
+        self._in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self._in_flight)
+        try:
+            await asyncio.sleep(self.delays.get(key, self.latency))
+            return self.records.get(key)
+        finally:
+            self._in_flight -= 1
+
+    def mention_plugin(self, pattern: str = r"@(\w+)",
+                       template: str = "<@{}>") -> Callable[[str], Awaitable[str]]:
+        """
+        Build a line plugin that replaces handles with mentions of the looked up IDs.
+
+        All handles on a line are looked up concurrently; unknown ones are kept.
+
+        Args:
+            pattern (str): Matches a handle, with the key in the first group
+            template (str): Formats the value of a known handle
+
+        Returns:
+            Callable[[str], Awaitable[str]]: A coroutine function to register as a plugin
+        """
+        regex = re.compile(pattern)
+
+        async def mentions(line: str) -> str:
+            matches = list(regex.finditer(line))
+            if not matches:
+                return line
+            values = await asyncio.gather(*(self.lookup(match.group(1)) for match in matches))
+            parts = []
+            position = 0
+            for match, value in zip(matches, values):
+                parts.append(line[position:match.start()])
+                parts.append(template.format(value) if value is not None else match.group())
+                position = match.end()
+            parts.append(line[position:])
+            return "".join(parts)
+
+        return mentions
@@ -9,14 +9,16 @@ URL = "https://github.com/fla9ua/markdown_to_mrkdwn"
 LICENSE = "MIT License"
 DOWNLOAD_URL = "https://github.com/fla9ua/markdown_to_mrkdwn"
 VERSION = markdown_to_mrkdwn.__version__
-PYTHON_REQUIRES = ">=3.6"
+PYTHON_REQUIRES = ">=3.7"
 
 INSTALL_REQUIRES = [
     # No dependencies required at the moment
 ]
 
 EXTRAS_REQUIRE = {
-    # Add optional dependencies here if needed
+    # Optional regex engines, see markdown_to_mrkdwn.backends
+    "re2": ["google-re2"],
+    "regex": ["regex"],
 }
 
 PACKAGES = find_packages()
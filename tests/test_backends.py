@@ -0,0 +1,122 @@
+# exec command python3 -m unittest tests/test_backends.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import importlib.util
+import pickle
+import random
+import re
+import time
+import unittest
+from markdown_to_mrkdwn.backends import BackendPattern, RegexBackend, RegexModuleBackend, get_backend
+from markdown_to_mrkdwn.converter import SlackMarkdownConverter, _BUILTIN_PATTERNS
+
+SAMPLES = [
+    "# Title\n\n**bold** and *italic* and ***both***, ~~gone~~ and __under__",
+    "- item\n  * nested [link](https://example.com/a_b) `**code**`\n- [x] done\n- [ ] todo",
+    "> quote with https://example.com/x*y\n---\n![img](https://example.com/i.png) ~**tilde**",
+    "```python\n**not converted**\n```\n| a | b |\n|---|---|\n| 1 | 2 |",
+    "###### h6   \n####### seven\n* a *b* c*",
+]
+
+# Exponential time for a backtracking engine: a line of 40 "a" would take hours with re
+EVIL_PATTERN = r"(a|aa)+$"
+EVIL_LINE = "a" * 40 + "!"
+
+
+class NoLookaroundBackend(RegexBackend):
+    """The re engine behind the backend interface, refusing lookarounds as RE2 does."""
+
+    name = "no-lookaround"
+
+    def compile(self, pattern, flags=0):
+        if re.search(r"\(\?<?[=!]", pattern):
+            return None
+        return BackendPattern(self, re.compile(pattern, flags), pattern, flags)
+
+
+def random_markdown(rng):
+    return "".join(rng.choice("*_~[]()!`|#>- \nab:/.") for _ in range(rng.randint(0, 60)))
+
+
+class TestRegexBackends(unittest.TestCase):
+    def test_default(self):
+        converter = SlackMarkdownConverter()
+        self.assertEqual(repr(converter.regex_backend), "re")
+        self.assertEqual(converter.patterns, _BUILTIN_PATTERNS)
+        self.assertNotIn("regex backend", converter.explain())
+        with self.assertRaisesRegex(ValueError, "Unknown regex backend"):
+            SlackMarkdownConverter(regex_backend="pcre")
+
+    def test_fallback_to_re(self):
+        backend = NoLookaroundBackend()
+        self.assertIs(get_backend(backend), backend)
+        converter = SlackMarkdownConverter(regex_backend=backend)
+        converter.register_regex_plugin("todo", r"\bTODO\b", "*TODO*")
+        converter.register_regex_plugin("not_done", r"\bdone(?!!)", "finished")
+        explanation = converter.explain().splitlines()
+        self.assertEqual(explanation[-2], "regex backend: no-lookaround")
+        fallbacks = explanation[-1].split(": ")[1].split(", ")
+        self.assertIn("italic", fallbacks)
+        self.assertIn("plugin not_done", fallbacks)
+        self.assertNotIn("link", fallbacks)
+        self.assertNotIn("plugin todo", fallbacks)
+        self.assertNotEqual(converter.config_fingerprint(), SlackMarkdownConverter().config_fingerprint())
+
+    def test_same_output(self):
+        rng = random.Random(45)
+        inputs = SAMPLES + [random_markdown(rng) for _ in range(2000)]
+        for document_mode in (False, True):
+            reference = SlackMarkdownConverter(document_mode=document_mode)
+            converter = SlackMarkdownConverter(document_mode=document_mode, regex_backend=NoLookaroundBackend())
+            for target in (reference, converter):
+                target.register_regex_plugin("todo", r"\bTODO\b", "*TODO*")
+                target.add_rule("ticket", r"\b(PROJ-\d+)\b", r"<https://jira/\1|\1>")
+            for markdown in inputs + ["TODO: PROJ-1\n" + sample for sample in SAMPLES]:
+                self.assertEqual(converter.convert(markdown), reference.convert(markdown), markdown)
+
+    def test_pickle(self):
+        converter = SlackMarkdownConverter(regex_backend=NoLookaroundBackend())
+        converter.register_regex_plugin("todo", r"\bTODO\b", "*TODO*")
+        copy = pickle.loads(pickle.dumps(converter))
+        self.assertIsInstance(copy.plugins["todo"]["func"].pattern, BackendPattern)
+        for markdown in SAMPLES:
+            self.assertEqual(copy.convert("TODO " + markdown), converter.convert("TODO " + markdown))
+
+    @unittest.skipUnless(importlib.util.find_spec("re2"), "re2 is not installed")
+    def test_re2(self):
+        converter = SlackMarkdownConverter(regex_backend="re2")
+        for markdown in SAMPLES:
+            self.assertEqual(converter.convert(markdown), SlackMarkdownConverter().convert(markdown))
+        converter.register_regex_plugin("evil", EVIL_PATTERN, "matched")
+        started = time.perf_counter()
+        self.assertEqual(converter.convert(EVIL_LINE), EVIL_LINE)
+        self.assertLess(time.perf_counter() - started, 1.0)
+
+    @unittest.skipUnless(importlib.util.find_spec("regex"), "regex is not installed")
+    def test_regex_timeout(self):
+        converter = SlackMarkdownConverter(regex_backend=RegexModuleBackend(timeout=0.05))
+        for markdown in SAMPLES:
+            self.assertEqual(converter.convert(markdown), SlackMarkdownConverter().convert(markdown))
+        # A match that times out fails the conversion, which returns the input
+        converter.register_regex_plugin("evil", EVIL_PATTERN, "matched")
+        started = time.perf_counter()
+        with self.assertLogs(level="ERROR"):
+            self.assertEqual(converter.convert(EVIL_LINE), EVIL_LINE)
+        self.assertLess(time.perf_counter() - started, 1.0)
+
+    @unittest.skipUnless(importlib.util.find_spec("regex"), "regex is not installed")
+    def test_regex_flags(self):
+        backend = RegexModuleBackend()
+        for flags in (re.ASCII, re.IGNORECASE | re.MULTILINE, re.DOTALL | re.VERBOSE, re.UNICODE):
+            with self.subTest(flags=flags):
+                self.assertEqual(backend.compile(r"(?<!\w)\w+", flags).sub("W", "ǅé_ a\nB"),
+                                 re.compile(r"(?<!\w)\w+", flags).sub("W", "ǅé_ a\nB"))
+        self.assertEqual(backend.compile(r"\w+", re.ASCII).sub("W", "ǅé_"), "ǅéW")
+        self.assertIsNone(backend.compile("a", re.DEBUG))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+# exec command python3 -m unittest tests/test_cache.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import multiprocessing
+import pickle
+import tempfile
+import unittest
+from markdown_to_mrkdwn.cache import DiskCache
+from markdown_to_mrkdwn.converter import SlackMarkdownConverter
+
+DOCUMENT = "# Runbook\n\n" + "".join(f"- step **{i}** see [docs](https://example.com/{i})\n" for i in range(100))
+
+
+def convert_in_process(path, seed, queue):
+    converter = SlackMarkdownConverter(cache=DiskCache(path, max_bytes=200000, min_length=0))
+    outputs = []
+    for i in range(40):
+        markdown = f"# doc {(seed + i) % 15}\n" + DOCUMENT
+        outputs.append((markdown, converter.convert(markdown)))
+    queue.put(outputs)
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "cache.sqlite3")
+
+    def test_hit_skips_conversion(self):
+        converter = SlackMarkdownConverter(cache=DiskCache(self.path))
+        expected = SlackMarkdownConverter().convert(DOCUMENT)
+        self.assertEqual(converter.convert(DOCUMENT), expected)
+        self.assertEqual(converter.convert(DOCUMENT), expected)
+        stats = converter.get_stats()
+        self.assertEqual((stats["conversions"], stats["cache_hits"]), (1, 1))
+        # A new process, here a new converter and connection, reads the same entry
+        restarted = SlackMarkdownConverter(cache=DiskCache(self.path))
+        self.assertEqual(restarted.convert(DOCUMENT, with_plaintext=True),
+                         SlackMarkdownConverter().convert(DOCUMENT, with_plaintext=True))
+        self.assertEqual(restarted.convert(DOCUMENT), expected)
+        self.assertEqual(restarted.get_stats()["cache_hits"], 1)
+
+    def test_short_documents_are_not_cached(self):
+        cache = DiskCache(self.path, min_length=100)
+        converter = SlackMarkdownConverter(cache=cache)
+        converter.convert("**short**")
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_configuration_changes_key(self):
+        cache = DiskCache(self.path)
+        converter = SlackMarkdownConverter(cache=cache)
+        converter.convert(DOCUMENT)
+        linker = converter.register_dictionary_plugin("steps", {"step": "STEP"})
+        self.assertIn("STEP", converter.convert(DOCUMENT))
+        converter.update_dictionary_plugin("steps", add={"step": "Step"})
+        self.assertIn("Step", converter.convert(DOCUMENT))
+        self.assertEqual(len(linker), 1)
+        self.assertEqual(SlackMarkdownConverter(escape=True, cache=cache).convert("a & b" * 500), "a &amp; b" * 500)
+        self.assertEqual(cache.stats()["entries"], 4)
+        self.assertEqual(converter.get_stats()["cache_hits"], 0)
+
+    def test_closures_are_not_shared(self):
+        """Test that plugins differing only in what their closures capture never share entries"""
+        def make(user):
+            def mention(line):
+                return line.replace("@user", f"@{user}")
+            return mention
+
+        cache = DiskCache(self.path, min_length=0)
+        alice = SlackMarkdownConverter(cache=cache)
+        alice.register_plugin("mention", make("alice"))
+        bob = SlackMarkdownConverter(cache=cache)
+        bob.register_plugin("mention", make("bob"))
+        self.assertNotEqual(alice.config_fingerprint(), bob.config_fingerprint())
+        self.assertEqual(alice.convert("hi @user *x*"), "hi @alice _x_")
+        self.assertEqual(bob.convert("hi @user *x*"), "hi @bob _x_")
+        lambdas = SlackMarkdownConverter(cache=cache)
+        lambdas.register_plugin("mention", lambda line: line.replace("@user", "@carol"))
+        self.assertEqual(lambdas.convert("hi @user *x*"), "hi @carol _x_")
+        self.assertEqual(cache.stats()["entries"], 0)
+
+        # A cache_key makes the plugin's output cacheable again
+        first, second = make("alice"), make("alice")
+        first.cache_key = second.cache_key = "mention alice"
+        for func in (first, second):
+            converter = SlackMarkdownConverter(cache=cache)
+            converter.register_plugin("mention", func)
+            self.assertEqual(converter.convert("hi @user *x*"), "hi @alice _x_")
+        self.assertEqual(cache.stats()["entries"], 1)
+        self.assertEqual(converter.get_stats()["cache_hits"], 1)
+
+    def test_eviction(self):
+        cache = DiskCache(self.path, max_bytes=10000, min_length=0)
+        for i in range(20):
+            self.assertTrue(cache.put(str(i), "x" * 1000))
+            self.assertLessEqual(cache.stats()["bytes"], 10000)
+        self.assertEqual(cache.stats()["entries"], 10)
+        self.assertIsNone(cache.get("0"))
+        self.assertEqual(cache.get("19"), ("x" * 1000, None))
+        self.assertFalse(cache.put("big", "x" * 10001))
+        # Replacing an entry counts only its new size
+        self.assertTrue(cache.put("19", "x" * 500))
+        self.assertEqual(cache.stats(), {"entries": 10, "bytes": 9500})
+        self.assertEqual(cache._connection().execute("SELECT bytes FROM meta").fetchone()[0], 9500)
+        cache.clear()
+        self.assertEqual(cache.stats(), {"entries": 0, "bytes": 0})
+        self.assertEqual(cache._connection().execute("SELECT bytes FROM meta").fetchone()[0], 0)
+
+    def test_total_of_existing_database(self):
+        """Test that a database without the running total gets it from its entries"""
+        cache = DiskCache(self.path, min_length=0)
+        cache.put("a", "x" * 100)
+        cache._connection().execute("DROP TABLE meta")
+        cache.close()
+        cache = DiskCache(self.path, max_bytes=150, min_length=0)
+        self.assertTrue(cache.put("b", "x" * 100))
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats(), {"entries": 1, "bytes": 100})
+
+    def test_timeouts_are_not_cached(self):
+        async def slow(line):
+            await asyncio.sleep(1 if "slow" in line else 0)
+            return line.upper()
+
+        cache = DiskCache(self.path, min_length=0)
+        converter = SlackMarkdownConverter(cache=cache)
+        converter.register_plugin("slow", slow)
+        markdown = "a\n**slow**\nb"
+        self.assertEqual(asyncio.run(converter.convert_async(markdown, timeout=0.05)), "A\n*slow*\nB")
+        self.assertEqual(cache.stats()["entries"], 0)
+        converter.remove_plugin("slow")
+        converter.convert(markdown)
+        self.assertEqual(cache.stats()["entries"], 1)
+
+    def test_errors_are_misses(self):
+        cache = DiskCache(self.path)
+        cache.put("key", "value")
+        cache._connection().execute("DROP TABLE entries")
+        with self.assertLogs(level="WARNING"):
+            self.assertIsNone(cache.get("key"))
+        with self.assertLogs(level="WARNING"):
+            self.assertFalse(cache.put("key", "value"))
+        converter = SlackMarkdownConverter(cache=cache)
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(converter.convert(DOCUMENT), SlackMarkdownConverter().convert(DOCUMENT))
+
+    def test_pickle(self):
+        converter = SlackMarkdownConverter(cache=DiskCache(self.path))
+        converter.convert(DOCUMENT)
+        copy = pickle.loads(pickle.dumps(converter))
+        self.assertEqual(copy.convert(DOCUMENT), converter.convert(DOCUMENT))
+        self.assertEqual(copy.get_stats()["cache_hits"], 1)
+
+    def test_concurrent_processes(self):
+        DiskCache(self.path)
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        processes = [context.Process(target=convert_in_process, args=(self.path, seed, queue))
+                     for seed in range(4)]
+        for process in processes:
+            process.start()
+        results = [queue.get(timeout=60) for _ in processes]
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+        reference = SlackMarkdownConverter()
+        for outputs in results:
+            for markdown, output in outputs:
+                self.assertEqual(output, reference.convert(markdown))
+        self.assertLessEqual(DiskCache(self.path).stats()["bytes"], 200000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,8 +4,19 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import asyncio
+import pickle
+import threading
 import unittest
+import warnings
+from markdown_to_mrkdwn import converter as converter_module
 from markdown_to_mrkdwn.converter import SlackMarkdownConverter
+from markdown_to_mrkdwn.testing import FakeLookupBackend
+
+
+def tilde_fence(line):
+    """A picklable line plugin that turns "~~~" fences into backtick fences."""
+    return "```" if line == "~~~" else line
 
 
 class TestSlackMarkdownConverter(unittest.TestCase):
@@ -744,6 +755,715 @@ Code block with table:
         result = self.converter._convert_line(placeholder)
         self.assertEqual(result, placeholder)
 
+    def test_update_matches_full_conversion(self):
+        """Test that update() produces the same output as convert()"""
+        original = "# Title\n**bold**\n```\ncode *x*\n```\n| a | b |\n|---|---|\n| 1 | 2 |\ntail *i*"
+        edited = "# Title\n**bold** edit\n```\ncode *x*\n```\n| a | b |\n|---|---|\n| 1 | 2 |\ntail *i*"
+        output, state = self.converter.update(None, original)
+        self.assertEqual(output, self.converter.convert(original))
+        output, state = self.converter.update(state, edited)
+        self.assertEqual(output, self.converter.convert(edited))
+        self.assertEqual(state.reused_lines, len(state.lines) - 1)
+
+    def test_update_reuses_lines_between_edits(self):
+        """Test that unchanged lines between edits far apart are reused"""
+        lines = [f"line **{i}**" if i % 3 != 2 else "" for i in range(1000)]
+        _, state = self.converter.update(None, "\n".join(lines))
+        lines[1] += " edited"
+        lines[998] += " edited"
+        output, state = self.converter.update(state, "\n".join(lines))
+        self.assertEqual(output, self.converter.convert("\n".join(lines)))
+        self.assertEqual(state.reused_lines, 998)
+        lines.insert(500, "```")
+        del lines[200]
+        output, state = self.converter.update(state, "\n".join(lines))
+        self.assertEqual(output, self.converter.convert("\n".join(lines)))
+        self.assertEqual(state.reused_lines, 499)
+
+    def test_update_reconverts_lines_after_code_fence_change(self):
+        """Test that removing a fence re-converts the lines whose code block state changed"""
+        original = "intro\n```\n**not bold**\n```\n**bold**"
+        edited = "intro\n\n**not bold**\n```\n**bold**"
+        _, state = self.converter.update(None, original)
+        output, state = self.converter.update(state, edited)
+        self.assertEqual(output, self.converter.convert(edited))
+        self.assertEqual(output, "intro\n\n*not bold*\n```\n**bold**")
+
+    def test_update_reuses_unchanged_tables(self):
+        """Test that an unchanged table keeps its rendering while text around it changes"""
+        table = "| a | b |\n|---|---|\n| 1 | 2 |"
+        _, state = self.converter.update(None, f"before\n{table}\nafter")
+        rendered = dict(state.table_replacements)
+        output, state = self.converter.update(state, f"changed\n{table}\nafter")
+        self.assertEqual(output, "changed\n*a* | *b*\n1 | 2\nafter")
+        self.assertEqual(state.table_replacements, rendered)
+
+    def test_update_discards_state_after_plugin_change(self):
+        """Test that a state produced with a different plugin set is not reused"""
+        converter = SlackMarkdownConverter()
+        _, state = converter.update(None, "line 1\nline 2")
+        converter.register_plugin("upper", lambda line: line.upper(), scope="line")
+        output, state = converter.update(state, "line 1\nline 2")
+        self.assertEqual(output, "LINE 1\nLINE 2")
+        self.assertEqual(state.reused_lines, 0)
+
+    def test_update_with_empty_input(self):
+        output, state = self.converter.update(None, "")
+        self.assertEqual(output, "")
+        self.assertEqual(state.lines, [])
+
+    def test_convert_many_deduplicates_inputs(self):
+        """Test that identical inputs in a batch are converted once"""
+        converter = SlackMarkdownConverter()
+        calls = []
+        converter.register_plugin("count", lambda text: calls.append(text) or text, scope="global")
+        results = converter.convert_many(["**a**", "*b*", "**a**", "", "**a**"])
+        self.assertEqual(results, ["*a*", "_b_", "*a*", "", "*a*"])
+        self.assertEqual(len(calls), 2)
+        stats = converter.get_stats()
+        self.assertEqual((stats["conversions"], stats["coalesced"]), (2, 2))
+        converter.reset_stats()
+        self.assertEqual(set(converter.get_stats().values()), {0})
+
+    def test_concurrent_convert_shares_in_flight_work(self):
+        """Test that concurrent calls with the same input wait on one conversion"""
+        converter = SlackMarkdownConverter()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow(text):
+            calls.append(text)
+            started.set()
+            release.wait(5)
+            return text
+        converter.register_plugin("slow", slow, scope="global")
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(converter.convert("**x**")))
+                   for _ in range(3)]
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        for thread in threads[1:]:
+            thread.start()
+        while converter.get_stats()["coalesced"] < 2:
+            threading.Event().wait(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ["*x*"] * 3)
+        self.assertEqual(len(calls), 1)
+        stats = converter.get_stats()
+        self.assertEqual((stats["conversions"], stats["coalesced"]), (1, 2))
+
+    def test_stats_of_finished_threads(self):
+        """Test that conversions counted by threads that have exited are kept"""
+        converter = SlackMarkdownConverter()
+        for batch in range(2):
+            threads = [threading.Thread(target=converter.convert, args=(f"**{batch} {i}**",))
+                       for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        converter.convert("plain")
+        stats = converter.get_stats()
+        self.assertEqual((stats["conversions"], stats["skipped_documents"]), (8, 1))
+        self.assertEqual(pickle.loads(pickle.dumps(converter)).get_stats(), stats)
+        self.assertEqual(converter.clone().get_stats()["conversions"], 0)
+        converter.reset_stats()
+        self.assertEqual(set(converter.get_stats().values()), {0})
+        converter.convert("**again**")
+        self.assertEqual(converter.get_stats()["conversions"], 1)
+
+    def test_register_plugin_during_conversion(self):
+        """Test that a conversion keeps the plugins it started with"""
+        converter = SlackMarkdownConverter()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow(text):
+            started.set()
+            release.wait(5)
+            return text
+        converter.register_plugin("slow", slow, scope="global")
+
+        results = []
+        thread = threading.Thread(target=lambda: results.append(converter.convert("**x**")))
+        thread.start()
+        self.assertTrue(started.wait(5))
+        # Neither waits for the conversion in progress
+        converter.register_plugin("shout", lambda text: text + "!", scope="block")
+        converter.remove_plugin("slow")
+        release.set()
+        thread.join()
+        self.assertEqual(results, ["*x*"])
+        self.assertEqual(converter.convert("**x**"), "*x*!")
+        self.assertEqual(converter.plugin_order, ["shout"])
+
+    def test_register_plugins_while_converting(self):
+        """Test that threads converting never see a partly registered plugin"""
+        converter = SlackMarkdownConverter()
+        inputs = [f"# Item {index}\n- **bold** and `code` in [link](https://example.com/{index})"
+                  for index in range(50)]
+        expected = [converter.convert(markdown) for markdown in inputs]
+        stop = threading.Event()
+        outputs = []
+
+        def churn():
+            while not stop.is_set():
+                converter.register_regex_plugin("never", r"\bNEVER\b", "matched", timing="before")
+                converter.register_dictionary_plugin("terms", {"NEVER": "matched"})
+                converter.remove_plugin("never")
+                converter.remove_plugin("terms")
+
+        def convert():
+            for _ in range(10):
+                outputs.extend(converter.convert(markdown) == output for markdown, output in zip(inputs, expected))
+
+        registrar = threading.Thread(target=churn)
+        registrar.start()
+        threads = [threading.Thread(target=convert) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stop.set()
+        registrar.join()
+        self.assertEqual(len(outputs), 2000)
+        self.assertTrue(all(outputs))
+
+    def test_table_row_cap(self):
+        """Test that rows beyond max_table_rows are replaced by a marker"""
+        markdown = "| a | b |\n|---|---|\n| 1 | 2 |\n| 3 | 4 |\n| 5 | 6 |"
+        converter = SlackMarkdownConverter(max_table_rows=1)
+        self.assertEqual(converter.convert(markdown), "*a* | *b*\n1 | 2\n…2 more rows")
+        converter = SlackMarkdownConverter(max_table_rows=2)
+        self.assertEqual(converter.convert(markdown), "*a* | *b*\n1 | 2\n3 | 4\n…1 more row")
+        converter = SlackMarkdownConverter(max_table_rows=3)
+        self.assertEqual(converter.convert(markdown), "*a* | *b*\n1 | 2\n3 | 4\n5 | 6")
+
+    def test_table_row_cap_invalid(self):
+        with self.assertRaises(ValueError):
+            SlackMarkdownConverter(max_table_rows=-1)
+
+    def test_table_with_empty_cells(self):
+        markdown = "| a | b | c |\n|---|---|---|\n| 1 |   | 3 |\n|  | 2 |  |"
+        expected = "*a* | *b* | *c*\n1 |  | 3\n | 2 | "
+        self.assertEqual(self.converter.convert(markdown), expected)
+
+    def test_convert_with_plaintext(self):
+        """Test that the plain text fallback keeps content and drops formatting markers"""
+        markdown = """# Title
+**bold**, *italic* and ~~strike~~ with [a link](http://example.com) and `code`
+> quoted
+- item
+```
+raw **text**
+```
+| a | b |
+|---|---|
+| 1 | 2 |"""
+        mrkdwn, plaintext = self.converter.convert(markdown, with_plaintext=True)
+        self.assertEqual(mrkdwn, self.converter.convert(markdown))
+        self.assertEqual(plaintext, """Title
+bold, italic and strike with a link and code
+quoted
+• item
+raw **text**
+a | b
+1 | 2""")
+
+    def test_convert_with_plaintext_keeps_plain_underscores(self):
+        _, plaintext = self.converter.convert("snake_case_name and ***both***", with_plaintext=True)
+        self.assertEqual(plaintext, "snake_case_name and both")
+
+    def test_convert_with_plaintext_keeps_angle_brackets(self):
+        """Test that only links are unwrapped, not literal text between angle brackets"""
+        for text in ("if x < y and z > w then", "Vec<String>", "a <b|c d> e", "Map<K:V>"):
+            with self.subTest(text=text):
+                self.assertEqual(self.converter.convert(text, with_plaintext=True), (text, text))
+        _, plaintext = self.converter.convert(
+            "![img](https://example.com/i.png) <mailto:a@example.com> <@U123> <!here> Vec<T>",
+            with_plaintext=True)
+        self.assertEqual(plaintext, "https://example.com/i.png mailto:a@example.com @U123 !here Vec<T>")
+
+    def test_convert_with_plaintext_empty(self):
+        self.assertEqual(self.converter.convert("", with_plaintext=True), ("", ""))
+
+    def test_plain_text_skips_conversion(self):
+        """Test that text without Markdown syntax is returned without running the passes"""
+        converter = SlackMarkdownConverter()
+        self.assertEqual(converter.convert("  just a plain message\nwith two lines  "),
+                         "just a plain message\nwith two lines")
+        self.assertEqual(converter.convert("trailing space \nnext"), "trailing space\nnext")
+        self.assertEqual(converter.convert("windows\r\nline"), "windows\nline")
+        stats = converter.get_stats()
+        self.assertEqual(stats["skipped_documents"], 1)
+        self.assertEqual(stats["conversions"], 2)
+
+    def test_table_pass_skipped_without_pipes(self):
+        converter = SlackMarkdownConverter()
+        converter.convert("# Title")
+        converter.convert("| a | b |\n|---|---|\n| 1 | 2 |")
+        self.assertEqual(converter.get_stats()["skipped_tables"], 1)
+
+    def test_plugin_triggers(self):
+        """Test that plugins with trigger characters only run on documents containing them"""
+        converter = SlackMarkdownConverter()
+        calls = []
+
+        def mention(line):
+            calls.append(line)
+            return line.replace("@alice", "<@U123>")
+        converter.register_plugin("mention", mention, scope="line", triggers="@")
+        self.assertEqual(converter.convert("hello there"), "hello there")
+        self.assertEqual(converter.convert("**hi** there"), "*hi* there")
+        self.assertEqual(calls, [])
+        self.assertEqual(converter.convert("ping @alice"), "ping <@U123>")
+        self.assertEqual(calls, ["ping @alice"])
+        stats = converter.get_stats()
+        self.assertEqual(stats["skipped_documents"], 1)
+        self.assertEqual(stats["skipped_plugins"], 1)
+        self.assertEqual(converter.get_registered_plugins()["mention"]["triggers"], "@")
+
+    def test_after_plugin_triggered_by_converted_output(self):
+        """Test that after-line plugins still see characters added by the conversion"""
+        converter = SlackMarkdownConverter()
+        converter.register_regex_plugin("bullet", r"•", "-", triggers="•")
+        self.assertEqual(converter.convert("* item"), "- item")
+        # Entities added by escaping
+        converter = SlackMarkdownConverter(escape=True)
+        converter.register_regex_plugin("lt", r"&lt;", "[LT]", triggers="&")
+        self.assertEqual(converter.convert("a < b"), "a [LT] b")
+        # Characters in the replacements of added rules
+        for replacement in ("§", lambda match: "§"):
+            converter = SlackMarkdownConverter()
+            converter.add_rule("section", r"\bsect\b", replacement)
+            converter.register_regex_plugin("section", r"§", "S.", triggers="§")
+            with self.subTest(replacement=replacement):
+                self.assertEqual(converter.convert("see sect 3"), "see S. 3")
+
+    def test_plugin_triggers_invalid(self):
+        with self.assertRaises(ValueError):
+            self.converter.register_plugin("empty", lambda text: text, triggers="")
+
+    def test_document_mode_matches_line_mode(self):
+        """Test that document mode produces the same output as line-by-line conversion"""
+        markdown = """# Title  
+**bold** and *italic* and ***both*** with [link](http://example.com)
+- item
+   - [ ] task
+
+```python
+# not a heading **x**
+```
+| a | b |
+|---|---|
+| 1 | 2 |
+> quote
+---
+~~strike~~ 1234567"""
+        line_converter = SlackMarkdownConverter()
+        document_converter = SlackMarkdownConverter(document_mode=True)
+        for converter in (line_converter, document_converter):
+            converter.register_regex_plugin("thousands", r"(?<=\d)(?=(\d{3})+(?!\d))", ",")
+            converter.register_regex_plugin("quote", r"^> ", "| ", timing="before")
+            converter.register_plugin("shout", lambda line: line.replace("item", "ITEM"), scope="line")
+        self.assertEqual(document_converter.convert(markdown), line_converter.convert(markdown))
+        self.assertEqual(document_converter.convert(markdown, with_plaintext=True),
+                         line_converter.convert(markdown, with_plaintext=True))
+
+    def test_document_mode_falls_back_for_multiline_plugins(self):
+        """Test that a line plugin returning several lines is still handled like line mode"""
+        converter = SlackMarkdownConverter(document_mode=True)
+        converter.register_plugin("split", lambda line: line.replace(";", "\n"), scope="line", timing="before")
+        self.assertEqual(converter.convert("**a**;b  \nc"),
+                         SlackMarkdownConverter().convert("**a**\nb  \nc"))
+
+    def test_document_mode_incremental_update(self):
+        converter = SlackMarkdownConverter(document_mode=True)
+        _, state = converter.update(None, "```\n**x**\n```\n**y**")
+        output, state = converter.update(state, "```\n**x**\n```\n**z**")
+        self.assertEqual(output, "```\n**x**\n```\n*z*")
+        self.assertEqual(state.reused_lines, 3)
+
+    def test_lines_plugin_receives_prose_lines(self):
+        """Test that a lines plugin gets every prose line with its index in one call"""
+        calls = []
+
+        def number(lines):
+            calls.append(lines)
+            return [f"{line} ({index})" for index, line in lines]
+
+        self.converter.register_plugin("number", number, scope="lines", timing="before")
+        markdown = "# Title\n```\ncode\n```\n| a | b |\n|---|---|\n| 1 | 2 |\ntext"
+        self.assertEqual(self.converter.convert(markdown),
+                         "*Title (0)*\n```\ncode\n```\n*a* | *b*\n1 | 2\ntext (5)")
+        self.assertEqual(calls, [[(0, "# Title"), (5, "text")]])
+
+    def test_lines_plugin_timing_and_priority(self):
+        """Test that lines plugins run at the line plugin positions in priority order"""
+        self.converter.register_plugin("upper", lambda lines: [line.upper() for _, line in lines],
+                                       priority=10, scope="lines", timing="after")
+        self.converter.register_plugin("mark", lambda line: line + "!", priority=20, scope="line")
+        self.converter.register_plugin("bold", lambda lines: [f"**{line}**" for _, line in lines],
+                                       scope="lines", timing="before")
+        self.assertEqual(self.converter.convert("one\ntwo"), "*ONE*!\n*TWO*!")
+        self.assertEqual(self.converter.get_registered_plugins()["upper"]["scope"], "lines")
+
+    def test_lines_plugin_must_keep_line_count(self):
+        """Test that a lines plugin returning the wrong number of lines fails the conversion"""
+        self.converter.register_plugin("drop", lambda lines: lines[1:], scope="lines")
+        with self.assertLogs(level="ERROR"):
+            self.assertEqual(self.converter.convert("a\nb"), "a\nb")
+
+    def test_lines_plugin_skips_code_and_tables(self):
+        """Test that a lines plugin leaves code blocks and tables alone in both modes"""
+        markdown = "**a**\n```\n**b**\n```\n> *c*\n| x |\n|---|\n| y |"
+        for document_mode in (False, True):
+            converter = SlackMarkdownConverter(document_mode=document_mode)
+            converter.register_plugin("tag", lambda lines: [line + " #" for _, line in lines], scope="lines")
+            self.assertEqual(converter.convert(markdown), "*a* #\n```\n**b**\n```\n> _c_ #\n*x*\ny")
+            self.assertEqual(converter.convert(markdown, with_plaintext=True)[1],
+                             "a #\n**b**\nc #\nx\ny")
+
+    def test_inline_code_is_protected(self):
+        """Test that emphasis rules do not rewrite text inside inline code"""
+        self.assertEqual(self.converter.convert("`**not bold**` and **bold**"), "`**not bold**` and *bold*")
+        self.assertEqual(self.converter.convert("*a `b* c`"), "*a `b* c`")
+        self.assertEqual(self.converter.convert("`__init__` ~~gone~~"), "`__init__` ~gone~")
+
+    def test_urls_are_protected(self):
+        """Test that underscores and tildes in URLs are not turned into formatting"""
+        self.assertEqual(self.converter.convert("See https://example.com/pkg/__init__.py now"),
+                         "See https://example.com/pkg/__init__.py now")
+        self.assertEqual(self.converter.convert("[**docs**](https://example.com/a__b__c)"),
+                         "<https://example.com/a__b__c|*docs*>")
+        self.assertEqual(self.converter.convert("![img](https://example.com/~~x~~.png)"),
+                         "<https://example.com/~~x~~.png>")
+        self.assertEqual(self.converter.convert("**https://example.com** and *https://example.com/~me*."),
+                         "*https://example.com* and _https://example.com/~me_.")
+
+    def test_protected_spans_in_document_mode(self):
+        markdown = "`**x**` https://e.com/__a__\n[*t*](https://e.com/*b*)\n- `~~y~~`"
+        self.assertEqual(SlackMarkdownConverter(document_mode=True).convert(markdown),
+                         self.converter.convert(markdown))
+        self.assertEqual(self.converter.convert(markdown),
+                         "`**x**` https://e.com/__a__\n<https://e.com/*b*|_t_>\n• `~~y~~`")
+
+    def test_mask_characters_in_input(self):
+        """Test that text already containing the mask characters is still converted"""
+        self.assertEqual(self.converter.convert("\ue000 `**x**` \ue001"), "\ue000 `*x*` \ue001")
+
+    def test_escape(self):
+        """Test that escape mode escapes literal text but not generated syntax or code"""
+        converter = SlackMarkdownConverter(escape=True)
+        markdown = "> a < b & c\n[a<b](https://e.com/?x=1&y=2) `x<y`\n```\nif a < b:\n```\n>no quote"
+        expected = ("> a &lt; b &amp; c\n<https://e.com/?x=1&y=2|a&lt;b> `x<y`\n```\nif a < b:\n```\n"
+                    "&gt;no quote")
+        self.assertEqual(converter.convert(markdown), expected)
+        self.assertEqual(SlackMarkdownConverter(escape=True, document_mode=True).convert(markdown), expected)
+        self.assertEqual(converter.convert("AT&T"), "AT&amp;T")
+        self.assertEqual(self.converter.convert("AT&T <b>"), "AT&T <b>")
+
+    def test_escape_tables(self):
+        converter = SlackMarkdownConverter(escape=True)
+        self.assertEqual(converter.convert("| a<b | c&d |\n|---|---|\n| <x> | y |"),
+                         "*a&lt;b* | *c&amp;d*\n&lt;x&gt; | y")
+
+    def test_escape_after_plugins(self):
+        """Test that after plugins can add Slack syntax that is not escaped"""
+        converter = SlackMarkdownConverter(escape=True)
+        converter.register_regex_plugin("mention", r"@(\w+)", r"<@\1>")
+        self.assertEqual(converter.convert("@alice & <bob>"), "<@alice> &amp; &lt;bob&gt;")
+
+    def test_compact(self):
+        """Test that compact mode drops the avoidable bytes during conversion"""
+        cases = {
+            "---": "───",
+            "a ~**b** c": "a *b* c",
+            "~**b**": "*b*",
+            "a ** ** b ~~ ~~ c": "a   b   c",
+            "Password: ****": "Password: ****",
+            "rating ****": "rating ****",
+            "fill in: ____": "fill in: ____",
+            "a ____ b": "a ____ b",
+            "a ~~~~ b": "a ~~~~ b",
+            "~~~~": "~~~~",
+            "__a____b__ and *a**b*": "*ab* and *ab*",
+            "x **__y__** z": "x *y* z",
+            "~~a~~~~b~~~~c~~": "~abc~",
+            "```\ncode   \n\t\n```": "```\ncode\n\n```",
+            "a_b__c_d `**x** ~~y~~`": "a_b__c_d `**x** ~~y~~`",
+            "**bold** _italic_ ~~strike~~": "*bold* _italic_ ~strike~",
+        }
+        for options in ({}, {"document_mode": True}):
+            converter = SlackMarkdownConverter(compact=True, **options)
+            for markdown, expected in cases.items():
+                with self.subTest(options=options, markdown=markdown):
+                    self.assertEqual(converter.convert(markdown), expected)
+        self.assertEqual(self.converter.convert("a ~**b** c"), "a  *b*  c")
+        self.assertNotEqual(SlackMarkdownConverter(compact=True).config_fingerprint(),
+                            self.converter.config_fingerprint())
+        # The option is part of the fingerprint even with the same rules
+        compact = SlackMarkdownConverter(compact=True)
+        compact._config = self.converter._config
+        self.assertNotEqual(compact.config_fingerprint(), self.converter.config_fingerprint())
+
+    def test_compact_matches_regular_rendering(self):
+        """Test that compact output only differs where it saves bytes"""
+        markdown = "# Title\n**bold** and *italic* and ***both***\n- item\n> quote\n| a | b |\n|---|---|\n| 1 | 2 |"
+        compact = SlackMarkdownConverter(compact=True)
+        self.assertEqual(compact.convert(markdown), self.converter.convert(markdown))
+        self.assertEqual(compact.convert(markdown, with_plaintext=True),
+                         self.converter.convert(markdown, with_plaintext=True))
+
+    def test_watch_slow_inputs(self):
+        """Test that slow inputs are captured in a bounded buffer with their configuration"""
+        converter = SlackMarkdownConverter()
+        converter.register_regex_plugin("comma", r"(?<=\d)(?=(\d{3})+(?!\d))", ",")
+        converter.watch_slow_inputs(threshold=0, capacity=2)
+        for markdown in ("*one*", "*two*", "*three* 1000"):
+            converter.convert(markdown)
+        entries = converter.get_slow_inputs()
+        self.assertEqual([entry["markdown"] for entry in entries], ["*two*", "*three* 1000"])
+        self.assertEqual(entries[0]["fingerprint"], converter.config_fingerprint())
+        self.assertEqual(entries[0]["options"]["document_mode"], False)
+        self.assertGreaterEqual(entries[0]["seconds"], 0)
+        self.assertEqual(converter.get_stats()["slow_conversions"], 3)
+
+        converter.stop_watching_slow_inputs()
+        converter.convert("*four*")
+        self.assertEqual(converter.get_slow_inputs(), [])
+
+    def test_watch_slow_inputs_threshold_and_redaction(self):
+        converter = SlackMarkdownConverter()
+        converter.watch_slow_inputs(threshold=60)
+        converter.convert("**fast**")
+        self.assertEqual(converter.get_slow_inputs(), [])
+
+        converter.watch_slow_inputs(threshold=0, redact=True)
+        converter.convert("**Secret** 42 [link](https://e.com)")
+        self.assertEqual(converter.get_slow_inputs()[0]["markdown"], "**xxxxxx** 00 [xxxx](xxxxx://x.xxx)")
+        converter.watch_slow_inputs(threshold=0, redact=lambda text: "hidden")
+        converter.convert("**Secret**")
+        self.assertEqual(converter.get_slow_inputs()[0]["markdown"], "hidden")
+
+        with self.assertRaises(ValueError):
+            converter.watch_slow_inputs(threshold=-1)
+        with self.assertRaises(ValueError):
+            converter.watch_slow_inputs(capacity=0)
+
+    def test_config_fingerprint(self):
+        first = SlackMarkdownConverter()
+        second = SlackMarkdownConverter()
+        self.assertEqual(first.config_fingerprint(), second.config_fingerprint())
+        first.register_regex_plugin("comma", r"\d", ",")
+        self.assertNotEqual(first.config_fingerprint(), second.config_fingerprint())
+        second.register_regex_plugin("comma", r"\d", ",")
+        self.assertEqual(first.config_fingerprint(), second.config_fingerprint())
+        self.assertNotEqual(SlackMarkdownConverter(escape=True).config_fingerprint(), second.config_fingerprint())
+
+    def test_pickle(self):
+        converter = SlackMarkdownConverter(escape=True)
+        converter.register_dictionary_plugin("people", {"alice": "<@U1>"})
+        converter.register_regex_plugin("comma", r"(\d)(\d{3})\b", r"\1,\2")
+        copy = pickle.loads(pickle.dumps(converter))
+        markdown = "**alice** paid 1000 & more"
+        self.assertEqual(copy.convert(markdown), converter.convert(markdown))
+        self.assertEqual(copy.config_fingerprint(), converter.config_fingerprint())
+
+
+class TestParallelConversion(unittest.TestCase):
+    def setUp(self):
+        self.chunk_lines = converter_module._PARALLEL_CHUNK_LINES
+        converter_module._PARALLEL_CHUNK_LINES = 4
+        self.markdown = "\n".join([
+            "# Report", "", "- **one**", "- [two](https://e.com)", "",
+            "```python", "x = **1**", "", "- not a list", "```", "",
+            "| a | b |", "|---|---|", "| 1 | 2 |", "",
+            "> quoted *text*", "1. first", "~~~", "**not bold**", "~~~",
+            "```", "code", "```", "text ~~struck~~", "", "## End",
+        ] * 3)
+
+    def tearDown(self):
+        converter_module._PARALLEL_CHUNK_LINES = self.chunk_lines
+
+    def test_matches_serial_conversion(self):
+        for options in ({}, {"document_mode": True}, {"escape": True}):
+            converter = SlackMarkdownConverter(**options)
+            with self.subTest(options=options):
+                self.assertEqual(converter.convert(self.markdown, workers=2), converter.convert(self.markdown))
+                self.assertEqual(converter.convert(self.markdown, with_plaintext=True, workers=3),
+                                 converter.convert(self.markdown, with_plaintext=True))
+                self.assertGreater(converter.get_stats()["parallel_chunks"], 0)
+
+    def test_plugin_changing_code_fences(self):
+        # The fences are only known after the plugin ran, so the chunks after
+        # the first "~~~" start with the wrong code block state
+        markdown = "~~~\n" + "**code**\n" * 40 + "~~~\n" + "**bold**\n" * 40
+        converter = SlackMarkdownConverter()
+        converter.register_plugin("tilde_fence", tilde_fence, scope="line", timing="before")
+        result = converter.convert(markdown, workers=2)
+        self.assertEqual(result, converter.convert(markdown))
+        self.assertEqual(result.count("**code**"), 40)
+        self.assertEqual(result.count("*bold*"), 40)
+
+    def test_unpicklable_plugin_converts_serially(self):
+        converter = SlackMarkdownConverter()
+        converter.register_plugin("upper", lambda line: line.upper(), scope="line")
+        self.assertEqual(converter.convert(self.markdown, workers=2), converter.convert(self.markdown))
+        self.assertEqual(converter.get_stats()["parallel_chunks"], 0)
+
+    def test_convert_ex(self):
+        converter = SlackMarkdownConverter()
+        parallel = converter.convert_ex(self.markdown, workers=2)
+        serial = converter.convert_ex(self.markdown)
+        self.assertEqual((parallel.text, parallel.links, parallel.tables, parallel.code_blocks),
+                         (serial.text, serial.links, serial.tables, serial.code_blocks))
+        self.assertEqual((serial.links, serial.tables, serial.code_blocks), (["https://e.com"] * 3, 3, 6))
+
+    def test_small_documents_and_invalid_workers(self):
+        converter = SlackMarkdownConverter()
+        self.assertEqual(converter.convert("**a**\n*b*", workers=4), "*a*\n_b_")
+        self.assertEqual(converter.get_stats()["parallel_chunks"], 0)
+        with self.assertRaises(ValueError):
+            converter.convert("**a**", workers=0)
+
+
+class TestAsyncPlugins(unittest.TestCase):
+    def setUp(self):
+        self.backend = FakeLookupBackend({"alice": "U1", "bob": "U2", "slow": "U3"}, latency=0.02)
+        self.converter = SlackMarkdownConverter()
+        self.converter.register_plugin("mentions", self.backend.mention_plugin(), scope="line")
+
+    def test_convert_async(self):
+        markdown = "**hi** @alice and @bob\n- @carol\n`@alice`"
+        result = asyncio.run(self.converter.convert_async(markdown))
+        self.assertEqual(result, "*hi* <@U1> and <@U2>\n• @carol\n`<@U1>`")
+        self.assertEqual(sorted(self.backend.calls), ["alice", "alice", "bob", "carol"])
+
+    def test_lookups_run_concurrently_within_limit(self):
+        markdown = "\n".join(f"- @alice {index}" for index in range(20))
+        mention = self.backend.mention_plugin()
+        callers = set()
+
+        async def recording(line):
+            callers.add((asyncio.get_running_loop(), threading.get_ident()))
+            return await mention(line)
+        self.converter.register_plugin("mentions", recording, scope="line")
+
+        async def main():
+            result = await self.converter.convert_async(markdown, concurrency=5)
+            return result, asyncio.get_running_loop(), threading.get_ident()
+
+        result, loop, thread = asyncio.run(main())
+        self.assertEqual(result, "\n".join(f"• <@U1> {index}" for index in range(20)))
+        # Started together on the caller's loop, at most five at a time
+        self.assertEqual(callers, {(loop, thread)})
+        self.assertEqual(self.backend.max_in_flight, 5)
+
+    def test_timeout_keeps_line(self):
+        self.backend.delays["slow"] = 5
+        result = asyncio.run(self.converter.convert_async("@slow\n@alice", timeout=0.2))
+        self.assertEqual(result, "@slow\n<@U1>")
+        self.assertEqual(self.converter.get_stats()["plugin_timeouts"], 1)
+
+    def test_matches_sync_plugins(self):
+        def mentions(line):
+            return line.replace("@alice", "<@U1>").replace("@bob", "<@U2>")
+
+        async def lines_upper(lines):
+            await asyncio.sleep(0)
+            return [line.upper() if "todo" in line else line for _, line in lines]
+
+        def lines_upper_sync(lines):
+            return [line.upper() if "todo" in line else line for _, line in lines]
+
+        markdown = "# @alice\n\n| a | b |\n|---|---|\n| @bob | 1 |\n\n```\n@bob\n```\n> todo @bob *now*"
+        for options in ({}, {"document_mode": True}):
+            sync = SlackMarkdownConverter(**options)
+            sync.register_plugin("mentions", mentions, scope="line", timing="before")
+            sync.register_plugin("upper", lines_upper_sync, scope="lines")
+            converter = SlackMarkdownConverter(**options)
+            converter.register_plugin("mentions", self.backend.mention_plugin(), scope="line", timing="before")
+            converter.register_plugin("upper", lines_upper, scope="lines")
+            with self.subTest(options=options):
+                self.assertEqual(asyncio.run(converter.convert_async(markdown, with_plaintext=True)),
+                                 sync.convert(markdown, with_plaintext=True))
+                # Without an event loop of its own, convert() runs coroutine plugins on a new one
+                self.assertEqual(converter.convert(markdown), sync.convert(markdown))
+
+    def test_convert_inside_event_loop(self):
+        """Test that convert() called from a coroutine still runs coroutine plugins"""
+        async def shout(line):
+            await asyncio.sleep(0)
+            return line.upper()
+
+        async def main():
+            converter = SlackMarkdownConverter()
+            converter.register_plugin("shout", shout, scope="line")
+            return converter.convert("**hi** there\n- item", with_plaintext=True)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            self.assertEqual(asyncio.run(main()), ("*HI* THERE\n• ITEM", "HI THERE\n• ITEM"))
+
+    def test_global_and_block_plugins(self):
+        async def footer(text):
+            return text + "\n(via bot)"
+
+        self.converter.register_plugin("footer", footer, scope="block")
+        self.assertEqual(asyncio.run(self.converter.convert_async("@bob **done**")), "<@U2> *done*\n(via bot)")
+        with self.assertRaises(ValueError):
+            asyncio.run(self.converter.convert_async("@bob", concurrency=0))
+
+
+class TestConversionResult(unittest.TestCase):
+    markdown = "\n".join([
+        "# Release notes", "See [the docs](https://docs.example.com) and https://example.com/a.",
+        "![diagram](https://img.example.com/d.png) `https://not.a/link`",
+        "```", "[in code](https://code.example.com)", "```",
+        "| a | b |", "|---|---|", "| 1 | 2 |", "", "```python", "x = 1", "```",
+    ])
+
+    def test_metadata(self):
+        for options in ({}, {"document_mode": True}, {"escape": True}):
+            converter = SlackMarkdownConverter(**options)
+            with self.subTest(options=options):
+                result = converter.convert_ex(self.markdown)
+                self.assertEqual(result.text, converter.convert(self.markdown))
+                self.assertEqual(result.links, ["https://docs.example.com", "https://example.com/a",
+                                                "https://img.example.com/d.png"])
+                self.assertEqual((result.tables, result.code_blocks), (1, 2))
+                self.assertEqual(result.length, len(result.text))
+                self.assertFalse(result.plugins_changed)
+                self.assertIsNone(result.plaintext)
+                with self.assertRaises(AttributeError):
+                    result.extra = 1
+
+    def test_plaintext_and_plain_documents(self):
+        converter = SlackMarkdownConverter()
+        result = converter.convert_ex(self.markdown, with_plaintext=True)
+        self.assertEqual((result.text, result.plaintext), converter.convert(self.markdown, with_plaintext=True))
+        result = converter.convert_ex("  plain text, see https://example.com  ")
+        self.assertEqual((result.text, result.links, result.tables), ("plain text, see https://example.com",
+                                                                      ["https://example.com"], 0))
+        self.assertEqual(converter.convert_ex("").text, "")
+
+    def test_plugins_changed(self):
+        for scope in ("global", "line", "block"):
+            converter = SlackMarkdownConverter()
+            converter.register_plugin("shout", lambda text: text.replace("notes", "NOTES"), scope=scope)
+            with self.subTest(scope=scope):
+                self.assertTrue(converter.convert_ex(self.markdown).plugins_changed)
+                self.assertFalse(converter.convert_ex("**unrelated**").plugins_changed)
+        converter = SlackMarkdownConverter(document_mode=True)
+        converter.register_regex_plugin("year", r"20(\d\d)", r"'\1")
+        self.assertFalse(converter.convert_ex(self.markdown).plugins_changed)
+        self.assertTrue(converter.convert_ex("**2026**").plugins_changed)
+
 
 if __name__ == "__main__":
     unittest.main()
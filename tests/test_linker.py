@@ -0,0 +1,112 @@
+# exec command python3 -m unittest tests/test_linker.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import unittest
+from markdown_to_mrkdwn.converter import SlackMarkdownConverter
+from markdown_to_mrkdwn.linker import TermLinker
+
+
+class TestTermLinker(unittest.TestCase):
+    def test_replace(self):
+        linker = TermLinker({"alice": "<@U1>", "bob": "<@U2>"})
+        self.assertEqual(linker.replace("alice and bob"), "<@U1> and <@U2>")
+
+    def test_leftmost_longest(self):
+        linker = TermLinker({"PROJ": "p", "PROJ-1": "one", "J-12": "x"})
+        self.assertEqual(linker.replace("PROJ-12 PROJ-1 PROJ"), "p-12 one p")
+        linker = TermLinker({"ab": "1", "abc": "2", "bcd": "3"}, whole_words=False)
+        self.assertEqual(linker.replace("abcd"), "2d")
+
+    def test_whole_words(self):
+        self.assertEqual(TermLinker({"api": "API"}).replace("api rapid api_key @api"), "API rapid api_key @API")
+        self.assertEqual(TermLinker({"api": "API"}, whole_words=False).replace("rapid"), "rAPId")
+        self.assertEqual(TermLinker({"@al": "<@U1>"}).replace("x@al @alan"), "x<@U1> @alan")
+
+    def test_protected_spans(self):
+        linker = TermLinker({"alice": "<@U1>"})
+        self.assertEqual(linker.replace("`alice` <http://x|alice> [alice](http://alice) https://alice.dev alice"),
+                         "`alice` <http://x|alice> [alice](http://alice) https://alice.dev <@U1>")
+
+    def test_incremental_updates(self):
+        linker = TermLinker({"alice": "A"})
+        self.assertEqual(linker.replace("alice alicia"), "A alicia")
+        version = linker.version
+        linker.add({"alicia": "B", "alice": "C"})
+        self.assertEqual(linker.replace("alice alicia"), "C B")
+        self.assertEqual(linker.remove(["alice", "nobody"]), 1)
+        self.assertEqual(linker.replace("alice alicia"), "alice B")
+        self.assertGreater(linker.version, version)
+        self.assertEqual(len(linker), 1)
+        self.assertNotIn("alice", linker)
+
+    def test_changes_are_copies(self):
+        """Test that changes publish a new automaton and scans never wait for them"""
+        linker = TermLinker({"alice": "A", "bob": "B"})
+        copy = linker.copy()
+        copy.add({"carol": "C", "alice": "X"})
+        copy.remove(["bob"])
+        self.assertEqual(linker.replace("alice bob carol"), "A B carol")
+        self.assertEqual(copy.replace("alice bob carol"), "X bob C")
+        self.assertNotEqual(copy.digest(), linker.digest())
+        # A writer holding the lock does not block a scan
+        with linker._lock:
+            self.assertEqual(linker([(0, "alice"), (1, "bob")]), ["A", "B"])
+
+    def test_invalid_terms(self):
+        with self.assertRaises(ValueError):
+            TermLinker({"": "x"})
+        with self.assertRaises(ValueError):
+            TermLinker({"a\nb": "x"})
+
+
+class TestDictionaryPlugin(unittest.TestCase):
+    def setUp(self):
+        self.converter = SlackMarkdownConverter()
+        self.converter.register_dictionary_plugin("people", {"alice": "<@U1>", "OPS": "<https://jira/OPS|OPS>"})
+
+    def test_convert(self):
+        markdown = "**alice** owns OPS\n```\nalice\n```\n| alice |\n|---|\n| OPS |\n[OPS](http://ops)"
+        self.assertEqual(self.converter.convert(markdown),
+                         "*<@U1>* owns <https://jira/OPS|OPS>\n```\nalice\n```\n*alice*\nOPS\n<http://ops|OPS>")
+        self.assertEqual(self.converter.get_registered_plugins()["people"]["scope"], "lines")
+
+    def test_update_dictionary_plugin(self):
+        _, state = self.converter.update(None, "hi alice\nbob")
+        self.converter.update_dictionary_plugin("people", add={"bob": "<@U2>"}, remove=["alice"])
+        output, state = self.converter.update(state, "hi alice\nbob")
+        self.assertEqual(output, "hi alice\n<@U2>")
+        self.assertEqual(state.reused_lines, 0)
+
+    def test_update_during_conversion(self):
+        """Test that a conversion in progress finishes with the dictionary it started with"""
+        converter = self.converter
+        linker = converter.plugins["people"]["func"]
+
+        def update(pairs):
+            if "bob" not in converter.plugins["people"]["func"]:
+                converter.update_dictionary_plugin("people", add={"bob": "<@U2>"}, remove=["alice"])
+            return [line for _, line in pairs]
+        converter.register_plugin("update", update, priority=10, scope="lines")
+        self.assertEqual(converter.convert("alice\nbob"), "<@U1>\nbob")
+        self.assertEqual(converter.convert("alice\nbob"), "alice\n<@U2>")
+        self.assertIsNot(converter.plugins["people"]["func"], linker)
+        self.assertEqual(linker.replace("alice bob"), "<@U1> bob")
+
+    def test_update_unknown_plugin(self):
+        self.converter.register_plugin("plain", lambda line: line)
+        with self.assertRaises(ValueError):
+            self.converter.update_dictionary_plugin("plain", add={"x": "y"})
+        with self.assertRaises(ValueError):
+            self.converter.update_dictionary_plugin("missing", add={"x": "y"})
+
+    def test_document_mode(self):
+        converter = SlackMarkdownConverter(document_mode=True)
+        converter.register_dictionary_plugin("people", {"alice": "<@U1>"}, timing="before")
+        self.assertEqual(converter.convert("# alice\n`alice`"), "*<@U1>*\n`alice`")
+
+
+if __name__ == "__main__":
+    unittest.main()
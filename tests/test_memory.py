@@ -0,0 +1,65 @@
+# exec command python3 -m unittest tests/test_memory.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import tracemalloc
+import unittest
+from benchmarks import memory
+from benchmarks.corpus import generate_corpus, generate_document
+from markdown_to_mrkdwn.converter import SlackMarkdownConverter
+
+# The most memory a whole conversion may use, in bytes per input character
+MAX_PEAK_PER_CHAR = 16
+
+
+@unittest.skipUnless(hasattr(tracemalloc, "reset_peak"), "tracemalloc.reset_peak needs Python 3.9")
+class TestMemoryBenchmark(unittest.TestCase):
+    def test_corpus_is_deterministic(self):
+        self.assertEqual(generate_document(5000, seed=3), generate_document(5000, seed=3))
+        self.assertGreaterEqual(len(generate_document(5000)), 5000)
+        documents = generate_corpus(3, 2000, seed=1)
+        self.assertEqual(len(set(documents)), 3)
+
+    def test_pipeline_matches_convert(self):
+        for mode, (options, unicode) in memory.MODES.items():
+            converter = SlackMarkdownConverter(**options)
+            for markdown in generate_corpus(5, 3000, unicode=unicode):
+                with self.subTest(mode=mode):
+                    data = {"markdown": markdown}
+                    for _, stage in memory.pipeline(converter):
+                        stage(data)
+                    self.assertEqual(data["result"], converter.convert(markdown))
+
+    def test_peak_per_character(self):
+        results = memory.run(sizes=(20000,))
+        for key, stages in results.items():
+            with self.subTest(document=key):
+                self.assertLessEqual(stages["convert"]["peak"], MAX_PEAK_PER_CHAR * 20000)
+                # The encoding check of the default utf-8 converter makes no copies
+                self.assertLess(stages["encoding"]["peak"], 1024)
+
+    def test_compare(self):
+        baseline = {"line/100": {"lines": {"peak": 10000, "retained": 0, "blocks": 100}}}
+        same = {"line/100": {"lines": {"peak": 10500, "retained": 0, "blocks": 105}}}
+        self.assertEqual(memory.compare(same, baseline), [])
+        grown = {"line/100": {"lines": {"peak": 20000, "retained": 0, "blocks": 1000}}}
+        regressions = memory.compare(grown, baseline)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn("line/100 lines: peak 20000", regressions[0])
+        # Stages missing from the baseline are not compared
+        self.assertEqual(memory.compare({"line/200": same["line/100"]}, baseline), [])
+
+    def test_baseline_covers_default_run(self):
+        with open(memory.BASELINE, encoding="utf-8") as baseline:
+            saved = json.load(baseline)
+        stages = [name for name, _ in memory.pipeline(SlackMarkdownConverter())] + ["convert"]
+        for mode in memory.MODES:
+            for size in memory.SIZES:
+                self.assertEqual(list(saved["results"][f"{mode}/{size}"]), stages)
+
+
+if __name__ == '__main__':
+    unittest.main()
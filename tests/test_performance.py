@@ -0,0 +1,174 @@
+# exec command python3 -m unittest tests/test_performance.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import math
+import random
+import time
+import unittest
+from markdown_to_mrkdwn.converter import SlackMarkdownConverter
+
+# The largest growth exponent accepted for any rule or pass: 1.0 is linear,
+# 2.0 quadratic. Raise it with MARKDOWN_TO_MRKDWN_MAX_GROWTH on noisy machines.
+MAX_GROWTH = float(os.environ.get("MARKDOWN_TO_MRKDWN_MAX_GROWTH", "1.5"))
+
+# Input sizes in characters, each twice the previous one
+SIZES = (4000, 8000, 16000)
+
+# Inputs that make backtracking regexes or naive scans rescan the text
+ADVERSARIAL_INPUTS = {
+    "stars": lambda n: "*" * n,
+    "underscores": lambda n: "_" * n,
+    "tildes": lambda n: "~" * n,
+    "brackets": lambda n: "[" * n,
+    "pipes": lambda n: "|" * n,
+    "backticks": lambda n: "`" * n,
+    "unclosed_backtick": lambda n: "`" + "a" * n,
+    "unclosed_backticks": lambda n: "`a" * (n // 2),
+    "image_openers": lambda n: "![" * (n // 2),
+    "link_openers": lambda n: "[a](" * (n // 4),
+    "brackets_then_link": lambda n: "[" * n + "](x)",
+    "heading_spaces": lambda n: "# a" + " " * n + "b",
+    "bold_openers": lambda n: "**a" * (n // 3),
+    "underscore_bold_openers": lambda n: "__a" * (n // 3),
+    "strike_openers": lambda n: "~~a" * (n // 3),
+    "tilde_bold_openers": lambda n: " ~**a" * (n // 5),
+    "italic_words": lambda n: "*a " * (n // 3),
+    "url_dots": lambda n: "http://" + "." * n,
+    "indented_list": lambda n: " " * n + "- a",
+    "unclosed_task": lambda n: "- [ ] " + "[" * n,
+    "quotes": lambda n: "> " * (n // 2),
+    "tables": lambda n: "|a|b|\n|-|-|\n|1|2|\n\n" * (n // 20),
+    "table_rows": lambda n: "|a|b|\n|-|-|\n" + "|1|2|\n" * (n // 6),
+    "tables_in_fences": lambda n: "```\n|a|\n|-|\n```\n" * (n // 18),
+    "tables_after_fence": lambda n: "```\n" + "x\n" * (n // 4) + "```\n" + "|a|\n|-|\n|1|\n\n" * (n // 20),
+    "short_lines": lambda n: "*a*\n" * (n // 4),
+    "adjacent_spans": lambda n: "~a~" * (n // 3),
+    "empty_markers": lambda n: "** " * (n // 3),
+}
+
+# Below this many seconds for the largest input, timings are dominated by
+# call overhead and no growth can be measured
+NEGLIGIBLE_TIME = 2e-5
+
+# Characters the random search combines into repeated motifs
+FUZZ_ALPHABET = "*_~[]()!`|#>- \nah:/."
+
+
+def _best_time(func, text):
+    """Time func(text), repeating it until a measurement is long enough to be reliable."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func(text)
+        elapsed = time.perf_counter() - started
+        if elapsed >= 0.0005:
+            break
+        number *= 2
+    best = elapsed
+    for _ in range(2):
+        started = time.perf_counter()
+        for _ in range(number):
+            func(text)
+        best = min(best, time.perf_counter() - started)
+    return best / number
+
+
+def growth_exponent(func, generate, sizes=SIZES):
+    """
+    Fit the time of func over inputs of doubling size to c * n ** k.
+
+    Args:
+        func: Called with each generated input
+        generate: Builds an input of about the given size
+
+    Returns:
+        float: The least-squares estimate of k, or 0.0 when even the largest
+        input takes a negligible time
+    """
+    timings = [_best_time(func, generate(size)) for size in sizes]
+    if timings[-1] < NEGLIGIBLE_TIME:
+        return 0.0
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(timing) for timing in timings]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+            / sum((x - mean_x) ** 2 for x in xs))
+
+
+class TestComplexity(unittest.TestCase):
+    def setUp(self):
+        self.converter = SlackMarkdownConverter()
+
+    def assertLinear(self, func, name, generate):
+        exponent = growth_exponent(func, generate)
+        if exponent > MAX_GROWTH:
+            # Retry once so that a burst of load on the machine is not reported
+            exponent = min(exponent, growth_exponent(func, generate))
+        self.assertLessEqual(exponent, MAX_GROWTH,
+                             f"{name} grows like n ** {exponent:.2f}")
+
+    def test_rules(self):
+        compact = SlackMarkdownConverter(compact=True).patterns
+        for pattern, replacement in self.converter.patterns + [rule for rule in compact
+                                                               if rule not in self.converter.patterns]:
+            for name, generate in ADVERSARIAL_INPUTS.items():
+                with self.subTest(rule=pattern.pattern, input=name):
+                    self.assertLinear(lambda text: pattern.sub(replacement, text),
+                                      f"{pattern.pattern!r} on {name}", generate)
+
+    def test_table_pass(self):
+        for name, generate in ADVERSARIAL_INPUTS.items():
+            with self.subTest(input=name):
+                self.assertLinear(lambda text: self.converter._convert_tables(text),
+                                  f"table pass on {name}", generate)
+
+    def test_convert(self):
+        converters = {
+            "line mode": SlackMarkdownConverter(),
+            "document mode": SlackMarkdownConverter(document_mode=True),
+            "escape": SlackMarkdownConverter(escape=True),
+            "compact": SlackMarkdownConverter(compact=True),
+        }
+        for mode, converter in converters.items():
+            for name, generate in ADVERSARIAL_INPUTS.items():
+                with self.subTest(mode=mode, input=name):
+                    self.assertLinear(lambda text: converter.convert(text, with_plaintext=True),
+                                      f"{mode} conversion of {name}", generate)
+
+    def test_random_search(self):
+        # Search for the motif whose repetition costs the most time per
+        # character, then check that the worst one found still scales linearly
+        rng = random.Random(20240601)
+        converters = [SlackMarkdownConverter(), SlackMarkdownConverter(document_mode=True)]
+        size = SIZES[0]
+
+        def cost(motif, converter):
+            text = motif * (size // len(motif))
+            return _best_time(converter.convert, text) / len(text)
+
+        for converter in converters:
+            worst = "".join(rng.choice(FUZZ_ALPHABET) for _ in range(4))
+            worst_cost = cost(worst, converter)
+            for _ in range(30):
+                motif = list(worst)
+                position = rng.randrange(len(motif) + 1)
+                if len(motif) > 1 and rng.random() < 0.3:
+                    del motif[min(position, len(motif) - 1)]
+                else:
+                    motif.insert(position, rng.choice(FUZZ_ALPHABET))
+                motif = "".join(motif)[:12]
+                candidate_cost = cost(motif, converter)
+                if candidate_cost > worst_cost:
+                    worst, worst_cost = motif, candidate_cost
+            with self.subTest(document_mode=converter.document_mode, motif=worst):
+                self.assertLinear(converter.convert, f"conversion of {worst!r} repeated",
+                                  lambda n: worst * (n // len(worst)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+# exec command python3 -m unittest tests/test_registry.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pickle
+import threading
+import unittest
+from markdown_to_mrkdwn.converter import SlackMarkdownConverter
+from markdown_to_mrkdwn.registry import ConverterRegistry
+
+MARKDOWN = "**@alice** fixed PROJ-7, see ACME-1"
+
+
+def base_converter():
+    converter = SlackMarkdownConverter(document_mode=True)
+    converter.register_dictionary_plugin("people", {"@alice": "<@U1>"})
+    converter.register_regex_plugin("projects", r"\bPROJ-(\d+)\b", r"<https://jira/PROJ-\1|PROJ-\1>")
+    return converter
+
+
+class TestClone(unittest.TestCase):
+    def test_clone_is_independent(self):
+        base = base_converter()
+        expected = base.convert(MARKDOWN)
+        clone = base.clone()
+        self.assertIs(clone.patterns[0], base.patterns[0])
+        self.assertIs(clone.plugins["projects"], base.plugins["projects"])
+        self.assertEqual(clone.config_fingerprint(), base.config_fingerprint())
+        self.assertEqual(clone.convert(MARKDOWN), expected)
+
+        clone.register_regex_plugin("acme", r"\bACME-(\d+)\b", r"<https://acme/\1|ACME-\1>")
+        clone.remove_plugin("projects")
+        clone.add_rule("shout", r"fixed", "FIXED")
+        self.assertEqual(clone.convert(MARKDOWN), "*<@U1>* FIXED PROJ-7, see <https://acme/1|ACME-1>")
+        self.assertEqual(base.convert(MARKDOWN), expected)
+        self.assertEqual(base.plugin_order, ["people", "projects"])
+        self.assertNotEqual(clone.config_fingerprint(), base.config_fingerprint())
+        self.assertEqual(clone.get_stats()["conversions"], 2)
+
+    def test_dictionary_copy_on_write(self):
+        base = base_converter()
+        linker = base.plugins["people"]["func"]
+        clone = base.clone()
+        clone.update_dictionary_plugin("people", add={"@bob": "<@U2>"})
+        self.assertIsNot(clone.plugins["people"]["func"], linker)
+        self.assertEqual(clone.convert("@alice @bob"), "<@U1> <@U2>")
+        self.assertEqual(base.convert("@alice @bob"), "<@U1> @bob")
+        self.assertEqual(len(linker), 1)
+        # The base copies the shared dictionary as well before changing it
+        base.update_dictionary_plugin("people", remove=["@alice"])
+        self.assertEqual(clone.convert("@alice"), "<@U1>")
+        self.assertEqual(base.convert("@alice"), "@alice")
+        self.assertEqual(pickle.loads(pickle.dumps(clone)).convert("@bob"), "<@U2>")
+
+
+class TestConverterRegistry(unittest.TestCase):
+    def test_lru(self):
+        registry = ConverterRegistry(base_converter(), maxsize=2)
+        calls = []
+
+        def configure(tenant):
+            def apply(converter):
+                calls.append(tenant)
+                converter.register_regex_plugin("tenant", r"\bACME-(\d+)\b", f"<https://{tenant}/\\1|ACME-\\1>")
+            return apply
+
+        first = registry.get("a", configure("a"))
+        self.assertIs(registry.get("a", configure("a")), first)
+        self.assertIn("<https://a/1|ACME-1>", first.convert(MARKDOWN))
+        registry.get("b", configure("b"))
+        registry.get("a", configure("a"))
+        registry.get("c", configure("c"))
+        # "b" was the least recently used
+        registry.get("b", configure("b"))
+        self.assertEqual(calls, ["a", "b", "c", "b"])
+        self.assertEqual(registry.get_stats(), {"hits": 2, "misses": 4, "evictions": 2, "size": 2})
+        self.assertIs(registry.get("b"), registry.get("b", configure("x")))
+
+    def test_base_changes_rebuild(self):
+        base = base_converter()
+        registry = ConverterRegistry(base)
+        before = registry.get("a")
+        self.assertIs(registry.get("a"), before)
+        base.update_dictionary_plugin("people", add={"@alice": "<@U9>"})
+        after = registry.get("a")
+        self.assertIsNot(after, before)
+        self.assertIn("<@U9>", after.convert(MARKDOWN))
+        self.assertTrue(registry.invalidate("a"))
+        self.assertFalse(registry.invalidate("a"))
+        self.assertEqual(len(registry), 0)
+        with self.assertRaises(ValueError):
+            ConverterRegistry(base, maxsize=0)
+
+    def test_threads(self):
+        registry = ConverterRegistry(base_converter(), maxsize=8)
+        results = []
+
+        def work(seed):
+            for i in range(200):
+                tenant = (seed + i) % 12
+                converter = registry.get(tenant, lambda c, t=tenant: c.register_regex_plugin(
+                    "tenant", r"\bACME-(\d+)\b", f"T{t}-\\1"))
+                results.append(converter.convert(MARKDOWN).endswith(f"see T{tenant}-1"))
+
+        threads = [threading.Thread(target=work, args=(seed,)) for seed in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 800)
+        self.assertTrue(all(results))
+        self.assertLessEqual(len(registry), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
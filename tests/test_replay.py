@@ -0,0 +1,61 @@
+# exec command python3 -m unittest tests/test_replay.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import contextlib
+import io
+import tempfile
+import unittest
+from markdown_to_mrkdwn.converter import SlackMarkdownConverter
+from markdown_to_mrkdwn.replay import load_slow_inputs, main, replay
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "slow.jsonl")
+        converter = SlackMarkdownConverter(escape=True)
+        converter.watch_slow_inputs(threshold=0)
+        converter.convert("**a** & b")
+        converter.convert("# Title", with_plaintext=True)
+        converter.dump_slow_inputs(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_load_slow_inputs(self):
+        entries = load_slow_inputs(self.path)
+        self.assertEqual([entry["markdown"] for entry in entries], ["**a** & b", "# Title"])
+        self.assertEqual(entries[1]["with_plaintext"], True)
+        self.assertEqual(entries[0]["options"]["escape"], True)
+
+    def test_replay(self):
+        results = replay(load_slow_inputs(self.path), repeat=2)
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0]["length"], len("**a** & b"))
+        self.assertLessEqual(results[0]["best"], results[0]["median"])
+        with self.assertRaises(ValueError):
+            replay([], repeat=0)
+
+    def test_replay_warns_about_other_configurations(self):
+        def factory():
+            converter = SlackMarkdownConverter()
+            converter.register_regex_plugin("x", "a", "b")
+            return converter
+
+        with self.assertLogs(level="WARNING"):
+            replay(load_slow_inputs(self.path), factory, repeat=1)
+
+    def test_main(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            main([self.path, "--repeat", "1", "--profile", "--top", "3"])
+        lines = output.getvalue().splitlines()
+        self.assertIn("median ms", lines[0])
+        self.assertIn("cumulative", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+# exec command python3 -m unittest tests/test_rules.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import re
+import unittest
+from markdown_to_mrkdwn.converter import SlackMarkdownConverter, _BUILTIN_RULES
+from markdown_to_mrkdwn.rules import Rule, compile_rules
+
+
+def apply(plan, text):
+    for step in plan.steps:
+        text = re.compile(step.pattern, step.flags).sub(step.replacement, text)
+    return text
+
+
+class TestRuleCompiler(unittest.TestCase):
+    def test_drops_identities(self):
+        plan = compile_rules([
+            Rule("ordered", r"^(\s*)(\d+)\. (.+)", r"\1\2. \3"),
+            Rule("code", r"`(.+?)`", r"`\1`"),
+            Rule("quote", r"^> (.+)", r"> \1"),
+            Rule("swap", r"(a)(b)", r"\2\1"),
+            Rule("optional", r"a?(b)", r"a\1"),
+            Rule("escaped", r"\*(x)", r"*\1"),
+        ])
+        self.assertEqual(plan.dropped, ["ordered", "code", "quote", "escaped"])
+        self.assertEqual([step.names for step in plan.steps], [("swap",), ("optional",)])
+
+    def test_orders_by_constraints(self):
+        plan = compile_rules([
+            Rule("c", "c", "3", after="b"),
+            Rule("a", "a", "1"),
+            Rule("b", "b", "2", after="a"),
+            Rule("d", "d", "4", before="a"),
+        ])
+        self.assertEqual([step.names[0] for step in plan.steps], ["d", "a", "b", "c"])
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            compile_rules([Rule("a", "a", "1", after="b"), Rule("b", "b", "2", after="a")])
+        with self.assertRaisesRegex(ValueError, "unknown"):
+            compile_rules([Rule("a", "a", "1", after="z")])
+        with self.assertRaisesRegex(ValueError, "Duplicate"):
+            compile_rules([Rule("a", "a", "1"), Rule("a", "b", "2")])
+
+    def test_merges_shared_replacements(self):
+        rules = [Rule(f"h{level}", "^" + "#" * level + r" (.+)$", r"*\1*") for level in (3, 2, 1)]
+        plan = compile_rules(rules)
+        self.assertEqual(len(plan.steps), 1)
+        self.assertEqual(plan.steps[0].names, ("h3", "h2", "h1"))
+        self.assertEqual(plan.steps[0].needle, "# ")
+        for line in ["# a", "## b", "### c", "#### d", "## ### e", "#x", "a # b"]:
+            expected = line
+            for rule in rules:
+                expected = re.sub(rule.pattern, rule.replacement, expected, flags=rule.flags)
+            self.assertEqual(apply(plan, line), expected)
+
+    def test_keeps_unsafe_merges_apart(self):
+        # "a" is a prefix of "ab", and the output of the first rule starts a match of the second
+        for rules in ([Rule("x", r"^a(.)", r"[\1]"), Rule("y", r"^ab(.)", r"[\1]")],
+                      [Rule("x", r"^a(.)", r"b-\1"), Rule("y", r"^b(.)", r"b-\1")],
+                      [Rule("x", r"a(.)", r"[\1]"), Rule("y", r"b(.)", r"[\1]")]):
+            self.assertEqual(len(compile_rules(rules).steps), 2)
+
+    def test_needles(self):
+        plan = compile_rules([
+            Rule("link", r"\[(.+?)\]\((.+?)\)", r"<\2|\1>"),
+            Rule("optional", r"x?y", "z"),
+            Rule("alternation", r"ab|cd", "e"),
+            Rule("ignorecase", r"abc", "d", flags=re.IGNORECASE),
+        ])
+        self.assertEqual([step.needle for step in plan.steps], ["](", "y", None, None])
+
+
+class TestConverterRules(unittest.TestCase):
+    def test_builtin_plan(self):
+        converter = SlackMarkdownConverter()
+        explanation = converter.explain()
+        self.assertIn("h6 + h5 + h4 + h3 + h2 + h1", explanation)
+        self.assertIn("dropped as no-ops: ordered_list, inline_code, blockquote", explanation)
+        self.assertEqual(len(converter.patterns), len(_BUILTIN_RULES) - 3 - 5)
+        self.assertEqual(converter.convert("###### a\n# ***b***\n####### c"), "*a*\n**_b_**\n####### c")
+
+    def test_add_rule(self):
+        converter = SlackMarkdownConverter()
+        fingerprint = converter.config_fingerprint()
+        # Before italic, so the asterisks are still there
+        converter.add_rule("shout", r"\*(\w+)!\*", lambda match: match.group(1).upper(), before="italic")
+        converter.add_rule("ticket", r"\b(PROJ-\d+)\b", r"<https://jira/\1|\1>")
+        self.assertEqual(converter.convert("*stop!* see PROJ-12, `PROJ-13`"),
+                         "STOP see <https://jira/PROJ-12|PROJ-12>, `PROJ-13`")
+        self.assertNotEqual(converter.config_fingerprint(), fingerprint)
+        names = [line.split(": ")[0].split(". ")[1] for line in converter.explain().splitlines()[1:-1]]
+        self.assertLess(names.index("shout"), names.index("italic"))
+        self.assertEqual(names[-1], "ticket")
+        with self.assertRaises(ValueError):
+            converter.add_rule("ticket", "x", "y")
+        with self.assertRaises(ValueError):
+            converter.add_rule("loop", "x", "y", after="bold", before="italic")
+        self.assertEqual(converter.rules[-1].name, "ticket")
+        document = SlackMarkdownConverter(document_mode=True)
+        document.add_rule("ticket", r"\b(PROJ-\d+)\b", r"<https://jira/\1|\1>")
+        markdown = "# PROJ-1\n```\nPROJ-2\n```\n- PROJ-3"
+        self.assertEqual(document.convert(markdown), "*<https://jira/PROJ-1|PROJ-1>*\n```\nPROJ-2\n```\n"
+                                                     "• <https://jira/PROJ-3|PROJ-3>")
+
+    def test_added_rule_applies_to_plain_text(self):
+        """Test that text matching only an added rule is not returned as plain text"""
+        for options in ({}, {"compact": True}):
+            converter = SlackMarkdownConverter(**options)
+            converter.add_rule("x", "foo", "bar")
+            with self.subTest(options=options):
+                self.assertEqual(converter.convert("foo"), "bar")
+                self.assertEqual(converter.convert("foo *a*"), "bar _a_")
+                self.assertEqual(converter.convert_ex("foo").text, "bar")
+                self.assertEqual(converter.get_stats()["skipped_documents"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
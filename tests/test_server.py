@@ -0,0 +1,160 @@
+# exec command python3 -m unittest tests/test_server.py
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import http.client
+import json
+import socket
+import tempfile
+import threading
+import unittest
+from markdown_to_mrkdwn.converter import SlackMarkdownConverter
+from markdown_to_mrkdwn.server import ConversionServer
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_path)
+
+
+def request(connection, method, path, payload=None):
+    body = json.dumps(payload).encode("utf-8") if payload is not None else None
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read().decode("utf-8"))
+
+
+class TestConversionServer(unittest.TestCase):
+    def setUp(self):
+        self.server = ConversionServer(workers=2, queue_size=8).start()
+        host, port = self.server.address
+        self.connection = http.client.HTTPConnection(host, port, timeout=10)
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.stop()
+
+    def test_convert(self):
+        status, body = request(self.connection, "POST", "/convert", {"markdown": "**bold**"})
+        self.assertEqual(status, 200)
+        self.assertEqual(body, {"mrkdwn": "*bold*"})
+
+    def test_batch(self):
+        status, body = request(self.connection, "POST", "/batch",
+                               {"documents": ["# Title", "- item", ""]})
+        self.assertEqual(status, 200)
+        self.assertEqual(body, {"results": ["*Title*", "• item", ""]})
+
+    def test_invalid_request(self):
+        status, body = request(self.connection, "POST", "/convert", {"text": "x"})
+        self.assertEqual(status, 400)
+        status, body = request(self.connection, "POST", "/batch", {"documents": [1]})
+        self.assertEqual(status, 400)
+
+    def test_invalid_content_length(self):
+        """Test that a bad or oversized Content-Length is answered without reading the body"""
+        host, port = self.server.address
+        self.server.max_body_bytes = 100
+        for length, expected in (("abc", 400), ("-1", 400), ("+5", 400), ("1_0", 400), ("101", 413)):
+            connection = http.client.HTTPConnection(host, port, timeout=10)
+            connection.putrequest("POST", "/convert")
+            connection.putheader("Content-Length", length)
+            connection.endheaders()
+            response = connection.getresponse()
+            with self.subTest(length=length):
+                self.assertEqual(response.status, expected)
+                self.assertIn("error", json.loads(response.read().decode("utf-8")))
+            connection.close()
+        status, body = request(self.connection, "POST", "/convert", {"markdown": "**ok**"})
+        self.assertEqual((status, body), (200, {"mrkdwn": "*ok*"}))
+
+    def test_unknown_path(self):
+        status, _ = request(self.connection, "GET", "/nope")
+        self.assertEqual(status, 404)
+
+    def test_metrics(self):
+        for _ in range(3):
+            request(self.connection, "POST", "/convert", {"markdown": "*x*"})
+        status, body = request(self.connection, "GET", "/metrics")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["requests"], 3)
+        self.assertEqual(body["documents"], 3)
+        self.assertEqual(body["queue_depth"], 0)
+        self.assertEqual(body["latency_ms"]["samples"], 3)
+        self.assertLessEqual(body["latency_ms"]["p50"], body["latency_ms"]["p99"])
+
+
+class TestConversionServerBackpressure(unittest.TestCase):
+    def test_full_queue_is_rejected(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def factory():
+            converter = SlackMarkdownConverter()
+
+            def block(text):
+                started.set()
+                release.wait(10)
+                return text
+            converter.register_plugin("block", block, scope="global")
+            return converter
+
+        server = ConversionServer(factory, workers=1, queue_size=1).start()
+        try:
+            host, port = server.address
+            results = []
+
+            def send():
+                connection = http.client.HTTPConnection(host, port, timeout=10)
+                results.append(request(connection, "POST", "/convert", {"markdown": "x"})[0])
+                connection.close()
+
+            busy = threading.Thread(target=send)
+            busy.start()
+            self.assertTrue(started.wait(5))
+            queued = threading.Thread(target=send)
+            queued.start()
+            for _ in range(100):
+                if server.metrics_snapshot()["queue_depth"] == 1:
+                    break
+                threading.Event().wait(0.01)
+
+            connection = http.client.HTTPConnection(host, port, timeout=10)
+            status, body = request(connection, "POST", "/convert", {"markdown": "x"})
+            connection.close()
+            self.assertEqual(status, 503)
+
+            release.set()
+            busy.join()
+            queued.join()
+            self.assertEqual(results, [200, 200])
+            self.assertEqual(server.metrics_snapshot()["rejected"], 1)
+        finally:
+            release.set()
+            server.stop()
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets are not available")
+class TestConversionServerUnixSocket(unittest.TestCase):
+    def test_convert_over_unix_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "mrkdwn.sock")
+            with ConversionServer(unix_socket=path, workers=1):
+                connection = _UnixHTTPConnection(path)
+                status, body = request(connection, "POST", "/convert", {"markdown": "~~gone~~"})
+                connection.close()
+            self.assertEqual(status, 200)
+            self.assertEqual(body, {"mrkdwn": "~gone~"})
+            self.assertFalse(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()